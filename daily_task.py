@@ -7,7 +7,8 @@ Per-subscriber pipeline:
   3. Aggregate & deduplicate search queries across subscribers.
   4. Search once per unique (query, location) pair.
   5. Upsert all found jobs into the DB (with descriptions).
-  6. For each subscriber: evaluate unseen jobs, filter, email, log.
+  6. For each subscriber: evaluate unseen jobs and filter; then send the
+     queued digests concurrently and log.
 
 Required env vars:
     GOOGLE_API_KEY                      — Gemini LLM key
@@ -21,7 +22,8 @@ import logging
 import os
 import secrets
 import sys
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 from dotenv import load_dotenv
@@ -29,20 +31,20 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from immermatch.db import (
+    close_clients,
     expire_subscriptions,
     get_active_subscribers_with_profiles,
-    get_job_ids_by_urls,
-    get_sent_job_ids,
+    get_unsent_job_ids,
     issue_unsubscribe_token,
-    log_sent_jobs,
+    log_sent_jobs_bulk,
     mark_subscriber_last_sent,
     purge_inactive_subscribers,
-    upsert_jobs,
+    upsert_jobs_with_ids,
 )
 from immermatch.db import (
     get_admin_client as get_db,
 )
-from immermatch.emailer import send_daily_digest
+from immermatch.emailer import digest_date, send_daily_digest
 from immermatch.evaluator_agent import evaluate_all_jobs
 from immermatch.llm import create_client
 from immermatch.location import normalize_location
@@ -55,6 +57,20 @@ logging.basicConfig(
 )
 log = logging.getLogger("daily_task")
 
+# Concurrent sent-log lookups; these are pure I/O against PostgREST and share
+# the pooled HTTP/2 connection of the cached admin client.
+_SENT_IDS_WORKERS = 16
+
+# Concurrent digest sends; Resend's request rate is enforced by the emailer's
+# shared limiter, the pool just keeps several POSTs in flight.
+_SEND_WORKERS = 4
+
+# job_sent_logs rows are buffered and written every few subscribers (or once
+# an insert chunk's worth of rows is pending), so one failed insert only
+# re-queues those subscribers' jobs for the next run, not the whole run's.
+_SENT_LOG_FLUSH_SUBSCRIBERS = 25
+_SENT_LOG_FLUSH_ROWS = 2000
+
 
 def _listing_url(job: JobListing) -> str:
     """Get the best URL for a JobListing (prefer first apply option, fall back to link)."""
@@ -65,6 +81,96 @@ def _listing_url(job: JobListing) -> str:
     return job.link or ""
 
 
+def _weekly_send_pending(sub: dict, now: datetime) -> bool:
+    """Return True when a weekly subscriber was emailed less than 7 days ago."""
+    if (sub.get("cadence") or "daily") != "weekly":
+        return False
+    last_sent = sub.get("last_sent_at")
+    if not last_sent:
+        return False
+    last_sent_dt = datetime.fromisoformat(last_sent.replace("Z", "+00:00"))
+    return now - last_sent_dt < timedelta(days=7)
+
+
+def _fetch_unsent_job_ids(db, candidates_by_sub: dict[str, list[str]]) -> dict[str, set[str]]:
+    """Look up, concurrently, which candidate job IDs each subscriber has not been sent yet."""
+    pending = {sid: ids for sid, ids in candidates_by_sub.items() if ids}
+    if not pending:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(_SENT_IDS_WORKERS, len(pending))) as pool:
+        results = pool.map(lambda item: set(get_unsent_job_ids(db, *item)), pending.items())
+        return dict(zip(pending, results, strict=True))
+
+
+def _flush_sent_log(db, pending: dict[str, list[str]]) -> None:
+    """Write buffered ``subscriber_id → job IDs`` sends and empty the buffer.
+
+    A failed insert is logged, not raised: those jobs stay unlogged and are
+    re-evaluated for their subscribers on the next run.
+    """
+    if not pending:
+        return
+    pairs = [(sub_id, job_id) for sub_id, job_ids in pending.items() for job_id in job_ids]
+    subscriber_count = len(pending)
+    pending.clear()
+    try:
+        log_sent_jobs_bulk(db, pairs)
+    except Exception:
+        log.exception(
+            "Failed to log %d sent jobs for %d subscriber(s); will retry evaluation next run",
+            len(pairs),
+            subscriber_count,
+        )
+
+
+def _record_sent(db, pending: dict[str, list[str]], sub_id: str, job_ids: list[str]) -> None:
+    """Buffer *job_ids* as sent to *sub_id*, flushing once the buffer is full."""
+    if not job_ids:
+        return
+    pending.setdefault(sub_id, []).extend(job_ids)
+    if len(pending) >= _SENT_LOG_FLUSH_SUBSCRIBERS or sum(len(ids) for ids in pending.values()) >= _SENT_LOG_FLUSH_ROWS:
+        _flush_sent_log(db, pending)
+
+
+def _send_digest(digest: dict) -> bool:
+    """Send one queued digest; log and return False when Resend rejects it."""
+    try:
+        send_daily_digest(
+            digest["email"],
+            digest["jobs"],
+            unsubscribe_url=digest["unsubscribe_url"],
+            target_location=digest["target_location"],
+            today=digest["today"],
+        )
+    except Exception:
+        log.exception("  sub=%s — failed to send daily digest, continuing", digest["sub_id"])
+        return False
+    return True
+
+
+def _finish_send(db, sent_log: dict[str, list[str]], digest: dict, sent: bool) -> None:
+    """Record the outcome of one digest send in the subscriber state and sent log."""
+    sub_id = digest["sub_id"]
+    if not sent:
+        # Only log low-score IDs; good matches will retry on the next run.
+        # Idempotency: the unsent check (get_unsent_job_ids) prevents
+        # double-sending across runs. After a failed send, good-match IDs
+        # stay out of job_sent_logs and reappear as unseen on the next run.
+        _record_sent(db, sent_log, sub_id, digest["low_score_ids"])
+        return
+
+    # Send succeeded — first mark subscriber as sent, then best-effort log ALL evaluated jobs
+    try:
+        mark_subscriber_last_sent(db, sub_id)
+    except Exception:
+        log.exception(
+            "  sub=%s — failed to mark last_sent_at; subscriber may receive duplicate digests",
+            sub_id,
+        )
+
+    _record_sent(db, sent_log, sub_id, digest["low_score_ids"] + digest["good_match_ids"])
+
+
 def _job_url(ej: EvaluatedJob) -> str:
     """Get the best URL for an EvaluatedJob (prefer first apply option, fall back to link)."""
     if ej.job.apply_options:
@@ -125,7 +231,7 @@ def main() -> int:
             location=loc,
         )
         for job in found:
-            key = f"{job.title}|{job.company_name}|{job.location}"
+            key = job.cache_key
             if key not in all_jobs:
                 all_jobs[key] = job
             url = _listing_url(job)
@@ -155,149 +261,157 @@ def main() -> int:
                 }
             )
 
+    # The upsert returns the stored rows, so it also yields the DB IDs
+    url_to_db_id: dict[str, str] = {}
     if job_dicts:
-        upsert_jobs(db, job_dicts)
+        url_to_db_id = upsert_jobs_with_ids(db, job_dicts)
         log.info("Upserted %d jobs into DB", len(job_dicts))
 
-    # Get DB IDs for all job URLs
-    url_to_db_id = get_job_ids_by_urls(db, list(url_to_job.keys()))
-
     # ── 7. Per-subscriber: evaluate, filter, email ───────────────────────
     gemini = create_client()
     app_url = os.environ.get("APP_URL", "").rstrip("/")
-
+    # One timestamp for the whole run instead of a clock read per subscriber.
+    run_started = datetime.now(timezone.utc)
+    unsub_expires = (run_started + timedelta(days=30)).isoformat()
+    today = digest_date(run_started)
+
+    # Sent-log lookups are independent per subscriber, so fetch them all up
+    # front in parallel instead of one blocking round-trip per loop iteration.
+    # Each lookup only covers the subscriber's candidate jobs, not their
+    # whole send history.
+    candidates_by_sub: dict[str, list[str]] = {}
     for sub in subscribers:
-        sub_email = sub["email"]
-        sub_id = sub["id"]
-        sub_min_score = sub.get("min_score") or 70
-        sub_cadence = sub.get("cadence") or "daily"
-
-        # Skip weekly subscribers whose last send was less than 7 days ago
-        if sub_cadence == "weekly":
-            last_sent = sub.get("last_sent_at")
-            if last_sent:
-                last_sent_dt = datetime.fromisoformat(last_sent.replace("Z", "+00:00"))
-                if datetime.now(timezone.utc) - last_sent_dt < timedelta(days=7):
-                    log.info("  sub=%s — weekly cadence, last sent %s, skipping", sub_id, last_sent)
-                    continue
-
-        # Reconstruct profile from stored JSON
-        profile_data = sub.get("profile_json")
-        if not profile_data:
-            log.warning("  sub=%s — no profile_json, skipping", sub_id)
-            continue
-        try:
-            profile = CandidateProfile(**profile_data)
-        except Exception:
-            log.exception("  sub=%s — invalid profile_json, skipping", sub_id)
-            continue
-
-        # Find unseen jobs for this subscriber — only from their location bucket
-        sent_ids = get_sent_job_ids(db, sub_id)
-        sub_loc = normalize_location(sub.get("target_location") or "")
-        sub_urls = location_urls.get(sub_loc, set())
-        unseen_urls = sorted(url for url in sub_urls if url_to_db_id.get(url) and url_to_db_id[url] not in sent_ids)
-
-        if not unseen_urls:
-            log.info("  sub=%s — no unseen jobs, skipping", sub_id)
-            continue
-
-        # Build JobListing objects for unseen jobs
-        unseen_jobs = [url_to_job[url] for url in unseen_urls if url in url_to_job]
-        log.info("  sub=%s — evaluating %d unseen jobs", sub_id, len(unseen_jobs))
-
-        # Evaluate unseen jobs against this subscriber's profile
-        evaluated = evaluate_all_jobs(gemini, profile, unseen_jobs)
-
-        # Split evaluated jobs by score threshold.
-        # Low-score IDs are always safe to log (we never want to re-evaluate them).
-        # Good-match IDs are only logged after a successful send so they retry
-        # on the next run if the email fails.
-        evaluated_with_urls = [(ej, _job_url(ej)) for ej in evaluated]
-        good_matches = [ej for ej, _ in evaluated_with_urls if ej.evaluation.score >= sub_min_score]
-        low_score_ids = [
-            url_to_db_id[url]
-            for ej, url in evaluated_with_urls
-            if 0 <= ej.evaluation.score < sub_min_score and url in url_to_db_id
-        ]
-        good_match_ids = [
-            url_to_db_id[url]
-            for ej, url in evaluated_with_urls
-            if ej.evaluation.score >= sub_min_score and url in url_to_db_id
-        ]
-
-        if not good_matches:
-            log.info("  sub=%s — no jobs above score %d", sub_id, sub_min_score)
-            # Log all evaluated (all are low-score) to avoid re-evaluating
-            if low_score_ids:
-                log_sent_jobs(db, sub_id, low_score_ids)
+        if _weekly_send_pending(sub, run_started):
             continue
-
-        # Send email
-        email_jobs = [
-            {
-                "title": ej.job.title,
-                "company": ej.job.company_name,
-                "url": _job_url(ej),
-                "score": ej.evaluation.score,
-                "location": ej.job.location,
-            }
-            for ej in good_matches
-        ]
-
-        unsubscribe_url = ""
-        if app_url:
-            unsub_token = secrets.token_urlsafe(32)
-            unsub_expires = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
-            token_written = issue_unsubscribe_token(
-                db,
-                sub_id,
-                token=unsub_token,
-                expires_at=unsub_expires,
-            )
-            if token_written:
-                unsubscribe_url = f"{app_url}/unsubscribe?token={unsub_token}"
-
-        log.info("  sub=%s — sending %d matches (score >= %d)", sub_id, len(email_jobs), sub_min_score)
-        try:
-            send_daily_digest(
-                sub_email,
-                email_jobs,
-                unsubscribe_url=unsubscribe_url,
-                target_location=sub.get("target_location", ""),
-            )
-        except Exception:
-            log.exception("  sub=%s — failed to send daily digest, continuing", sub_id)
-            # Only log low-score IDs; good matches will retry on the next run.
-            # Idempotency: the sent_ids check (get_sent_job_ids) prevents
-            # double-sending across runs. After a failed send, good-match IDs
-            # stay out of job_sent_logs and reappear as unseen on the next run.
-            if low_score_ids:
-                log_sent_jobs(db, sub_id, low_score_ids)
-            continue
-
-        # Send succeeded — first mark subscriber as sent, then best-effort log ALL evaluated jobs
-        try:
-            mark_subscriber_last_sent(db, sub_id)
-        except Exception:
-            log.exception(
-                "  sub=%s — failed to mark last_sent_at; subscriber may receive duplicate digests",
-                sub_id,
-            )
-
-        all_eval_ids = low_score_ids + good_match_ids
-        if all_eval_ids:
+        sub_urls = location_urls.get(normalize_location(sub.get("target_location") or ""), set())
+        candidates_by_sub[sub["id"]] = [url_to_db_id[url] for url in sub_urls if url in url_to_db_id]
+    unsent_by_sub = _fetch_unsent_job_ids(db, candidates_by_sub)
+
+    # Job IDs to record in job_sent_logs per subscriber; written in bulk
+    # inserts every few subscribers instead of one round-trip per subscriber.
+    sent_log: dict[str, list[str]] = {}
+    # Digests are sent in the background as soon as they are built, so the
+    # blocking Resend POSTs overlap with evaluating the next subscribers and a
+    # later failure cannot hold back digests that are already done. Finished
+    # sends are recorded (on this thread) whenever the queue grows past a few
+    # per worker, and the rest are drained in the finally block.
+    send_pool = ThreadPoolExecutor(max_workers=_SEND_WORKERS, thread_name_prefix="send")
+    in_flight: deque[tuple[dict, Future[bool]]] = deque()
+    try:
+        for sub in subscribers:
+            sub_email = sub["email"]
+            sub_id = sub["id"]
+            sub_min_score = sub.get("min_score") or 70
+
+            # Skip weekly subscribers whose last send was less than 7 days ago
+            if _weekly_send_pending(sub, run_started):
+                log.info("  sub=%s — weekly cadence, last sent %s, skipping", sub_id, sub.get("last_sent_at"))
+                continue
+
+            # Reconstruct profile from stored JSON
+            profile_data = sub.get("profile_json")
+            if not profile_data:
+                log.warning("  sub=%s — no profile_json, skipping", sub_id)
+                continue
             try:
-                log_sent_jobs(db, sub_id, all_eval_ids)
+                profile = CandidateProfile(**profile_data)
             except Exception:
-                log.exception(
-                    "  sub=%s — failed to log sent jobs; will retry evaluation next run",
+                log.exception("  sub=%s — invalid profile_json, skipping", sub_id)
+                continue
+
+            # Find unseen jobs for this subscriber — only from their location bucket
+            unsent_ids = unsent_by_sub.get(sub_id, set())
+            sub_loc = normalize_location(sub.get("target_location") or "")
+            sub_urls = location_urls.get(sub_loc, set())
+            unseen_urls = sorted(url for url in sub_urls if url_to_db_id.get(url) in unsent_ids)
+
+            if not unseen_urls:
+                log.info("  sub=%s — no unseen jobs, skipping", sub_id)
+                continue
+
+            # Build JobListing objects for unseen jobs
+            unseen_jobs = [url_to_job[url] for url in unseen_urls if url in url_to_job]
+            log.info("  sub=%s — evaluating %d unseen jobs", sub_id, len(unseen_jobs))
+
+            # Evaluate unseen jobs against this subscriber's profile
+            evaluated = evaluate_all_jobs(gemini, profile, unseen_jobs)
+
+            # Split evaluated jobs by score threshold.
+            # Low-score IDs are always safe to log (we never want to re-evaluate them).
+            # Good-match IDs are only logged after a successful send so they retry
+            # on the next run if the email fails.
+            evaluated_with_urls = [(ej, _job_url(ej)) for ej in evaluated]
+            good_matches = [ej for ej, _ in evaluated_with_urls if ej.evaluation.score >= sub_min_score]
+            low_score_ids = [
+                url_to_db_id[url]
+                for ej, url in evaluated_with_urls
+                if 0 <= ej.evaluation.score < sub_min_score and url in url_to_db_id
+            ]
+            good_match_ids = [
+                url_to_db_id[url]
+                for ej, url in evaluated_with_urls
+                if ej.evaluation.score >= sub_min_score and url in url_to_db_id
+            ]
+
+            if not good_matches:
+                log.info("  sub=%s — no jobs above score %d", sub_id, sub_min_score)
+                # Log all evaluated (all are low-score) to avoid re-evaluating
+                _record_sent(db, sent_log, sub_id, low_score_ids)
+                continue
+
+            # Send email
+            email_jobs = [
+                {
+                    "title": ej.job.title,
+                    "company": ej.job.company_name,
+                    "url": _job_url(ej),
+                    "score": ej.evaluation.score,
+                    "location": ej.job.location,
+                }
+                for ej in good_matches
+            ]
+
+            unsubscribe_url = ""
+            if app_url:
+                unsub_token = secrets.token_urlsafe(32)
+                token_written = issue_unsubscribe_token(
+                    db,
                     sub_id,
+                    token=unsub_token,
+                    expires_at=unsub_expires,
                 )
+                if token_written:
+                    unsubscribe_url = f"{app_url}/unsubscribe?token={unsub_token}"
+
+            log.info("  sub=%s — sending %d matches (score >= %d)", sub_id, len(email_jobs), sub_min_score)
+            digest = {
+                "sub_id": sub_id,
+                "email": sub_email,
+                "jobs": email_jobs,
+                "unsubscribe_url": unsubscribe_url,
+                "target_location": sub.get("target_location", ""),
+                "today": today,
+                "low_score_ids": low_score_ids,
+                "good_match_ids": good_match_ids,
+            }
+            in_flight.append((digest, send_pool.submit(_send_digest, digest)))
+            while len(in_flight) > 4 * _SEND_WORKERS:
+                done_digest, future = in_flight.popleft()
+                _finish_send(db, sent_log, done_digest, future.result())
+    finally:
+        while in_flight:
+            done_digest, future = in_flight.popleft()
+            _finish_send(db, sent_log, done_digest, future.result())
+        send_pool.shutdown()
+        _flush_sent_log(db, sent_log)
 
     log.info("Daily digest complete.")
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    try:
+        exit_code = main()
+    finally:
+        close_clients()
+    sys.exit(exit_code)
@@ -13,9 +13,11 @@ import threading
 import time
 from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from operator import attrgetter
 from pathlib import Path
 
 import streamlit as st
+from google import genai
 
 jobs_per_query = 20  # default value
 
@@ -41,10 +43,10 @@ from pathlib import Path as _Path  # noqa: E402
 
 _sys.path.insert(0, str(_Path(__file__).resolve().parent.parent))
 
-from immermatch.cache import ResultCache  # noqa: E402
+from immermatch.cache import ResultCache, cv_hash  # noqa: E402
 from immermatch.cv_parser import SUPPORTED_EXTENSIONS, extract_text  # noqa: E402
 from immermatch.db import SUBSCRIPTION_DAYS  # noqa: E402
-from immermatch.evaluator_agent import evaluate_job, generate_summary  # noqa: E402
+from immermatch.evaluator_agent import generate_summary, submit_evaluation_batches  # noqa: E402
 from immermatch.llm import create_client  # noqa: E402
 from immermatch.location import normalize_location  # noqa: E402
 from immermatch.models import CandidateProfile, EvaluatedJob, JobListing  # noqa: E402
@@ -214,6 +216,12 @@ def _get_summary_executor() -> ThreadPoolExecutor:
     return ThreadPoolExecutor(max_workers=2)
 
 
+@st.cache_resource
+def _get_llm_client() -> genai.Client:
+    """Shared Gemini client so its HTTP connection pool is reused across runs and sessions."""
+    return create_client()
+
+
 _SUMMARY_EXECUTOR = _get_summary_executor()
 
 _DEFAULTS = {
@@ -242,7 +250,7 @@ for k, v in _DEFAULTS.items():
 CACHE_ROOT = Path(".immermatch_cache")
 
 
-def _cv_file_hash(data: bytes) -> str:
+def _cv_file_hash(data: bytes | memoryview) -> str:
     """Return a stable SHA-256 hex digest for CV file content."""
     return hashlib.sha256(data).hexdigest()[:16]
 
@@ -260,18 +268,21 @@ def _cleanup_old_sessions(max_age_hours: int = 24, max_sessions: int = 50) -> No
         return
     current = st.session_state.cv_file_hash or ""
     cutoff = datetime.now() - timedelta(hours=max_age_hours)
-    dirs: list[tuple[float, Path]] = []
-    for child in CACHE_ROOT.iterdir():
-        if child.is_dir() and child.name != current:
-            try:
-                mtime_ts = child.stat().st_mtime
-                mtime = datetime.fromtimestamp(mtime_ts)
-                if mtime < cutoff:
-                    shutil.rmtree(child, ignore_errors=True)
-                else:
-                    dirs.append((mtime_ts, child))
-            except OSError:
-                pass
+    dirs: list[tuple[float, str]] = []
+    # os.scandir returns entries with cached type info, so each child costs a
+    # single stat() call.
+    with os.scandir(CACHE_ROOT) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) and entry.name != current:
+                try:
+                    mtime_ts = entry.stat(follow_symlinks=False).st_mtime
+                    mtime = datetime.fromtimestamp(mtime_ts)
+                    if mtime < cutoff:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        dirs.append((mtime_ts, entry.path))
+                except OSError:
+                    pass
     # Cap total number of session directories
     if len(dirs) >= max_sessions:
         dirs.sort()  # oldest first
@@ -322,7 +333,8 @@ def _extract_uploaded_cv(uploaded_file) -> str:
         tmp.write(uploaded_file.getbuffer())
         tmp_path = Path(tmp.name)
     try:
-        text = extract_text(tmp_path)
+        # One char past the limit is enough to know the text needs truncating.
+        text = extract_text(tmp_path, max_chars=_MAX_CV_CHARS + 1)
     finally:
         tmp_path.unlink(missing_ok=True)
     if len(text) > _MAX_CV_CHARS:
@@ -397,6 +409,9 @@ _RELIABILITY_INFO: dict[str, tuple[str, str, str]] = {
 }
 
 
+_RELATIVE_DATE_RE = re.compile(r"(\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago")
+
+
 def _parse_relative_date(posted_at: str) -> datetime | None:
     """Parse relative date strings like '2 days ago' into a datetime.
 
@@ -408,7 +423,7 @@ def _parse_relative_date(posted_at: str) -> datetime | None:
     now = datetime.now(timezone.utc)
     if posted_lower in ("just now", "today", "just posted"):
         return now
-    match = re.match(r"(\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago", posted_lower)
+    match = _RELATIVE_DATE_RE.match(posted_lower)
     if not match:
         return None
     value = int(match.group(1))
@@ -425,6 +440,47 @@ def _parse_relative_date(posted_at: str) -> datetime | None:
     return now - unit_map[unit] * value
 
 
+_MAX_RICH_CARDS = 20
+
+
+def _job_columns(evaluated_jobs: list[EvaluatedJob]) -> dict[str, list]:
+    """Return per-job filter and sort columns, extracted once per result list.
+
+    Widget changes rerun the whole script; caching the columns in session state
+    lets those reruns filter plain lists instead of walking every model again.
+    """
+    cached = st.session_state.get("_job_columns")
+    if cached is not None and cached["source"] is evaluated_jobs:
+        return cached
+
+    parsed_dates: dict[str, datetime | None] = {}
+    for ej in evaluated_jobs:
+        if ej.job.posted_at not in parsed_dates:
+            parsed_dates[ej.job.posted_at] = _parse_relative_date(ej.job.posted_at)
+
+    cols: dict[str, list] = {
+        "source": evaluated_jobs,
+        "scores": [ej.evaluation.score for ej in evaluated_jobs],
+        "companies": [ej.job.company_name for ej in evaluated_jobs],
+        "locations": [ej.job.location for ej in evaluated_jobs],
+        "titles": [ej.job.title.lower() for ej in evaluated_jobs],
+        "dates": [parsed_dates[ej.job.posted_at] for ej in evaluated_jobs],
+    }
+    st.session_state["_job_columns"] = cols
+    return cols
+
+
+def _filter_options(evaluated_jobs: list[EvaluatedJob]) -> tuple[list[str], list[str]]:
+    """Return sorted company and location options, rebuilt only for a new result list."""
+    cached = st.session_state.get("_filter_options")
+    if cached is not None and cached[0] is evaluated_jobs:
+        return cached[1], cached[2]
+    companies = sorted({ej.job.company_name for ej in evaluated_jobs})
+    locations = sorted({ej.job.location for ej in evaluated_jobs})
+    st.session_state["_filter_options"] = (evaluated_jobs, companies, locations)
+    return companies, locations
+
+
 def _score_emoji(score: int) -> str:
     if score >= 85:
         return "🟢"
@@ -496,10 +552,10 @@ def _render_job_card(ej: EvaluatedJob) -> None:
 
 
 def _generate_summary_background(
+    client: genai.Client,
     profile: CandidateProfile,
     evaluated_jobs: list[EvaluatedJob],
 ) -> str:
-    client = create_client()
     return generate_summary(client, profile, evaluated_jobs)
 
 
@@ -514,6 +570,7 @@ def _render_career_summary(evaluated_jobs: list[EvaluatedJob]) -> bool:
             st.session_state.summary_error = None
             st.session_state.summary_future = _SUMMARY_EXECUTOR.submit(
                 _generate_summary_background,
+                _get_llm_client(),
                 st.session_state.profile,
                 evaluated_jobs,
             )
@@ -820,16 +877,17 @@ if uploaded_file is not None:
         st.warning("Please provide CV processing consent before uploading your CV.")
         st.stop()
 
-    file_bytes = uploaded_file.getbuffer()
-    if len(file_bytes) > 5 * 1024 * 1024:
+    # Reject oversized uploads from the reported size before touching the buffer.
+    if uploaded_file.size > 5 * 1024 * 1024:
         st.error("File exceeds 5 MB limit. Please upload a smaller file.")
         st.stop()
 
-    file_hash = _cv_file_hash(bytes(file_bytes))
+    file_hash = _cv_file_hash(uploaded_file.getbuffer())
     if file_hash != st.session_state.cv_file_hash:
         # New or changed file — extract text + profile
         cv_text = _extract_uploaded_cv(uploaded_file)
         st.session_state.cv_text = cv_text
+        st.session_state._cv_text_hash = cv_hash(cv_text)
         st.session_state.cv_file_hash = file_hash
         st.session_state.cv_file_name = uploaded_file.name
         # Clear stale downstream state
@@ -869,7 +927,8 @@ if has_cv and not has_results and run_button:
 # Eager profile extraction — if we have CV text but no profile yet
 if st.session_state.cv_text and st.session_state.profile is None:
     cache = _get_cache()
-    cached_profile = cache.load_profile(st.session_state.cv_text)
+    text_hash = st.session_state.get("_cv_text_hash")
+    cached_profile = cache.load_profile(st.session_state.cv_text, text_hash=text_hash)
     if cached_profile is not None:
         st.session_state.profile = cached_profile
         st.session_state._cv_consent_given = True  # consent was given in the session that created the cache
@@ -881,9 +940,9 @@ if st.session_state.cv_text and st.session_state.profile is None:
             else "🧠 Analyzing your CV..."
         )
         with st.status(label, expanded=False) as status:
-            client = create_client()
+            client = _get_llm_client()
             profile = profile_candidate(client, st.session_state.cv_text)
-            cache.save_profile(st.session_state.cv_text, profile)
+            cache.save_profile(st.session_state.cv_text, profile, text_hash=text_hash)
             st.session_state.profile = profile
             status.update(label="✅ Profile extracted", state="complete")
         st.rerun()
@@ -892,6 +951,29 @@ if st.session_state.cv_text and st.session_state.profile is None:
 # ---------------------------------------------------------------------------
 # Pipeline
 # ---------------------------------------------------------------------------
+def _collect_evaluations(
+    futures: list[Future[list[EvaluatedJob]]],
+    all_evals: dict[str, EvaluatedJob],
+    total: int,
+    progress_bar,
+) -> None:
+    """Store evaluation results as batches finish and stream a card for each job."""
+    # One placeholder per job: each card is written once into its own slot
+    # as it completes, instead of growing a container on every tick.
+    slots = [st.empty() for _ in range(total)]
+    done = 0
+    for future in as_completed(futures):
+        for ej in future.result():
+            all_evals[ej.job.cache_key] = ej
+            with slots[done].container():
+                _render_job_card(ej)
+            done += 1
+        progress_bar.progress(done / total, text=f"⭐ Rating each job for you... ({done}/{total})")
+    progress_bar.empty()
+    for slot in slots:
+        slot.empty()
+
+
 def _run_pipeline() -> None:
     """Execute the pipeline from query generation onward."""
     profile = st.session_state.profile
@@ -903,19 +985,18 @@ def _run_pipeline() -> None:
     cache = _get_cache()
     provider = get_provider(location)
     provider_fingerprint = get_provider_fingerprint(provider)
-    # Eagerly create the Gemini client so it's ready before the pipeline starts —
-    # avoids lazy-init delay between query generation and job evaluation.
-    client = create_client() if _keys_ok() else None
+    # Fetch the shared Gemini client up front so it's ready before the pipeline starts.
+    client = _get_llm_client() if _keys_ok() else None
+    cached_queries, cached_jobs, cached_evals = cache.load_all(profile, location, provider_fingerprint)
 
     # ---- Step 1: Generate queries ----------------------------------------
     with st.status("✨ Crafting search queries...", expanded=False) as status:
-        cached_queries = cache.load_queries(profile, location, provider_fingerprint)
         if cached_queries is not None:
             queries = cached_queries
             status.update(label="✅ Queries generated (cached)", state="complete")
         else:
             if client is None:
-                client = create_client()
+                client = _get_llm_client()
             queries = generate_search_queries(client, profile, location, provider=provider)
             cache.save_queries(profile, location, queries, provider_fingerprint)
             status.update(label="✅ Queries generated", state="complete")
@@ -928,8 +1009,6 @@ def _run_pipeline() -> None:
     # ---- Step 2 & 3: Search + evaluate in parallel ----------------------
     # Jobs are submitted for evaluation as soon as each search query returns
     # results, overlapping the two phases for faster end-to-end time.
-    cached_jobs = cache.load_jobs(location)
-
     if cached_jobs is not None:
         jobs = cached_jobs
         with st.status(f"✅ Found {len(jobs)} jobs (cached)", state="complete"):
@@ -939,56 +1018,42 @@ def _run_pipeline() -> None:
             st.warning("No jobs found. Try adjusting your location or uploading a different CV.")
             return
 
-        new_jobs, cached_evals = cache.get_unevaluated_jobs(jobs, profile, location)
+        new_jobs = [job for job in jobs if job.cache_key not in cached_evals]
         if not new_jobs:
             with st.status("✅ All evaluations loaded (cached)", state="complete"):
                 pass
             all_evals = cached_evals
         else:
             if client is None:
-                client = create_client()
+                client = _get_llm_client()
             all_evals = dict(cached_evals)
             progress_bar = st.progress(0, text="⭐ Rating each job for you...")
-            results_container = st.container()
             with ThreadPoolExecutor(max_workers=30) as executor:
-                futures = {executor.submit(evaluate_job, client, profile, job): job for job in new_jobs}
-                for i, future in enumerate(as_completed(futures), 1):
-                    job = futures[future]
-                    evaluation = future.result()
-                    ej = EvaluatedJob(job=job, evaluation=evaluation)
-                    key = f"{ej.job.title}|{ej.job.company_name}|{ej.job.location}"
-                    all_evals[key] = ej
-                    progress_bar.progress(
-                        i / len(new_jobs),
-                        text=f"⭐ Rating each job for you... ({i}/{len(new_jobs)})",
-                    )
-                    with results_container:
-                        _render_job_card(ej)
-            progress_bar.empty()
-            results_container.empty()
+                futures = submit_evaluation_batches(executor, client, profile, new_jobs)
+                _collect_evaluations(futures, all_evals, len(new_jobs), progress_bar)
             cache.save_evaluations(profile, all_evals, location)
     else:
         # Fresh search: overlap searching and evaluating.
         if client is None:
-            client = create_client()
+            client = _get_llm_client()
 
-        # Load any previously evaluated jobs so we skip re-evaluating them.
-        cached_evals = cache.load_evaluations(profile, location)
-        all_evals: dict[str, EvaluatedJob] = dict(cached_evals) if cached_evals else {}
+        # Start from previously evaluated jobs so we skip re-evaluating them.
+        all_evals: dict[str, EvaluatedJob] = dict(cached_evals)
         eval_executor = ThreadPoolExecutor(max_workers=30)
         try:
-            eval_futures: dict[Future, JobListing] = {}
+            eval_futures: list[Future[list[EvaluatedJob]]] = []
             eval_lock = threading.Lock()
+            total_evals = 0
 
             def _on_jobs_found(new_unique_jobs: list[JobListing]) -> None:
-                """Submit newly found jobs for evaluation immediately."""
-                for job in new_unique_jobs:
-                    key = f"{job.title}|{job.company_name}|{job.location}"
-                    if key in all_evals:
-                        continue  # already evaluated (from cache)
-                    fut = eval_executor.submit(evaluate_job, client, profile, job)
-                    with eval_lock:
-                        eval_futures[fut] = job
+                """Submit newly found jobs for evaluation immediately, in small batches."""
+                nonlocal total_evals
+                # Skip jobs already evaluated (from cache)
+                pending = [job for job in new_unique_jobs if job.cache_key not in all_evals]
+                futures = submit_evaluation_batches(eval_executor, client, profile, pending)
+                with eval_lock:
+                    eval_futures.extend(futures)
+                    total_evals += len(pending)
 
             # -- Search phase with status wrapper --
             search_progress = st.progress(0, text="🌍 Scouting jobs...")
@@ -1022,39 +1087,20 @@ def _run_pipeline() -> None:
                 return
 
             # -- Evaluation phase: collect results from futures already in flight --
-            total_evals = len(eval_futures)
             if total_evals == 0:
                 pass  # no jobs to evaluate (all were cached)
             else:
                 # Some evals may have completed during search — the progress bar
                 # and card rendering will catch up immediately.
                 eval_progress = st.progress(0, text=f"⭐ Rating each job for you... (0/{total_evals})")
-                results_container = st.container()
-                for i, future in enumerate(as_completed(eval_futures), 1):
-                    job = eval_futures[future]
-                    evaluation = future.result()
-                    ej = EvaluatedJob(job=job, evaluation=evaluation)
-                    key = f"{ej.job.title}|{ej.job.company_name}|{ej.job.location}"
-                    all_evals[key] = ej
-                    eval_progress.progress(
-                        i / total_evals,
-                        text=f"⭐ Rating each job for you... ({i}/{total_evals})",
-                    )
-                    with results_container:
-                        _render_job_card(ej)
-                eval_progress.empty()
-                results_container.empty()
+                _collect_evaluations(eval_futures, all_evals, total_evals, eval_progress)
 
             cache.save_evaluations(profile, all_evals, location)
         finally:
             eval_executor.shutdown(wait=True, cancel_futures=True)
 
-    # Build final sorted list
-    evaluated_jobs = sorted(
-        all_evals.values(),
-        key=lambda x: x.evaluation.score,
-        reverse=True,
-    )
+    # Build final sorted list (the results page lists every match, so no top-k cap)
+    evaluated_jobs = sorted(all_evals.values(), key=attrgetter("evaluation.score"), reverse=True)
     st.session_state.evaluated_jobs = evaluated_jobs
 
 
@@ -1071,12 +1117,11 @@ _ip_rate_limit: dict[str, float] = {}
 def _get_client_ip() -> str | None:
     """Extract client IP from X-Forwarded-For header."""
     try:
-        headers = dict(st.context.headers)
+        forwarded_for = st.context.headers.get("x-forwarded-for")  # case-insensitive mapping
     except Exception:
         return None
-    forwarded_for = headers.get("x-forwarded-for") or headers.get("X-Forwarded-For")
     if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
+        return forwarded_for.split(",", 1)[0].strip()
     return None
 
 
@@ -1154,8 +1199,7 @@ if st.session_state.evaluated_jobs is not None:
     st.subheader(f"🎯 {_greeting_name}'s Job Matches" if _greeting_name else "🎯 Job Matches")
 
     # -- Filter controls ---------------------------------------------------
-    all_companies = sorted({ej.job.company_name for ej in evaluated_jobs})
-    all_locations = sorted({ej.job.location for ej in evaluated_jobs})
+    all_companies, all_locations = _filter_options(evaluated_jobs)
 
     fcol1, fcol2, fcol3, fcol4 = st.columns([2, 2, 1, 1])
 
@@ -1197,49 +1241,69 @@ if st.session_state.evaluated_jobs is not None:
     elif date_filter == "Last 7 days":
         _date_cutoff = _now - timedelta(days=7)
 
-    # Pre-compute parsed dates once to avoid redundant parsing during filter+sort
-    _parsed_dates: dict[str, datetime | None] = {}
-    for _ej in evaluated_jobs:
-        _pa = _ej.job.posted_at
-        if _pa not in _parsed_dates:
-            _parsed_dates[_pa] = _parse_relative_date(_pa)
-
-    filtered = [
-        ej
-        for ej in evaluated_jobs
-        if ej.evaluation.score >= min_score
-        and (not selected_companies or ej.job.company_name in selected_companies)
-        and (not selected_locations or ej.job.location in selected_locations)
-        and (_date_cutoff is None or (_parsed_dates[ej.job.posted_at] or _now) >= _date_cutoff)
+    cols = _job_columns(evaluated_jobs)
+    company_filter = set(selected_companies)
+    location_filter = set(selected_locations)
+    keep = [
+        i
+        for i, score in enumerate(cols["scores"])
+        if score >= min_score
+        and (not company_filter or cols["companies"][i] in company_filter)
+        and (not location_filter or cols["locations"][i] in location_filter)
+        and (_date_cutoff is None or (cols["dates"][i] or _now) >= _date_cutoff)
     ]
 
     # -- Apply sorting -----------------------------------------------------
     _epoch = datetime.min.replace(tzinfo=timezone.utc)
 
     sort_key_map: dict[str, tuple] = {
-        "Score ↓": (lambda ej: ej.evaluation.score, True),
-        "Score ↑": (lambda ej: ej.evaluation.score, False),
-        "Date (newest)": (lambda ej: _parsed_dates[ej.job.posted_at] or _epoch, True),
-        "Date (oldest)": (lambda ej: _parsed_dates[ej.job.posted_at] or _epoch, False),
-        "Title A–Z": (lambda ej: ej.job.title.lower(), False),
-        "Company A–Z": (lambda ej: ej.job.company_name.lower(), False),
+        "Score ↓": (lambda i: cols["scores"][i], True),
+        "Score ↑": (lambda i: cols["scores"][i], False),
+        "Date (newest)": (lambda i: cols["dates"][i] or _epoch, True),
+        "Date (oldest)": (lambda i: cols["dates"][i] or _epoch, False),
+        "Title A–Z": (lambda i: cols["titles"][i], False),
+        "Company A–Z": (lambda i: cols["companies"][i].lower(), False),
     }
     key_fn, reverse = sort_key_map[sort_option]
-    filtered.sort(key=key_fn, reverse=reverse)
+    keep.sort(key=key_fn, reverse=reverse)
+    filtered = [evaluated_jobs[i] for i in keep]
 
     # -- Metrics row -------------------------------------------------------
     mcol1, mcol2, mcol3 = st.columns(3)
     mcol1.metric("Total matches", len(evaluated_jobs))
     mcol2.metric(f"Score ≥ {min_score}", len(filtered))
     if filtered:
-        mcol3.metric("Top score", max(ej.evaluation.score for ej in filtered))
+        mcol3.metric("Top score", max(cols["scores"][i] for i in keep))
 
     # -- Cards -------------------------------------------------------------
     if not filtered:
         st.info(f"No jobs match the current filters (score ≥ {min_score}). Try lowering the minimum score.")
     else:
-        for ej in filtered:
+        for ej in filtered[:_MAX_RICH_CARDS]:
             _render_job_card(ej)
+        remaining = filtered[_MAX_RICH_CARDS:]
+        if remaining:
+            # Rich cards ship several widgets each; list the long tail compactly
+            # and only build cards for it when the user asks for them.
+            st.caption(f"{len(remaining)} more matches")
+            st.dataframe(
+                [
+                    {
+                        "Score": ej.evaluation.score,
+                        "Title": ej.job.title,
+                        "Company": ej.job.company_name,
+                        "Location": ej.job.location,
+                        "Link": ej.job.apply_options[0].url if ej.job.apply_options else ej.job.link,
+                    }
+                    for ej in remaining
+                ],
+                column_config={"Link": st.column_config.LinkColumn("Link", display_text="Apply ↗")},
+                hide_index=True,
+                use_container_width=True,
+            )
+            if st.toggle(f"Show all {len(remaining)} remaining matches as cards", key="show_all_cards"):
+                for ej in remaining:
+                    _render_job_card(ej)
 
     # -- Career summary (collapsed, after job cards) -----------------------
     if hasattr(st, "fragment"):
@@ -1302,17 +1366,14 @@ if st.session_state.evaluated_jobs is not None:
 
                 from immermatch.db import (
                     add_subscriber,
-                    get_job_ids_by_urls,
                     get_subscriber_by_email,
                     log_sent_jobs,
                     save_subscription_context,
+                    upsert_jobs_with_ids,
                 )
                 from immermatch.db import (
                     get_admin_client as _get_admin_db,
                 )
-                from immermatch.db import (
-                    upsert_jobs as _upsert_jobs,
-                )
                 from immermatch.emailer import send_verification_email
 
                 _db = _get_admin_db()
@@ -1371,8 +1432,7 @@ if st.session_state.evaluated_jobs is not None:
                                                 }
                                             )
                                     if _seen_jobs:
-                                        _upsert_jobs(_db, _seen_jobs)
-                                        _url_to_id = get_job_ids_by_urls(_db, [j["url"] for j in _seen_jobs])
+                                        _url_to_id = upsert_jobs_with_ids(_db, _seen_jobs)
                                         _job_ids = list(_url_to_id.values())
                                         if _job_ids:
                                             log_sent_jobs(_db, _sub_row["id"], _job_ids)
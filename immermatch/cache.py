@@ -1,28 +1,52 @@
 """JSON file cache for Immermatch pipeline results."""
 
 import hashlib
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from pathlib import Path
 
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
 from .models import CandidateProfile, EvaluatedJob, JobEvaluation, JobListing
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_CACHE_DIR = Path(".immermatch_cache")
 
+_EVALUATIONS_DIR = "evaluations"
+_EVALUATIONS_META = "meta.json"
+
 
 def _hash(text: str) -> str:
     """Return a short SHA-256 hex digest."""
     return hashlib.sha256(text.encode()).hexdigest()[:16]
 
 
+def cv_hash(cv_text: str) -> str:
+    """Return the cache key for *cv_text*; callers may compute it once and reuse it."""
+    return _hash(cv_text)
+
+
 def _profile_hash(profile: CandidateProfile) -> str:
     """Stable hash of a profile (used to detect CV changes)."""
     return _hash(profile.model_dump_json(exclude_none=True))
 
 
+# Cached entries are rebuilt by pydantic-core in a single pass, which is
+# several times faster than assembling them field by field with model_construct.
+_JOBS_ADAPTER = TypeAdapter(dict[str, JobListing])
+
+
+class _CachedEvaluation(BaseModel):
+    """On-disk layout of one evaluation cache file."""
+
+    key: str
+    job: JobListing
+    evaluation: JobEvaluation
+
+
 class ResultCache:
     """Manages JSON caches for each pipeline step."""
 
@@ -42,34 +66,34 @@ class ResultCache:
         if not path.exists():
             return None
         try:
-            return json.loads(path.read_text())
-        except (json.JSONDecodeError, OSError):
+            return orjson.loads(path.read_bytes())
+        except (orjson.JSONDecodeError, OSError):
             return None
 
     def _save(self, name: str, data: dict) -> None:
-        self._path(name).write_text(json.dumps(data, indent=2, ensure_ascii=False))
+        self._path(name).write_bytes(orjson.dumps(data))
 
     # ------------------------------------------------------------------
     # 1. Profile  (keyed by CV hash)
     # ------------------------------------------------------------------
 
-    def load_profile(self, cv_text: str) -> CandidateProfile | None:
+    def load_profile(self, cv_text: str, *, text_hash: str | None = None) -> CandidateProfile | None:
         data = self._load("profile.json")
         if data is None:
             return None
-        if data.get("cv_hash") != _hash(cv_text):
+        if data.get("cv_hash") != (text_hash or cv_hash(cv_text)):
             return None
         try:
             return CandidateProfile(**data["profile"])
         except Exception:
             return None
 
-    def save_profile(self, cv_text: str, profile: CandidateProfile) -> None:
+    def save_profile(self, cv_text: str, profile: CandidateProfile, *, text_hash: str | None = None) -> None:
         self._save(
             "profile.json",
             {
-                "cv_hash": _hash(cv_text),
-                "profile": profile.model_dump(),
+                "cv_hash": text_hash or cv_hash(cv_text),
+                "profile": orjson.Fragment(profile.model_dump_json()),
             },
         )
 
@@ -83,10 +107,13 @@ class ResultCache:
         location: str,
         provider_fingerprint: str = "",
     ) -> list[str] | None:
+        return self._load_queries(_profile_hash(profile), location, provider_fingerprint)
+
+    def _load_queries(self, profile_hash: str, location: str, provider_fingerprint: str) -> list[str] | None:
         data = self._load("queries.json")
         if data is None:
             return None
-        if data.get("profile_hash") != _profile_hash(profile):
+        if data.get("profile_hash") != profile_hash:
             return None
         if data.get("location") != location:
             return None
@@ -129,7 +156,7 @@ class ResultCache:
             return None
         jobs_dict = data.get("jobs", {})
         try:
-            return [JobListing(**v) for v in jobs_dict.values()]
+            return list(_JOBS_ADAPTER.validate_python(jobs_dict).values())
         except Exception:
             return None
 
@@ -139,13 +166,12 @@ class ResultCache:
 
         # Reset if location changed (different search scope)
         if data.get("location", "") != location:
-            existing: dict[str, dict] = {}
+            existing: dict[str, dict | orjson.Fragment] = {}
         else:
             existing = data.get("jobs", {})
 
         for job in jobs:
-            key = f"{job.title}|{job.company_name}|{job.location}"
-            existing[key] = job.model_dump()
+            existing[job.cache_key] = orjson.Fragment(job.model_dump_json())
 
         self._save(
             "jobs.json",
@@ -157,45 +183,63 @@ class ResultCache:
         )
 
     # ------------------------------------------------------------------
-    # 4. Evaluations  (append-only, keyed by title|company|location)
+    # 4. Evaluations  (one file per job, keyed by title|company|location)
     # ------------------------------------------------------------------
 
+    def _evaluations_dir(self) -> Path:
+        return self._path(_EVALUATIONS_DIR)
+
     def load_evaluations(self, profile: CandidateProfile, location: str) -> dict[str, EvaluatedJob]:
         """Return {key: EvaluatedJob} if profile hash and location match, else empty dict."""
-        data = self._load("evaluations.json")
-        if data is None:
+        return self._load_evaluations(_profile_hash(profile), location)
+
+    def _load_evaluations(self, profile_hash: str, location: str) -> dict[str, EvaluatedJob]:
+        meta = self._load(f"{_EVALUATIONS_DIR}/{_EVALUATIONS_META}")
+        if meta is None:
             return {}
-        if data.get("profile_hash") != _profile_hash(profile):
+        if meta.get("profile_hash") != profile_hash:
             return {}
-        if data.get("location", "") != location:
+        if meta.get("location", "") != location:
             return {}
         result: dict[str, EvaluatedJob] = {}
-        for key, entry in data.get("evaluated", {}).items():
+        for path in self._evaluations_dir().glob("*.json"):
+            if path.name == _EVALUATIONS_META:
+                continue
             try:
-                result[key] = EvaluatedJob(
-                    job=JobListing(**entry["job"]),
-                    evaluation=JobEvaluation(**entry["evaluation"]),
-                )
+                entry = _CachedEvaluation.model_validate_json(path.read_bytes())
+                result[entry.key] = EvaluatedJob(job=entry.job, evaluation=entry.evaluation)
             except Exception:
-                logger.debug("Skipping malformed cache entry %s", key, exc_info=True)
+                logger.debug("Skipping malformed cache entry %s", path.name, exc_info=True)
                 continue
         return result
 
     def save_evaluations(self, profile: CandidateProfile, evaluated: dict[str, EvaluatedJob], location: str) -> None:
-        self._save(
-            "evaluations.json",
-            {
-                "profile_hash": _profile_hash(profile),
-                "location": location,
-                "evaluated": {
-                    key: {
-                        "job": ej.job.model_dump(),
-                        "evaluation": ej.evaluation.model_dump(),
+        """Persist *evaluated*, writing only entries that are not on disk yet.
+
+        A profile or location change invalidates all existing entries.
+        """
+        eval_dir = self._evaluations_dir()
+        eval_dir.mkdir(exist_ok=True)
+        meta = {"profile_hash": _profile_hash(profile), "location": location}
+        current = self._load(f"{_EVALUATIONS_DIR}/{_EVALUATIONS_META}") or {}
+        if current.get("profile_hash") != meta["profile_hash"] or current.get("location", "") != location:
+            for path in eval_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+            self._save(f"{_EVALUATIONS_DIR}/{_EVALUATIONS_META}", meta)
+
+        for key, ej in evaluated.items():
+            path = eval_dir / f"{_hash(key)}.json"
+            if path.exists():
+                continue
+            path.write_bytes(
+                orjson.dumps(
+                    {
+                        "key": key,
+                        "job": orjson.Fragment(ej.job.model_dump_json()),
+                        "evaluation": orjson.Fragment(ej.evaluation.model_dump_json()),
                     }
-                    for key, ej in evaluated.items()
-                },
-            },
-        )
+                )
+            )
 
     def get_unevaluated_jobs(
         self, jobs: list[JobListing], profile: CandidateProfile, location: str
@@ -205,5 +249,28 @@ class ResultCache:
         Jobs already in the evaluation cache are skipped.
         """
         cached = self.load_evaluations(profile, location)
-        new_jobs = [job for job in jobs if f"{job.title}|{job.company_name}|{job.location}" not in cached]
+        new_jobs = [job for job in jobs if job.cache_key not in cached]
         return new_jobs, cached
+
+    # ------------------------------------------------------------------
+    # Combined lookup for a pipeline run
+    # ------------------------------------------------------------------
+
+    def load_all(
+        self,
+        profile: CandidateProfile,
+        location: str,
+        provider_fingerprint: str = "",
+    ) -> tuple[list[str] | None, list[JobListing] | None, dict[str, EvaluatedJob]]:
+        """Return (queries, jobs, evaluations) cached for *profile* and *location*.
+
+        The profile is hashed once and shared by the query and evaluation checks,
+        and the three independent reads run concurrently so slow disks cost one
+        round of I/O latency instead of three.
+        """
+        profile_hash = _profile_hash(profile)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            queries = pool.submit(self._load_queries, profile_hash, location, provider_fingerprint)
+            jobs = pool.submit(self.load_jobs, location)
+            evaluations = pool.submit(self._load_evaluations, profile_hash, location)
+            return queries.result(), jobs.result(), evaluations.result()
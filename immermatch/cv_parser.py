@@ -8,12 +8,14 @@ import pdfplumber
 SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".md", ".txt"}
 
 
-def extract_text(cv_path: str | Path) -> str:
+def extract_text(cv_path: str | Path, max_chars: int | None = None) -> str:
     """
     Extract text from a CV file. Supports PDF, DOCX, Markdown, and plain text.
 
     Args:
         cv_path: Path to the CV file.
+        max_chars: Optional cap on the returned text length. PDF and DOCX
+            extraction stops as soon as the cap is exceeded.
 
     Returns:
         Extracted text content as a string.
@@ -33,13 +35,15 @@ def extract_text(cv_path: str | Path) -> str:
         raise ValueError(f"Unsupported file format: {suffix}. Supported: {', '.join(sorted(SUPPORTED_EXTENSIONS))}")
 
     if suffix == ".pdf":
-        text = _extract_from_pdf(cv_path)
+        text = _extract_from_pdf(cv_path, max_chars)
     elif suffix == ".docx":
-        text = _extract_from_docx(cv_path)
+        text = _extract_from_docx(cv_path, max_chars)
     else:  # .md, .txt
         text = cv_path.read_text(encoding="utf-8")
 
     text = _clean_text(text)
+    if max_chars is not None:
+        text = text[:max_chars]
 
     if not text:
         raise ValueError(f"No text could be extracted from: {cv_path}")
@@ -51,9 +55,10 @@ _MAX_PDF_PAGES = 50
 _MAX_DOCX_PARAGRAPHS = 2000
 
 
-def _extract_from_pdf(pdf_path: Path) -> str:
-    """Extract text from a PDF file."""
+def _extract_from_pdf(pdf_path: Path, max_chars: int | None = None) -> str:
+    """Extract text from a PDF file, stopping early once *max_chars* is exceeded."""
     text_parts: list[str] = []
+    total = 0
 
     with pdfplumber.open(pdf_path) as pdf:
         if len(pdf.pages) > _MAX_PDF_PAGES:
@@ -62,16 +67,29 @@ def _extract_from_pdf(pdf_path: Path) -> str:
             page_text = page.extract_text()
             if page_text:
                 text_parts.append(page_text)
+                # Raw length is an upper bound on the cleaned length; the
+                # joined text is cleaned once in extract_text().
+                total += len(page_text)
+                if max_chars is not None and total > max_chars:
+                    break
 
     return "\n\n".join(text_parts)
 
 
-def _extract_from_docx(docx_path: Path) -> str:
-    """Extract text from a DOCX file."""
+def _extract_from_docx(docx_path: Path, max_chars: int | None = None) -> str:
+    """Extract text from a DOCX file, stopping early once *max_chars* is exceeded."""
     doc = docx.Document(str(docx_path))
     if len(doc.paragraphs) > _MAX_DOCX_PARAGRAPHS:
         raise ValueError(f"DOCX has {len(doc.paragraphs)} paragraphs (limit: {_MAX_DOCX_PARAGRAPHS}).")
-    paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
+    paragraphs: list[str] = []
+    total = 0
+    for p in doc.paragraphs:
+        if not p.text.strip():
+            continue
+        paragraphs.append(p.text)
+        total += len(p.text)
+        if max_chars is not None and total > max_chars:
+            break
     return "\n\n".join(paragraphs)
 
 
@@ -1,11 +1,20 @@
 """Supabase database layer for Immermatch."""
 
+import csv
+import io
 import logging
 import os
-from datetime import datetime, timezone
-from typing import Any
-
-from supabase import Client, create_client
+import sys
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from functools import cache
+
+import httpx
+import orjson
+from postgrest.exceptions import APIError, APIErrorFromJSON, generate_default_error_message
+from postgrest.utils import sanitize_param
+from pydantic import ValidationError
+from supabase import Client, ClientOptions, create_client
 
 logger = logging.getLogger(__name__)
 
@@ -13,25 +22,52 @@ logger = logging.getLogger(__name__)
 SUBSCRIPTION_DAYS = 30
 
 
+# Pool sized for the daily digest, which issues many small PostgREST requests
+# from worker threads; keep-alive avoids a new TLS handshake per burst.
+_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30)
+_HTTP_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+
+_http_clients: list[httpx.Client] = []
+
+
+@cache
+def _cached_client(url: str, key: str) -> Client:
+    """Create one Supabase client per (url, key) and reuse it for the process lifetime.
+
+    The client gets a tuned, HTTP/2-enabled connection pool shared by its
+    PostgREST, auth and storage sub-clients.
+    """
+    http_client = httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=True, follow_redirects=True)
+    _http_clients.append(http_client)
+    return create_client(url, key, options=ClientOptions(httpx_client=http_client))
+
+
+def close_clients() -> None:
+    """Close the pooled HTTP connections of all cached clients.
+
+    Intended for batch jobs at shutdown; the next ``get_client`` /
+    ``get_admin_client`` call creates fresh clients.
+    """
+    while _http_clients:
+        _http_clients.pop().close()
+    _cached_client.cache_clear()
+
+
 def get_client() -> Client:
-    """Create a read-only Supabase client (anon / publishable key).
+    """Return the shared read-only Supabase client (anon / publishable key).
 
     Uses SUPABASE_URL + SUPABASE_KEY.
     """
-    url = os.environ["SUPABASE_URL"]
-    key = os.environ["SUPABASE_KEY"]
-    return create_client(url, key)
+    return _cached_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
 
 
 def get_admin_client() -> Client:
-    """Create a Supabase client with the service-role key (bypasses RLS).
+    """Return the shared Supabase client with the service-role key (bypasses RLS).
 
     Uses SUPABASE_URL + SUPABASE_SERVICE_KEY.
     Required for all INSERT / UPDATE / UPSERT operations.
     """
-    url = os.environ["SUPABASE_URL"]
-    key = os.environ["SUPABASE_SERVICE_KEY"]
-    return create_client(url, key)
+    return _cached_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
 
 
 # ---------------------------------------------------------------------------
@@ -81,10 +117,16 @@ def add_subscriber(
     return None
 
 
+# ``datetime.fromisoformat`` only understands a trailing "Z" from 3.11 on.
+_FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+
 def _parse_iso_utc(value: str | None) -> datetime | None:
     if not value:
         return None
-    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if not _FROMISOFORMAT_ACCEPTS_Z and value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
 
 
 def confirm_subscriber(
@@ -95,37 +137,34 @@ def confirm_subscriber(
 ) -> dict | None:
     """Activate a subscriber by confirmation token.
 
-    Checks that the token exists and has not expired.  On success sets
-    ``is_active=True`` and clears the token fields.
+    The token and expiry checks run server-side in a single conditional
+    UPDATE, so a valid token is confirmed in one round-trip.  On success
+    sets ``is_active=True`` and clears the token fields.
 
     Returns:
         The updated subscriber dict, or None if the token is invalid/expired.
     """
-    rows = client.table("subscribers").select("*").eq("confirmation_token", token).execute().data
-    if not rows:
-        return None
-
-    sub = rows[0]
-    exp_dt = _parse_iso_utc(sub.get("token_expires_at"))
-    if exp_dt and datetime.now(timezone.utc) > exp_dt:
-        return None
-
-    client.table("subscribers").update(
-        {
-            "is_active": True,
-            "confirmation_token": None,
-            "token_expires_at": None,
-            "confirmed_at": datetime.now(timezone.utc).isoformat(),
-            "confirm_ip": confirm_ip,
-            "confirm_user_agent": confirm_user_agent,
-            "unsubscribed_at": None,
-            "unsubscribe_token": None,
-            "unsubscribe_token_expires_at": None,
-        }
-    ).eq("id", sub["id"]).execute()
-
-    sub["is_active"] = True
-    return sub
+    now_iso = datetime.now(timezone.utc).isoformat()
+    result = (
+        client.table("subscribers")
+        .update(
+            {
+                "is_active": True,
+                "confirmation_token": None,
+                "token_expires_at": None,
+                "confirmed_at": now_iso,
+                "confirm_ip": confirm_ip,
+                "confirm_user_agent": confirm_user_agent,
+                "unsubscribed_at": None,
+                "unsubscribe_token": None,
+                "unsubscribe_token_expires_at": None,
+            }
+        )
+        .eq("confirmation_token", token)
+        .or_(f"token_expires_at.is.null,token_expires_at.gt.{now_iso}")
+        .execute()
+    )
+    return result.data[0] if result.data else None
 
 
 def get_active_subscribers(client: Client) -> list[dict]:
@@ -152,9 +191,26 @@ def get_subscriber_by_manage_token(client: Client, token: str) -> dict | None:
     return sub
 
 
-def get_all_subscribers(client: Client) -> list[dict]:
-    """Return all subscriber rows."""
-    return client.table("subscribers").select("*").execute().data
+def _paginate(client: Client, table: str, *, desc: bool, batch_size: int) -> Iterator[dict]:
+    """Yield every row of *table* ordered by id, one ``range`` page at a time.
+
+    Avoids PostgREST's silent max-rows truncation and keeps peak memory at
+    one page.
+    """
+    start = 0
+    while True:
+        rows = (
+            client.table(table).select("*").order("id", desc=desc).range(start, start + batch_size - 1).execute().data
+        )
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        start += batch_size
+
+
+def get_all_subscribers(client: Client, *, batch_size: int = 1000) -> Iterator[dict]:
+    """Yield all subscriber rows ordered by id."""
+    return _paginate(client, "subscribers", desc=False, batch_size=batch_size)
 
 
 def deactivate_subscriber(client: Client, subscriber_id: str) -> bool:
@@ -232,31 +288,26 @@ def clear_manage_token(client: Client, subscriber_id: str) -> bool:
 def delete_subscriber_by_token(client: Client, token: str) -> bool:
     """Hard-delete a subscriber row via one-time unsubscribe token.
 
-    Looks up the subscriber by unsubscribe token, validates the token is
-    active and unexpired, then DELETEs the entire row.  The CASCADE FK on
-    ``job_sent_logs`` ensures associated rows are cleaned up automatically.
+    Matches the unsubscribe token and checks that it is unexpired in the
+    DELETE filter itself, so the whole action is one round-trip.  The
+    CASCADE FK on ``job_sent_logs`` ensures associated rows are cleaned up
+    automatically.
 
     Returns True on successful deletion, False if the token is
     invalid or expired.
     """
-    rows = (
+    now_iso = datetime.now(timezone.utc).isoformat()
+    result = (
         client.table("subscribers")
-        .select("id, unsubscribe_token_expires_at, is_active")
+        .delete()
         .eq("unsubscribe_token", token)
+        .or_(f"unsubscribe_token_expires_at.is.null,unsubscribe_token_expires_at.gt.{now_iso}")
         .execute()
-        .data
     )
-    if not rows:
-        return False
-
-    sub = rows[0]
-    exp_dt = _parse_iso_utc(sub.get("unsubscribe_token_expires_at"))
-    if exp_dt and datetime.now(timezone.utc) > exp_dt:
+    if not result.data:
         return False
-
-    logger.info("Hard-deleting subscriber %s via unsubscribe token", sub["id"])
-    result = client.table("subscribers").delete().eq("id", sub["id"]).execute()
-    return bool(result.data)
+    logger.info("Hard-deleted subscriber %s via unsubscribe token", result.data[0]["id"])
+    return True
 
 
 def purge_inactive_subscribers(client: Client, older_than_days: int = 7) -> int:
@@ -265,29 +316,10 @@ def purge_inactive_subscribers(client: Client, older_than_days: int = 7) -> int:
     Also deletes all associated data (job_sent_logs cascade via FK).
     Returns the number of deleted rows.
     """
-    rows: list[dict[str, Any]] = (
-        client.table("subscribers").select("id, unsubscribed_at, is_active").eq("is_active", False).execute().data
-    )
-    if not rows:
-        return 0
-
-    cutoff = datetime.now(timezone.utc).timestamp() - (older_than_days * 24 * 60 * 60)
-    to_delete: list[str] = []
-    for row in rows:
-        unsub_dt = _parse_iso_utc(row.get("unsubscribed_at"))
-        if unsub_dt and unsub_dt.timestamp() <= cutoff:
-            to_delete.append(row["id"])
-
-    if not to_delete:
-        return 0
-
-    deleted = 0
-    chunk_size = 200
-    for start in range(0, len(to_delete), chunk_size):
-        chunk = to_delete[start : start + chunk_size]
-        result = client.table("subscribers").delete().in_("id", chunk).execute()
-        deleted += len(result.data or [])
-    return deleted
+    cutoff_iso = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    # NULL unsubscribed_at never satisfies lte, so those rows are kept.
+    result = client.table("subscribers").delete().eq("is_active", False).lte("unsubscribed_at", cutoff_iso).execute()
+    return len(result.data or [])
 
 
 # ---------------------------------------------------------------------------
@@ -336,6 +368,9 @@ def set_subscriber_expiry(
     return bool(result.data)
 
 
+_EXPIRE_CHUNK_SIZE = 500
+
+
 def expire_subscriptions(client: Client) -> int:
     """Deactivate subscriptions whose expires_at has passed.
 
@@ -357,14 +392,32 @@ def expire_subscriptions(client: Client) -> int:
 
     ids = [r["id"] for r in rows]
     processed_count = 0
-    for sid in ids:
-        # Re-check is_active to guard against concurrent runs.
-        current = client.table("subscribers").select("is_active").eq("id", sid).maybe_single().execute().data
-        if not current or not current.get("is_active"):
-            continue
-        deactivate_subscriber(client, sid)
-        delete_subscriber_data(client, sid)
-        processed_count += 1
+    for start in range(0, len(ids), _EXPIRE_CHUNK_SIZE):
+        chunk = ids[start : start + _EXPIRE_CHUNK_SIZE]
+        # Deactivate and wipe PII in one request.  The is_active guard makes
+        # the bulk update safe against concurrent runs: rows already
+        # deactivated elsewhere are simply not returned.
+        result = (
+            client.table("subscribers")
+            .update(
+                {
+                    "is_active": False,
+                    "unsubscribed_at": now_iso,
+                    "unsubscribe_token": None,
+                    "unsubscribe_token_expires_at": None,
+                    "profile_json": None,
+                    "search_queries": None,
+                    "target_location": None,
+                    "min_score": None,
+                }
+            )
+            .in_("id", chunk)
+            .eq("is_active", True)
+            .execute()
+        )
+        if getattr(result, "error", None):
+            raise RuntimeError(f"Failed to expire subscribers: {result.error}")
+        processed_count += len(result.data or [])
     return processed_count
 
 
@@ -404,14 +457,18 @@ def get_active_subscribers_with_profiles(client: Client) -> list[dict]:
     Only returns rows where profile_json is not null (subscribers who
     completed the full subscribe flow in the Streamlit UI).
     """
-    rows = client.table("subscribers").select("*").eq("is_active", True).not_.is_("profile_json", "null").execute().data
-    # Filter out expired (belt-and-suspenders — expire_subscriptions()
-    # should have already run, but be safe).
-    return [
-        r
-        for r in rows
-        if not r.get("expires_at") or _parse_iso_utc(r["expires_at"]) > datetime.now(timezone.utc)  # type: ignore[operator]
-    ]
+    now_iso = datetime.now(timezone.utc).isoformat()
+    # Filter out expired rows server-side (belt-and-suspenders —
+    # expire_subscriptions() should have already run, but be safe).
+    return (
+        client.table("subscribers")
+        .select("*")
+        .eq("is_active", True)
+        .not_.is_("profile_json", "null")
+        .or_(f"expires_at.is.null,expires_at.gt.{now_iso}")
+        .execute()
+        .data
+    )
 
 
 def update_subscriber_preferences(
@@ -457,6 +514,11 @@ def mark_subscriber_last_sent(client: Client, subscriber_id: str, sent_at: str |
 # ---------------------------------------------------------------------------
 
 
+# Above this many rows, encoding the body with orjson instead of the stdlib
+# json used by postgrest-py is worth bypassing the query builder.
+_ORJSON_UPSERT_THRESHOLD = 256
+
+
 def upsert_jobs(client: Client, jobs: list[dict]) -> list[dict]:
     """Insert jobs, skipping duplicates by URL.
 
@@ -466,38 +528,119 @@ def upsert_jobs(client: Client, jobs: list[dict]) -> list[dict]:
     """
     if not jobs:
         return []
-    rows = [
-        {
-            "title": j["title"],
-            "company": j["company"],
-            "url": j["url"],
-            **({"location": j["location"]} if j.get("location") else {}),
-            **({"description": j["description"]} if j.get("description") else {}),
-        }
-        for j in jobs
-    ]
+    rows = []
+    for j in jobs:
+        row = {"title": j["title"], "company": j["company"], "url": j["url"]}
+        if location := j.get("location"):
+            row["location"] = location
+        if description := j.get("description"):
+            row["description"] = description
+        rows.append(row)
+    if len(rows) > _ORJSON_UPSERT_THRESHOLD:
+        return _upsert_orjson(client, "jobs", rows, on_conflict="url")
     return client.table("jobs").upsert(rows, on_conflict="url").execute().data
 
 
-def get_all_jobs(client: Client) -> list[dict]:
-    """Return all jobs ordered by id descending (newest first)."""
-    return client.table("jobs").select("*").order("id", desc=True).execute().data
+def _check_response(response: httpx.Response) -> None:
+    """Raise postgrest's ``APIError`` for a failed raw PostgREST request.
+
+    Mirrors how the query builder reports errors, so helpers that bypass it
+    fail with the same exception type as every other db helper.
+    """
+    if response.is_success:
+        return
+    try:
+        error = dict(APIErrorFromJSON.model_validate_json(response.content))
+    except ValidationError:
+        error = generate_default_error_message(response)
+    raise APIError(error)
+
+
+def _upsert_orjson(client: Client, table: str, rows: list[dict], *, on_conflict: str) -> list[dict]:
+    """POST an upsert straight to PostgREST with an orjson-encoded body.
+
+    Mirrors the request postgrest-py builds for ``.upsert(rows, on_conflict=...)``
+    (merge-duplicates, full representation, explicit column list) over the
+    client's pooled session. Failures raise postgrest's ``APIError`` via
+    :func:`_check_response`, as the query builder would.
+    """
+    columns = ",".join(f'"{k}"' for k in dict.fromkeys(k for row in rows for k in row))
+    # The request builder carries the table URL and auth/profile headers.
+    builder = client.table(table)
+    response = builder.session.post(
+        str(builder.path),
+        params={"on_conflict": on_conflict, "columns": columns},
+        content=orjson.dumps(rows),
+        headers={
+            **builder.headers,
+            "Content-Type": "application/json",
+            "Prefer": "return=representation,resolution=merge-duplicates",
+        },
+    )
+    _check_response(response)
+    return orjson.loads(response.content)
+
+
+def upsert_jobs_with_ids(client: Client, jobs: list[dict]) -> dict[str, str]:
+    """Upsert jobs and return a mapping of URL → job UUID.
+
+    The upsert already returns every inserted or updated row, so this
+    saves the separate :func:`get_job_ids_by_urls` round-trip.
+    """
+    return {r["url"]: r["id"] for r in upsert_jobs(client, jobs)}
+
+
+def get_all_jobs(client: Client, *, batch_size: int = 1000) -> Iterator[dict]:
+    """Yield all jobs ordered by id descending (newest first)."""
+    return _paginate(client, "jobs", desc=True, batch_size=batch_size)
+
+
+# PostgREST puts ``in.(...)`` filters in the query string; keep each request
+# well below common proxy URL-length limits.
+_IN_FILTER_CHUNK_SIZE = 100
+
+
+def _select_by_urls(client: Client, columns: str, urls: list[str]) -> list[dict]:
+    """Select *columns* for the given URLs, deduplicated and chunked."""
+    unique_urls = list(dict.fromkeys(urls))
+    rows: list[dict] = []
+    for start in range(0, len(unique_urls), _IN_FILTER_CHUNK_SIZE):
+        chunk = unique_urls[start : start + _IN_FILTER_CHUNK_SIZE]
+        rows.extend(client.table("jobs").select(columns).in_("url", chunk).execute().data)
+    return rows
 
 
 def get_existing_urls(client: Client, urls: list[str]) -> set[str]:
-    """Return the subset of *urls* that already exist in the jobs table."""
+    """Return the subset of *urls* that already exist in the jobs table.
+
+    Requests ``text/csv`` from PostgREST so the response is a bare column
+    of URLs rather than a JSON object per row.
+    """
     if not urls:
         return set()
-    rows = client.table("jobs").select("url").in_("url", urls).execute().data
-    return {r["url"] for r in rows}
+    builder = client.table("jobs")
+    headers = {**builder.headers, "Accept": "text/csv"}
+    unique_urls = list(dict.fromkeys(urls))
+    existing: set[str] = set()
+    for start in range(0, len(unique_urls), _IN_FILTER_CHUNK_SIZE):
+        chunk = unique_urls[start : start + _IN_FILTER_CHUNK_SIZE]
+        response = builder.session.get(
+            str(builder.path),
+            params={"select": "url", "url": f"in.({','.join(sanitize_param(u) for u in chunk)})"},
+            headers=headers,
+        )
+        _check_response(response)
+        reader = csv.reader(io.StringIO(response.text))
+        next(reader, None)  # header row
+        existing.update(row[0] for row in reader if row)
+    return existing
 
 
 def get_job_ids_by_urls(client: Client, urls: list[str]) -> dict[str, str]:
     """Return a mapping of URL → job UUID for the given URLs."""
     if not urls:
         return {}
-    rows = client.table("jobs").select("id, url").in_("url", urls).execute().data
-    return {r["url"]: r["id"] for r in rows}
+    return {r["url"]: r["id"] for r in _select_by_urls(client, "id, url", urls)}
 
 
 # ---------------------------------------------------------------------------
@@ -511,16 +654,41 @@ def get_sent_job_ids(client: Client, subscriber_id: str) -> set[str]:
     return {r["job_id"] for r in rows}
 
 
+def get_unsent_job_ids(client: Client, subscriber_id: str, candidate_job_ids: list[str]) -> list[str]:
+    """Return the candidate job IDs that have not been sent to this subscriber.
+
+    Only the candidates are looked up in ``job_sent_logs``, so the transfer is
+    bounded by the candidate list rather than the subscriber's full history.
+    """
+    candidates = list(dict.fromkeys(candidate_job_ids))
+    sent: set[str] = set()
+    for start in range(0, len(candidates), _IN_FILTER_CHUNK_SIZE):
+        chunk = candidates[start : start + _IN_FILTER_CHUNK_SIZE]
+        rows = (
+            client.table("job_sent_logs")
+            .select("job_id")
+            .eq("subscriber_id", subscriber_id)
+            .in_("job_id", chunk)
+            .execute()
+            .data
+        )
+        sent.update(r["job_id"] for r in rows)
+    return [jid for jid in candidates if jid not in sent]
+
+
 def log_sent_jobs(client: Client, subscriber_id: str, job_ids: list[str]) -> None:
     """Record that these jobs were emailed to the subscriber."""
-    if not job_ids:
+    log_sent_jobs_bulk(client, [(subscriber_id, jid) for jid in job_ids])
+
+
+_SENT_LOG_CHUNK_SIZE = 2000
+
+
+def log_sent_jobs_bulk(client: Client, pairs: list[tuple[str, str]]) -> None:
+    """Record many ``(subscriber_id, job_id)`` sends in as few inserts as possible."""
+    if not pairs:
         return
-    rows = [
-        {
-            "subscriber_id": subscriber_id,
-            "job_id": jid,
-            "sent_at": datetime.now(timezone.utc).isoformat(),
-        }
-        for jid in job_ids
-    ]
-    client.table("job_sent_logs").insert(rows).execute()
+    now_iso = datetime.now(timezone.utc).isoformat()
+    rows = [{"subscriber_id": sid, "job_id": jid, "sent_at": now_iso} for sid, jid in pairs]
+    for start in range(0, len(rows), _SENT_LOG_CHUNK_SIZE):
+        client.table("job_sent_logs").insert(rows[start : start + _SENT_LOG_CHUNK_SIZE]).execute()
@@ -1,10 +1,45 @@
 """Email module using Resend for Immermatch daily digests."""
 
 import os
+import re
+from bisect import bisect_right
 from datetime import datetime, timezone
-from html import escape as _esc
+from functools import cache, lru_cache
 
 import resend
+from markupsafe import escape as _esc
+
+from .rate_limit import RateLimiter
+
+# Resend's default team limit is 2 requests per second; pace every send
+# through one shared limiter so batch runs never trip it.
+_resend_rate_limiter = RateLimiter(rate=2, per=1.0)
+
+
+@cache
+def _resend_sender() -> str:
+    """Configure the Resend API key once and return the sender address.
+
+    Raises:
+        ValueError: If RESEND_API_KEY is not set (not cached, so a later call
+            can succeed once the key is configured).
+    """
+    api_key = os.environ.get("RESEND_API_KEY")
+    if not api_key:
+        raise ValueError("RESEND_API_KEY environment variable not set")
+    resend.api_key = api_key
+    return os.environ.get("RESEND_FROM", "Immermatch <digest@immermatch.dev>")
+
+
+def _send(params: dict) -> dict:  # type: ignore[type-arg]
+    """Send *params* via Resend, respecting the shared request rate."""
+    _resend_rate_limiter.acquire()
+    return resend.Emails.send(params)
+
+
+# Characters that force the slow path of _safe_url: HTML-special ones that
+# need escaping, and whitespace that needs stripping.
+_URL_NEEDS_WORK = re.compile(r"[<>\"'&\s]")
 
 
 def _safe_url(url: str) -> str:
@@ -13,46 +48,91 @@ def _safe_url(url: str) -> str:
     Only ``http`` and ``https`` schemes are allowed.  Anything else
     (e.g. ``javascript:``, ``data:``) is replaced with ``#``.
     """
+    # Fast path: a clean http(s) URL needs neither stripping nor escaping.
+    if url.startswith(("https://", "http://")) and not _URL_NEEDS_WORK.search(url):
+        return url
     stripped = url.strip()
     if stripped and not stripped.lower().startswith(("http://", "https://")):
         return "#"
-    return _esc(stripped, quote=True)
+    return _esc(stripped)
 
 
-def _build_job_row(job: dict) -> str:
-    """Return an HTML card block for a single job."""
-    score = job.get("score")
-    badge_color = "#22c55e" if (score or 0) >= 80 else "#eab308" if (score or 0) >= 70 else "#f97316"
-    score_html = (
-        f'<span style="background:{badge_color};color:#fff;padding:4px 12px;'
-        f'border-radius:12px;font-weight:bold;font-size:13px">{score}/100</span>'
-        if score
-        else ""
-    )
-    apply_url = _safe_url(job.get("url", "#"))
-    location = _esc(job.get("location", ""))
-    location_html = (
-        f'<div style="color:#6b7280;font-size:13px;margin-top:4px">&#128205; {location}</div>' if location else ""
+# Shared email shell.  The static parts are module constants, so each send only
+# formats the variable sections and joins them into the frame.
+_EMAIL_OPEN = """\
+<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"></head>
+<body style="margin:0;padding:0;font-family:-apple-system,BlinkMacSystemFont,
+'Segoe UI',Roboto,Helvetica,Arial,sans-serif;background:#f9fafb">
+  <div style="max-width:600px;margin:24px auto;background:#fff;
+              border-radius:8px;overflow:hidden;
+              border:1px solid #e5e7eb">
+"""
+
+_FOOTER_OPEN = """\
+    <div style="padding:16px 24px;background:#f9fafb;
+                border-top:1px solid #e5e7eb;text-align:center;
+                color:#9ca3af;font-size:12px">
+"""
+
+_EMAIL_CLOSE = """
+    </div>
+  </div>
+</body>
+</html>"""
+
+
+def _render_email(header: str, body: str, footer: str) -> str:
+    """Assemble a full HTML email from its header, body and footer sections."""
+    return "".join((_EMAIL_OPEN, header, body, _FOOTER_OPEN, footer, _EMAIL_CLOSE))
+
+
+def _hero_header(icon: str, title: str, subtitle: str) -> str:
+    """Return the gradient header used by the transactional emails."""
+    return f"""\
+    <div style="background:linear-gradient(135deg,#2563eb,#7c3aed);
+                padding:32px 24px;color:#fff;text-align:center">
+      <div style="font-size:36px;margin-bottom:8px">{icon}</div>
+      <h1 style="margin:0;font-size:24px">{title}</h1>
+      <p style="margin:8px 0 0;opacity:.85;font-size:15px">{subtitle}</p>
+    </div>
+"""
+
+
+# Per-row invariants of the digest job card, built once at import.
+# Score buckets: <70, 70-79, >=80.
+_BADGE_THRESHOLDS = (70, 80)
+_BADGE_COLORS = ("#f97316", "#eab308", "#22c55e")
+_SCORE_BADGE_OPEN = {
+    color: (
+        f'<span style="background:{color};color:#fff;padding:4px 12px;'
+        'border-radius:12px;font-weight:bold;font-size:13px">'
     )
-    title = _esc(job.get("title", ""))
-    company = _esc(job.get("company", ""))
+    for color in _BADGE_COLORS
+}
 
-    return f"""
+_ROW_OPEN = """
     <tr><td style="padding:6px 0">
       <div style="background:#f9fafb;border:1px solid #e5e7eb;border-radius:8px;
                   padding:16px;margin:0">
         <table style="width:100%;border-collapse:collapse"><tr>
           <td style="vertical-align:top">
-            <div style="font-weight:bold;font-size:15px;color:#111827">{title}</div>
-            <div style="color:#6b7280;font-size:14px;margin-top:2px">{company}</div>
-            {location_html}
+            <div style="font-weight:bold;font-size:15px;color:#111827">"""
+_ROW_TITLE_TO_COMPANY = """</div>
+            <div style="color:#6b7280;font-size:14px;margin-top:2px">"""
+_ROW_COMPANY_TO_LOCATION = """</div>
+            """
+_ROW_LOCATION_TO_SCORE = """
           </td>
           <td style="vertical-align:top;text-align:right;white-space:nowrap;padding-left:12px">
-            {score_html}
+            """
+_ROW_SCORE_TO_URL = """
           </td>
         </tr></table>
         <div style="margin-top:12px">
-          <a href="{apply_url}"
+          <a href=\""""
+_ROW_CLOSE = """"
              style="background:#2563eb;color:#fff;padding:8px 20px;
                     border-radius:6px;text-decoration:none;font-weight:600;
                     font-size:13px;display:inline-block">
@@ -61,10 +141,45 @@ def _build_job_row(job: dict) -> str:
         </div>
       </div>
     </td></tr>"""
+_LOCATION_OPEN = '<div style="color:#6b7280;font-size:13px;margin-top:4px">&#128205; '
+
+
+def _badge_color(score: int) -> str:
+    """Return the badge colour for a match score bucket (<70, 70-79, >=80)."""
+    return _BADGE_COLORS[bisect_right(_BADGE_THRESHOLDS, score)]
 
 
+def _append_job_row(parts: list[str], job: dict) -> None:
+    """Append the HTML card fragments for a single job to *parts*.
+
+    Optional fields may be ``None``; they render as empty rather than as "None".
+    """
+    score = job.get("score")
+    location = _esc(job.get("location") or "")
+    parts.append(_ROW_OPEN)
+    parts.append(_esc(job.get("title") or ""))
+    parts.append(_ROW_TITLE_TO_COMPANY)
+    parts.append(_esc(job.get("company") or ""))
+    parts.append(_ROW_COMPANY_TO_LOCATION)
+    if location:
+        parts.append(_LOCATION_OPEN)
+        parts.append(location)
+        parts.append("</div>")
+    parts.append(_ROW_LOCATION_TO_SCORE)
+    if score:
+        parts.append(_SCORE_BADGE_OPEN[_badge_color(score)])
+        parts.append(f"{score}/100</span>")
+    parts.append(_ROW_SCORE_TO_URL)
+    parts.append(_safe_url(job.get("url") or "#"))
+    parts.append(_ROW_CLOSE)
+
+
+@cache
 def _impressum_line() -> str:
-    """Return a one-line HTML-safe impressum string for email footers (§ 5 DDG)."""
+    """Return a one-line HTML-safe impressum string for email footers (§ 5 DDG).
+
+    Memoized: the IMPRESSUM_* env vars are set once at startup.
+    """
     name = _esc(os.environ.get("IMPRESSUM_NAME", ""))
     address = _esc(os.environ.get("IMPRESSUM_ADDRESS", "").replace("\n", ", "))
     email = _esc(os.environ.get("IMPRESSUM_EMAIL", ""))
@@ -72,17 +187,46 @@ def _impressum_line() -> str:
     return " · ".join(parts) if parts else "Immermatch"
 
 
-def _build_html(jobs: list[dict], unsubscribe_url: str = "", target_location: str = "") -> str:
-    """Build a full HTML email body for the daily digest."""
-    today = datetime.now(timezone.utc).strftime("%B %d, %Y")
-    sorted_jobs = sorted(jobs, key=lambda j: j.get("score") or 0, reverse=True)
-    rows = "\n".join(_build_job_row(j) for j in sorted_jobs)
-    impressum = _impressum_line()
-
+@lru_cache(maxsize=64)
+def _digest_header(today: str, target_location: str) -> str:
+    """Return the digest header; subscribers sharing a location reuse it within a run."""
     safe_location = _esc(target_location)
     location_subtitle = (
         f'<p style="margin:4px 0 0;opacity:.85;font-size:14px">Jobs in {safe_location}</p>' if safe_location else ""
     )
+    return f"""\
+    <!-- Header -->
+    <div style="background:linear-gradient(135deg,#2563eb,#7c3aed);
+                padding:24px;color:#fff;text-align:center">
+      <h1 style="margin:0;font-size:22px">&#128270; Immermatch Daily Digest</h1>
+      <p style="margin:4px 0 0;opacity:.85;font-size:14px">{today}</p>
+      {location_subtitle}
+    </div>
+"""
+
+
+def digest_date(now: datetime | None = None) -> str:
+    """Format the date shown in the digest header (defaults to today, UTC)."""
+    return (now or datetime.now(timezone.utc)).strftime("%B %d, %Y")
+
+
+def _build_html(
+    jobs: list[dict],
+    unsubscribe_url: str = "",
+    target_location: str = "",
+    *,
+    today: str | None = None,
+) -> str:
+    """Build a full HTML email body for the daily digest."""
+    today = today or digest_date()
+    sorted_jobs = sorted(jobs, key=lambda j: j.get("score") or 0, reverse=True)
+    parts: list[str] = []
+    for i, job in enumerate(sorted_jobs):
+        if i:
+            parts.append("\n")
+        _append_job_row(parts, job)
+    rows = "".join(parts)
+    impressum = _impressum_line()
 
     excellent = sum(1 for j in jobs if (j.get("score") or 0) >= 80)
     good = sum(1 for j in jobs if 70 <= (j.get("score") or 0) < 80)
@@ -101,25 +245,8 @@ def _build_html(jobs: list[dict], unsubscribe_url: str = "", target_location: st
         )
     stats_html = f'<p style="margin:8px 0 0">{" ".join(stats_parts)}</p>' if stats_parts else ""
 
-    return f"""\
-<!DOCTYPE html>
-<html lang="en">
-<head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"></head>
-<body style="margin:0;padding:0;font-family:-apple-system,BlinkMacSystemFont,
-'Segoe UI',Roboto,Helvetica,Arial,sans-serif;background:#f9fafb">
-
-  <div style="max-width:600px;margin:24px auto;background:#fff;
-              border-radius:8px;overflow:hidden;
-              border:1px solid #e5e7eb">
-
-    <!-- Header -->
-    <div style="background:linear-gradient(135deg,#2563eb,#7c3aed);
-                padding:24px;color:#fff;text-align:center">
-      <h1 style="margin:0;font-size:22px">&#128270; Immermatch Daily Digest</h1>
-      <p style="margin:4px 0 0;opacity:.85;font-size:14px">{today}</p>
-      {location_subtitle}
-    </div>
-
+    header = _digest_header(today, target_location)
+    body = f"""\
     <!-- Body -->
     <div style="padding:24px">
       <p style="margin:0 0 4px;color:#374151">
@@ -134,19 +261,15 @@ def _build_html(jobs: list[dict], unsubscribe_url: str = "", target_location: st
         </tbody>
       </table>
     </div>
-
-    <!-- Footer -->
-    <div style="padding:16px 24px;background:#f9fafb;
-                border-top:1px solid #e5e7eb;text-align:center;
-                color:#9ca3af;font-size:12px">
+"""
+    unsubscribe_html = (
+        f'<br><a href="{_safe_url(unsubscribe_url)}" style="color:#9ca3af">Unsubscribe</a>' if unsubscribe_url else ""
+    )
+    footer = f"""\
       <p style="margin:0 0 8px">You're receiving this because you subscribed to Immermatch.</p>
       {impressum}
-      {f'<br><a href="{_safe_url(unsubscribe_url)}" style="color:#9ca3af">Unsubscribe</a>' if unsubscribe_url else ""}
-    </div>
-  </div>
-
-</body>
-</html>"""
+      {unsubscribe_html}"""
+    return _render_email(header, body, footer)
 
 
 def send_daily_digest(
@@ -154,6 +277,8 @@ def send_daily_digest(
     jobs: list[dict],
     unsubscribe_url: str = "",
     target_location: str = "",
+    *,
+    today: str | None = None,
 ) -> dict:
     """Send a daily digest email with new job matches.
 
@@ -163,6 +288,8 @@ def send_daily_digest(
               ``url``, and optionally ``score`` and ``location``.
         unsubscribe_url: One-click unsubscribe link for this subscriber.
         target_location: Subscriber's target job location (shown in header).
+        today: Header date from :func:`digest_date`; batch senders compute it
+            once per run. Defaults to today's date.
 
     Returns:
         Resend API response dict.
@@ -170,19 +297,13 @@ def send_daily_digest(
     Raises:
         ValueError: If RESEND_API_KEY is not set.
     """
-    api_key = os.environ.get("RESEND_API_KEY")
-    if not api_key:
-        raise ValueError("RESEND_API_KEY environment variable not set")
-
-    resend.api_key = api_key
-
-    from_addr = os.environ.get("RESEND_FROM", "Immermatch <digest@immermatch.dev>")
+    from_addr = _resend_sender()
 
     params: dict = {
         "from": from_addr,
         "to": [user_email],
         "subject": f"Immermatch: {len(jobs)} new job match{'es' if len(jobs) != 1 else ''} for you",
-        "html": _build_html(jobs, unsubscribe_url=unsubscribe_url, target_location=target_location),
+        "html": _build_html(jobs, unsubscribe_url=unsubscribe_url, target_location=target_location, today=today),
     }
     if unsubscribe_url:
         params["headers"] = {
@@ -190,7 +311,7 @@ def send_daily_digest(
             "List-Unsubscribe-Post": "List-Unsubscribe=One-Click",
         }
 
-    return resend.Emails.send(params)
+    return _send(params)
 
 
 def send_welcome_email(
@@ -215,12 +336,7 @@ def send_welcome_email(
     Raises:
         ValueError: If RESEND_API_KEY is not set.
     """
-    api_key = os.environ.get("RESEND_API_KEY")
-    if not api_key:
-        raise ValueError("RESEND_API_KEY environment variable not set")
-
-    resend.api_key = api_key
-    from_addr = os.environ.get("RESEND_FROM", "Immermatch <digest@immermatch.dev>")
+    from_addr = _resend_sender()
     impressum = _impressum_line()
 
     safe_location = _esc(target_location)
@@ -239,21 +355,7 @@ def send_welcome_email(
     footer_links = " · ".join(link for link in (privacy_line, unsub_html) if link)
     footer_links_html = f"<br>{footer_links}" if footer_links else ""
 
-    html = f"""\
-<!DOCTYPE html>
-<html lang="en">
-<head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"></head>
-<body style="margin:0;padding:0;font-family:-apple-system,BlinkMacSystemFont,
-'Segoe UI',Roboto,Helvetica,Arial,sans-serif;background:#f9fafb">
-  <div style="max-width:600px;margin:24px auto;background:#fff;
-              border-radius:8px;overflow:hidden;
-              border:1px solid #e5e7eb">
-    <div style="background:linear-gradient(135deg,#2563eb,#7c3aed);
-                padding:32px 24px;color:#fff;text-align:center">
-      <div style="font-size:36px;margin-bottom:8px">&#127881;</div>
-      <h1 style="margin:0;font-size:24px">Welcome to Immermatch</h1>
-      <p style="margin:8px 0 0;opacity:.85;font-size:15px">Your subscription is confirmed</p>
-    </div>
+    body = f"""\
     <div style="padding:24px">
       <p style="font-size:16px;color:#374151;margin:0 0 16px">
         Your daily job digest is now active. Here's what to expect:</p>
@@ -271,15 +373,12 @@ def send_welcome_email(
           Unsubscribe any time via the link in each email</td></tr>
       </table>
     </div>
-    <div style="padding:16px 24px;background:#f9fafb;
-                border-top:1px solid #e5e7eb;text-align:center;
-                color:#9ca3af;font-size:12px">
-      {impressum}
-      {footer_links_html}
-    </div>
-  </div>
-</body>
-</html>"""
+"""
+    html = _render_email(
+        _hero_header("&#127881;", "Welcome to Immermatch", "Your subscription is confirmed"),
+        body,
+        f"      {impressum}\n      {footer_links_html}",
+    )
 
     params: dict = {
         "from": from_addr,
@@ -293,48 +392,19 @@ def send_welcome_email(
             "List-Unsubscribe-Post": "List-Unsubscribe=One-Click",
         }
 
-    return resend.Emails.send(params)
-
-
-def send_verification_email(email: str, verify_url: str) -> dict:  # type: ignore[type-arg]
-    """Send a Double Opt-In verification email.
-
-    Args:
-        email: Recipient email address.
-        verify_url: Full URL the user must visit to confirm their subscription.
-
-    Returns:
-        Resend API response dict.
-    """
-    api_key = os.environ.get("RESEND_API_KEY")
-    if not api_key:
-        raise ValueError("RESEND_API_KEY environment variable not set")
+    return _send(params)
 
-    resend.api_key = api_key
-    from_addr = os.environ.get("RESEND_FROM", "Immermatch <digest@immermatch.dev>")
-    impressum = _impressum_line()
 
-    html = f"""\
-<!DOCTYPE html>
-<html lang="en">
-<head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"></head>
-<body style="margin:0;padding:0;font-family:-apple-system,BlinkMacSystemFont,
-'Segoe UI',Roboto,Helvetica,Arial,sans-serif;background:#f9fafb">
-  <div style="max-width:600px;margin:24px auto;background:#fff;
-              border-radius:8px;overflow:hidden;
-              border:1px solid #e5e7eb">
-    <div style="background:linear-gradient(135deg,#2563eb,#7c3aed);
-                padding:32px 24px;color:#fff;text-align:center">
-      <div style="font-size:36px;margin-bottom:8px">&#128270;</div>
-      <h1 style="margin:0;font-size:24px">Immermatch</h1>
-      <p style="margin:8px 0 0;opacity:.85;font-size:15px">One click to activate your daily job digest</p>
-    </div>
+# Static parts of the verification email; only the link and impressum vary.
+_VERIFY_HEADER = _hero_header("&#128270;", "Immermatch", "One click to activate your daily job digest")
+_VERIFY_BODY_OPEN = """\
     <div style="padding:24px">
       <p style="font-size:16px;color:#374151;margin:0 0 16px">
         Thank you for subscribing! Please confirm your email address to start
         receiving AI-matched job listings:</p>
       <p style="text-align:center;margin:24px 0">
-        <a href="{_safe_url(verify_url)}"
+        <a href=\""""
+_VERIFY_BODY_CLOSE = """"
            style="background:#2563eb;color:#fff;padding:14px 36px;
                   border-radius:6px;text-decoration:none;font-weight:600;
                   font-size:16px;display:inline-block">
@@ -359,16 +429,30 @@ def send_verification_email(email: str, verify_url: str) -> dict:  # type: ignor
         sign up, you can safely ignore this email.
       </p>
     </div>
-    <div style="padding:16px 24px;background:#f9fafb;
-                border-top:1px solid #e5e7eb;text-align:center;
-                color:#9ca3af;font-size:12px">
-      {impressum}
-    </div>
-  </div>
-</body>
-</html>"""
+"""
+
 
-    return resend.Emails.send(
+def send_verification_email(email: str, verify_url: str) -> dict:  # type: ignore[type-arg]
+    """Send a Double Opt-In verification email.
+
+    Args:
+        email: Recipient email address.
+        verify_url: Full URL the user must visit to confirm their subscription.
+
+    Returns:
+        Resend API response dict.
+    """
+    from_addr = _resend_sender()
+    impressum = _impressum_line()
+
+    body = f"{_VERIFY_BODY_OPEN}{_safe_url(verify_url)}{_VERIFY_BODY_CLOSE}"
+    html = _render_email(
+        _VERIFY_HEADER,
+        body,
+        f"      {impressum}",
+    )
+
+    return _send(
         {
             "from": from_addr,
             "to": [email],
@@ -380,29 +464,10 @@ def send_verification_email(email: str, verify_url: str) -> dict:  # type: ignor
 
 def send_manage_subscription_email(email: str, manage_url: str) -> dict:  # type: ignore[type-arg]
     """Send a secure link for managing subscription preferences."""
-    api_key = os.environ.get("RESEND_API_KEY")
-    if not api_key:
-        raise ValueError("RESEND_API_KEY environment variable not set")
-
-    resend.api_key = api_key
-    from_addr = os.environ.get("RESEND_FROM", "Immermatch <digest@immermatch.dev>")
+    from_addr = _resend_sender()
     impressum = _impressum_line()
 
-    html = f"""\
-<!DOCTYPE html>
-<html lang="en">
-<head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"></head>
-<body style="margin:0;padding:0;font-family:-apple-system,BlinkMacSystemFont,
-'Segoe UI',Roboto,Helvetica,Arial,sans-serif;background:#f9fafb">
-  <div style="max-width:600px;margin:24px auto;background:#fff;
-              border-radius:8px;overflow:hidden;
-              border:1px solid #e5e7eb">
-    <div style="background:linear-gradient(135deg,#2563eb,#7c3aed);
-                padding:32px 24px;color:#fff;text-align:center">
-      <div style="font-size:36px;margin-bottom:8px">&#9881;&#65039;</div>
-      <h1 style="margin:0;font-size:24px">Manage your Immermatch subscription</h1>
-      <p style="margin:8px 0 0;opacity:.85;font-size:15px">Secure preferences update link</p>
-    </div>
+    body = f"""\
     <div style="padding:24px">
       <p style="font-size:16px;color:#374151;margin:0 0 16px">
         Click the button below to manage your digest preferences securely:</p>
@@ -419,16 +484,14 @@ def send_manage_subscription_email(email: str, manage_url: str) -> dict:  # type
         you can safely ignore this email.
       </p>
     </div>
-    <div style="padding:16px 24px;background:#f9fafb;
-                border-top:1px solid #e5e7eb;text-align:center;
-                color:#9ca3af;font-size:12px">
-      {impressum}
-    </div>
-  </div>
-</body>
-</html>"""
+"""
+    html = _render_email(
+        _hero_header("&#9881;&#65039;", "Manage your Immermatch subscription", "Secure preferences update link"),
+        body,
+        f"      {impressum}",
+    )
 
-    return resend.Emails.send(
+    return _send(
         {
             "from": from_addr,
             "to": [email],
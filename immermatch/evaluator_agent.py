@@ -1,18 +1,25 @@
 """Evaluator Agent module - Scores job listings against CV using LLM."""
 
+import hashlib
+import heapq
 import threading
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from operator import attrgetter
 
 from google import genai
 from google.genai.errors import ClientError, ServerError
-from pydantic import Field
+from pydantic import BaseModel, Field, ValidationError
 
-from .llm import call_gemini, parse_json
+from .llm import call_gemini, parse_json, parse_model
 from .models import ERROR_SCORE, CandidateProfile, EvaluatedJob, JobEvaluation, JobListing
 
-# System prompt for the Screener agent
-SCREENER_SYSTEM_PROMPT = """You are a strict Hiring Manager. Evaluate if the candidate is a fit for this specific job.
+# Sort key for evaluated jobs; attrgetter resolves the dotted path in C.
+_by_score = attrgetter("evaluation.score")
+
+# Scoring rubric shared by single-job and batched screening; each mode appends
+# its own output contract below.
+_SCREENER_RUBRIC = """You are a strict Hiring Manager. Evaluate if the candidate is a fit for this specific job.
 
 **Scoring Rubric (0-100):**
 - **90-100:** Would get an interview almost anywhere. Exact stack, seniority, language, and domain match.
@@ -34,12 +41,25 @@ SCREENER_SYSTEM_PROMPT = """You are a strict Hiring Manager. Evaluate if the can
 - Conversely, if the job clearly requires senior/lead-level experience (e.g., 8+ years, "Senior", "Lead", "Principal", "Head of") and the candidate is Junior level, the score must be capped at 40.
 - Pay attention to visa/work permit requirements if mentioned.
 
+Be critical but fair. European companies often have strict requirements."""
+
+# System prompt for the Screener agent (one job per call)
+SCREENER_SYSTEM_PROMPT = f"""{_SCREENER_RUBRIC}
+
 Return ONLY a JSON object with:
 - "score": (int) The match score 0-100
 - "reasoning": (string) A concise 1-2 sentence explanation of the score
-- "missing_skills": (list) What is the candidate missing? Empty list if nothing major.
+- "missing_skills": (list) What is the candidate missing? Empty list if nothing major."""
 
-Be critical but fair. European companies often have strict requirements."""
+# System prompt for batched screening (several numbered job listings per call)
+_BATCH_SCREENER_PROMPT = f"""{_SCREENER_RUBRIC}
+
+Evaluate each job listing independently. Return ONLY a JSON object with an "evaluations" list holding one \
+object per listing, each with:
+- "job": (int) The listing number
+- "score": (int) The match score 0-100
+- "reasoning": (string) A concise 1-2 sentence explanation of the score
+- "missing_skills": (list) What is the candidate missing? Empty list if nothing major."""
 
 
 _MAX_DESC_CHARS = 2000
@@ -51,6 +71,10 @@ class _LlmJobEvaluation(JobEvaluation):
     score: int = Field(ge=0, le=100)
 
 
+# Structured-output schema, generated once instead of on every request.
+_JOB_EVALUATION_SCHEMA = _LlmJobEvaluation.model_json_schema()
+
+
 def _truncate_description(text: str, limit: int = _MAX_DESC_CHARS) -> str:
     """Truncate a job description preserving both the start and the end.
 
@@ -68,18 +92,8 @@ def _truncate_description(text: str, limit: int = _MAX_DESC_CHARS) -> str:
     return text[:half] + marker + text[-half:]
 
 
-def evaluate_job(client: genai.Client, profile: CandidateProfile, job: JobListing) -> JobEvaluation:
-    """
-    Evaluate how well a job matches the candidate's profile.
-
-    Args:
-        client: Gemini client instance.
-        profile: Candidate's structured profile.
-        job: Job listing to evaluate.
-
-    Returns:
-        Evaluation with score and reasoning.
-    """
+def _format_profile(profile: CandidateProfile) -> str:
+    """Render the candidate-profile section shared by every screening prompt."""
     certs_line = f"\n- **Certifications:** {', '.join(profile.certifications)}" if profile.certifications else ""
     edu_line = f"\n- **Education:** {', '.join(profile.education)}" if profile.education else ""
     summary_line = f"\n- **Summary:** {profile.summary}" if profile.summary else ""
@@ -108,33 +122,65 @@ def evaluate_job(client: genai.Client, profile: CandidateProfile, job: JobListin
 
     prefs_line = f"\n- **Preferences:** {profile.preferences}" if profile.preferences else ""
 
-    user_prompt = f"""## Candidate Profile
+    return f"""## Candidate Profile
 - **Skills:** {", ".join(profile.skills)}
 - **Experience:** {profile.experience_level} ({profile.years_of_experience} years)
 - **Target Roles:** {", ".join(profile.roles)}
 - **Languages:** {", ".join(profile.languages)}
-- **Domain Expertise:** {", ".join(profile.domain_expertise)}{edu_line}{certs_line}{summary_line}{prefs_line}{work_history_section}{education_history_section}
+- **Domain Expertise:** {", ".join(profile.domain_expertise)}{edu_line}{certs_line}{summary_line}{prefs_line}{work_history_section}{education_history_section}"""
 
-## Job Listing
-- **Title:** {job.title}
+
+def _format_job(job: JobListing) -> str:
+    """Render the fields of a single job listing for a screening prompt."""
+    return f"""- **Title:** {job.title}
 - **Company:** {job.company_name}
 - **Location:** {job.location}
 
 **Job Description:**
-{_truncate_description(job.description) if job.description else "No detailed description available."}
+{_truncate_description(job.description) if job.description else "No detailed description available."}"""
+
+
+def evaluate_job(
+    client: genai.Client,
+    profile: CandidateProfile,
+    job: JobListing,
+    *,
+    profile_block: str | None = None,
+) -> JobEvaluation:
+    """
+    Evaluate how well a job matches the candidate's profile.
+
+    Args:
+        client: Gemini client instance.
+        profile: Candidate's structured profile.
+        job: Job listing to evaluate.
+        profile_block: Pre-rendered ``_format_profile(profile)``, for callers
+            screening many jobs against the same profile.
+
+    Returns:
+        Evaluation with score and reasoning.
+    """
+    prompt = f"""{SCREENER_SYSTEM_PROMPT}
+
+{profile_block or _format_profile(profile)}
+
+## Job Listing
+{_format_job(job)}
 
 ---
 Evaluate this job match and return JSON."""
 
-    prompt = f"{SCREENER_SYSTEM_PROMPT}\n\n{user_prompt}"
-
     try:
-        content = call_gemini(client, prompt, max_tokens=512, response_schema=_LlmJobEvaluation.model_json_schema())
+        content = call_gemini(client, prompt, temperature=0.2, max_tokens=512, response_schema=_JOB_EVALUATION_SCHEMA)
     except (ServerError, ClientError):
         return JobEvaluation(
             score=ERROR_SCORE, reasoning="Could not evaluate (API error after retries)", missing_skills=[]
         )
 
+    evaluation = parse_model(content, JobEvaluation)
+    if evaluation is not None:
+        return evaluation
+
     try:
         data = parse_json(content)
     except ValueError:
@@ -149,47 +195,209 @@ Evaluate this job match and return JSON."""
     return JobEvaluation(**data)
 
 
+class _LlmBatchItem(_LlmJobEvaluation):
+    """One entry of a batched screening response, tied to its listing number."""
+
+    job: int = Field(description="Number of the job listing this evaluation belongs to (1-based)")
+
+
+class _LlmBatchEvaluation(BaseModel):
+    """Schema for batched screening responses."""
+
+    evaluations: list[_LlmBatchItem]
+
+
+_BATCH_EVALUATION_SCHEMA = _LlmBatchEvaluation.model_json_schema()
+
+
+def evaluate_jobs_batch(
+    client: genai.Client,
+    profile: CandidateProfile,
+    jobs: list[JobListing],
+    *,
+    profile_block: str | None = None,
+) -> list[JobEvaluation]:
+    """Evaluate several jobs against the candidate profile in a single Gemini call.
+
+    The profile is sent once and shared by all listings in the prompt, which
+    saves input tokens and requests compared to one ``evaluate_job`` call per
+    job. Listings the model leaves out of its answer get an ``ERROR_SCORE``
+    evaluation.
+
+    Args:
+        client: Gemini client instance.
+        profile: Candidate's structured profile.
+        jobs: Job listings to evaluate.
+        profile_block: Pre-rendered ``_format_profile(profile)``, for callers
+            submitting many batches for the same profile.
+
+    Returns:
+        One evaluation per job, in the same order as *jobs*.
+    """
+    if profile_block is None:
+        profile_block = _format_profile(profile)
+    if len(jobs) <= 1:
+        return [evaluate_job(client, profile, job, profile_block=profile_block) for job in jobs]
+
+    listings = "\n\n".join(f"## Job Listing {i}\n{_format_job(job)}" for i, job in enumerate(jobs, 1))
+    prompt = f"""{_BATCH_SCREENER_PROMPT}
+
+{profile_block}
+
+{listings}
+
+---
+Evaluate these {len(jobs)} job listings and return JSON."""
+
+    def _errors(reason: str) -> list[JobEvaluation]:
+        return [
+            JobEvaluation(score=ERROR_SCORE, reasoning=f"Could not evaluate ({reason})", missing_skills=[])
+            for _ in jobs
+        ]
+
+    try:
+        content = call_gemini(
+            client,
+            prompt,
+            temperature=0.2,
+            max_tokens=512 * len(jobs),
+            response_schema=_BATCH_EVALUATION_SCHEMA,
+        )
+    except (ServerError, ClientError):
+        return _errors("API error after retries")
+
+    batch = parse_model(content, _LlmBatchEvaluation)
+    if batch is not None:
+        entries = batch.evaluations
+    else:
+        # Slow path: recover what we can, skipping malformed entries
+        try:
+            data = parse_json(content)
+        except ValueError:
+            return _errors("failed to parse response")
+
+        if not isinstance(data, dict) or not isinstance(data.get("evaluations"), list):
+            return _errors("unexpected response format")
+
+        entries = []
+        for item in data["evaluations"]:
+            try:
+                entries.append(_LlmBatchItem(**item))
+            except (TypeError, ValidationError):
+                continue
+
+    results = _errors("missing from batch response")
+    for entry in entries:
+        if 1 <= entry.job <= len(jobs):
+            results[entry.job - 1] = JobEvaluation(
+                score=entry.score, reasoning=entry.reasoning, missing_skills=entry.missing_skills
+            )
+    return results
+
+
+_EVAL_BATCH_SIZE = 8
+
+# Worker pools live for the whole process, one per pool size, so repeated
+# evaluate_all_jobs calls (one per subscriber in the daily task) reuse threads.
+_POOLS: dict[int, ThreadPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _get_pool(max_workers: int) -> ThreadPoolExecutor:
+    """Return the shared evaluation pool with *max_workers* threads."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(max_workers)
+        if pool is None:
+            pool = _POOLS[max_workers] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eval")
+        return pool
+
+
+def _split_duplicates(jobs: list[JobListing]) -> tuple[list[JobListing], dict[int, list[JobListing]]]:
+    """Separate re-listed postings from the listings that need screening.
+
+    Aggregators re-list one posting across boards and cities with the same
+    title and description text. Returns the first listing of each such group
+    plus a map from ``id(first)`` to its re-listings. Jobs without a
+    description are never grouped.
+    """
+    unique: list[JobListing] = []
+    copies: dict[int, list[JobListing]] = {}
+    first_by_digest: dict[bytes, JobListing] = {}
+    for job in jobs:
+        if job.description:
+            digest = hashlib.blake2b(f"{job.title}\0{job.description}".encode(), digest_size=8).digest()
+            first = first_by_digest.setdefault(digest, job)
+            if first is not job:
+                copies.setdefault(id(first), []).append(job)
+                continue
+        unique.append(job)
+    return unique, copies
+
+
+def submit_evaluation_batches(
+    executor: Executor,
+    client: genai.Client,
+    profile: CandidateProfile,
+    jobs: list[JobListing],
+    batch_size: int = _EVAL_BATCH_SIZE,
+) -> list[Future[list[EvaluatedJob]]]:
+    """Submit *jobs* for screening on *executor*, ``batch_size`` per Gemini call.
+
+    Re-listings with the same title and description are screened once and
+    share that evaluation, and the profile is rendered once for all batches.
+    Each future resolves to the evaluated jobs of one batch, re-listings
+    included, so the futures together cover every job in *jobs*.
+    """
+    profile_block = _format_profile(profile)
+    unique, copies = _split_duplicates(jobs)
+
+    def _evaluate_batch(batch: list[JobListing]) -> list[EvaluatedJob]:
+        evaluations = evaluate_jobs_batch(client, profile, batch, profile_block=profile_block)
+        results = []
+        for job, ev in zip(batch, evaluations, strict=True):
+            results.append(EvaluatedJob(job=job, evaluation=ev))
+            results.extend(EvaluatedJob(job=copy, evaluation=ev) for copy in copies.get(id(job), ()))
+        return results
+
+    return [executor.submit(_evaluate_batch, unique[i : i + batch_size]) for i in range(0, len(unique), batch_size)]
+
+
 def evaluate_all_jobs(
     client: genai.Client,
     profile: CandidateProfile,
     jobs: list[JobListing],
     progress_callback=None,
     max_workers: int = 30,
+    batch_size: int = _EVAL_BATCH_SIZE,
 ) -> list[EvaluatedJob]:
     """
     Evaluate multiple jobs against the candidate profile in parallel.
 
+    Jobs are screened via :func:`submit_evaluation_batches`, so the candidate
+    profile is sent once per batch rather than once per job and re-listings
+    are screened only once.
+
     Args:
         client: Gemini client instance.
         profile: Candidate's structured profile.
         jobs: List of job listings to evaluate.
         progress_callback: Optional callback(current, total) for progress updates.
         max_workers: Number of concurrent API calls.
+        batch_size: Number of jobs screened per Gemini call.
 
     Returns:
         List of evaluated jobs, sorted by score descending.
     """
     evaluated: list[EvaluatedJob] = []
-    counter_lock = threading.Lock()
-    completed_count = 0
-
-    def _evaluate_one(job: JobListing) -> EvaluatedJob:
-        nonlocal completed_count
-        evaluation = evaluate_job(client, profile, job)
-        result = EvaluatedJob(job=job, evaluation=evaluation)
-        if progress_callback:
-            with counter_lock:
-                completed_count += 1
-                progress_callback(completed_count, len(jobs))
-        return result
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(_evaluate_one, job): job for job in jobs}
-        for future in as_completed(futures):
-            evaluated.append(future.result())
+    futures = submit_evaluation_batches(_get_pool(max_workers), client, profile, jobs, batch_size)
+    for future in as_completed(futures):
+        for ej in future.result():
+            evaluated.append(ej)
+            if progress_callback:
+                progress_callback(len(evaluated), len(jobs))
 
     # Sort by score descending
-    evaluated.sort(key=lambda x: x.evaluation.score, reverse=True)
+    evaluated.sort(key=_by_score, reverse=True)
 
     return evaluated
 
@@ -219,20 +427,22 @@ def generate_summary(
     Args:
         client: Gemini client instance.
         profile: Candidate's structured profile.
-        evaluated_jobs: All evaluated jobs, sorted by score descending.
+        evaluated_jobs: All evaluated jobs (any order).
 
     Returns:
         Markdown-formatted summary string.
     """
-    # Score distribution (exclude error sentinels from bins)
+    # Score distribution (exclude error sentinels from bins) and missing-skill
+    # frequency, gathered in a single pass
     bins = {"≥80": 0, "70-79": 0, "50-69": 0, "<50": 0}
     error_count = 0
+    skill_counts: Counter[str] = Counter()
     for ej in evaluated_jobs:
+        skill_counts.update(ej.evaluation.missing_skills)
         s = ej.evaluation.score
         if s < 0:
             error_count += 1
-            continue
-        if s >= 80:
+        elif s >= 80:
             bins["≥80"] += 1
         elif s >= 70:
             bins["70-79"] += 1
@@ -240,16 +450,10 @@ def generate_summary(
             bins["50-69"] += 1
         else:
             bins["<50"] += 1
-
-    # Missing skills frequency
-    skill_counts: Counter[str] = Counter()
-    for ej in evaluated_jobs:
-        for skill in ej.evaluation.missing_skills:
-            skill_counts[skill] += 1
     top_missing = skill_counts.most_common(10)
 
-    # Top matches (up to 10)
-    top_matches = evaluated_jobs[:10]
+    # Top matches (up to 10); a bounded heap avoids re-sorting the full list
+    top_matches = heapq.nlargest(10, evaluated_jobs, key=_by_score)
     matches_text = "\n".join(
         f"- {ej.job.title} @ {ej.job.company_name} — score {ej.evaluation.score}/100 — "
         f"{ej.evaluation.reasoning}"
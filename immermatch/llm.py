@@ -1,15 +1,22 @@
 """Shared LLM client, retry logic, and model configuration."""
 
+import hashlib
 import json
 import os
 import random
-import re
 import threading
 import time
+from collections import OrderedDict
+from typing import TypeVar
 
+import httpx
+import orjson
 from google import genai
 from google.genai import types
 from google.genai.errors import ClientError, ServerError
+from pydantic import BaseModel, ValidationError
+
+from .rate_limit import AdaptiveConcurrencyLimiter, RateLimiter
 
 # Retry configuration
 MAX_RETRIES = 5
@@ -21,7 +28,21 @@ MODEL = "gemini-3.1-flash-lite-preview"
 # call Gemini simultaneously (e.g. parallel job evaluation).
 # Gemini allows ~1000 RPM; with ~3-5s latency per call, 30 concurrent
 # requests ≈ 360-600 RPM — well within limits.
-_gemini_semaphore = threading.Semaphore(30)
+# The cap adapts (AIMD): each 429 halves it, successes grow it back to 30.
+_GEMINI_CONCURRENCY = 30
+_gemini_concurrency = AdaptiveConcurrencyLimiter(_GEMINI_CONCURRENCY)
+
+# Request pacing — the concurrency cap limits in-flight calls, but fast responses can
+# still push the start rate past the per-minute quota. 15 req/s ≈ 900 RPM.
+_gemini_rate_limiter = RateLimiter(rate=15, per=1.0)
+
+# Exact-match response cache — only near-deterministic calls are cached, since
+# at higher temperatures a repeated prompt is expected to yield a fresh answer.
+_CACHEABLE_MAX_TEMPERATURE = 0.3
+_RESPONSE_CACHE_SIZE = 512
+_RESPONSE_CACHE_TTL = 7 * 24 * 3600  # seconds
+_response_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+_response_cache_lock = threading.Lock()
 
 
 def create_client() -> genai.Client:
@@ -29,7 +50,52 @@ def create_client() -> genai.Client:
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY environment variable not set")
-    return genai.Client(api_key=api_key)
+    # One keep-alive HTTP/2 pool sized to the concurrency cap, so the worker
+    # threads that share this client reuse connections instead of re-handshaking.
+    http_options = types.HttpOptions(
+        client_args={
+            "http2": True,
+            "limits": httpx.Limits(
+                max_connections=_GEMINI_CONCURRENCY,
+                max_keepalive_connections=_GEMINI_CONCURRENCY,
+            ),
+        }
+    )
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+def _response_cache_key(
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    thinking_level: types.ThinkingLevel | str | None,
+    response_schema: dict | None,
+) -> str:
+    """Digest of everything that shapes a Gemini response for *prompt*."""
+    schema = orjson.dumps(response_schema, option=orjson.OPT_SORT_KEYS) if response_schema is not None else b""
+    head = f"{MODEL}|{temperature}|{max_tokens}|{thinking_level}|".encode()
+    return hashlib.blake2b(head + schema + b"|" + prompt.encode(), digest_size=16).hexdigest()
+
+
+def _cached_response(key: str) -> str | None:
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, text = entry
+        if time.monotonic() - stored_at > _RESPONSE_CACHE_TTL:
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+        return text
+
+
+def _store_response(key: str, text: str) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic(), text)
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > _RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
 
 
 def call_gemini(
@@ -43,11 +109,23 @@ def call_gemini(
     """Make a Gemini API call with retry logic.
 
     Retries on 429 (rate limit) and 503 (overloaded) with exponential backoff.
+    The backoff pauses the shared request pacer, so every thread holds off
+    while the provider recovers and retries queue up by their ready time.
 
     When *response_schema* is provided the request uses Gemini structured
     output (``response_mime_type="application/json"``), which guarantees the
     response is valid JSON matching the given JSON Schema.
+
+    Calls with ``temperature <= 0.3`` are served from an in-process exact-match
+    cache (keyed on model, prompt and generation settings) for up to 7 days.
     """
+    cache_key = None
+    if temperature <= _CACHEABLE_MAX_TEMPERATURE:
+        cache_key = _response_cache_key(prompt, temperature, max_tokens, thinking_level, response_schema)
+        cached = _cached_response(cache_key)
+        if cached is not None:
+            return cached
+
     last_exception: Exception | None = None
 
     thinking_config = (
@@ -65,30 +143,56 @@ def call_gemini(
 
     for attempt in range(MAX_RETRIES):
         try:
-            with _gemini_semaphore:
+            _gemini_rate_limiter.acquire()
+            with _gemini_concurrency:
                 response = client.models.generate_content(
                     model=MODEL,
                     contents=prompt,
                     config=types.GenerateContentConfig(**config_kwargs),
                 )
-            return response.text or ""
+            _gemini_concurrency.record_success()
+            text = response.text or ""
+            if cache_key is not None and text:
+                _store_response(cache_key, text)
+            return text
         except ServerError as e:
             last_exception = e
             if attempt < MAX_RETRIES - 1:
                 delay = BASE_DELAY * (2**attempt) + random.uniform(0, 1)  # noqa: S311
-                time.sleep(delay)
+                _gemini_rate_limiter.pause(delay)
         except ClientError as e:
-            if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
+            if e.code == 429 or e.status == "RESOURCE_EXHAUSTED":
+                _gemini_concurrency.record_throttle()
                 last_exception = e
                 if attempt < MAX_RETRIES - 1:
                     delay = BASE_DELAY * (2**attempt) + random.uniform(0, 1)  # noqa: S311
-                    time.sleep(delay)
+                    _gemini_rate_limiter.pause(delay)
             else:
                 raise
 
     raise last_exception  # type: ignore[misc]
 
 
+_JSON_DECODER = json.JSONDecoder()
+
+_ModelT = TypeVar("_ModelT", bound=BaseModel)
+
+
+def parse_model(text: str, model: type[_ModelT]) -> _ModelT | None:
+    """Validate a bare-JSON LLM response straight into *model*.
+
+    pydantic-core parses the JSON and builds the model in one pass, skipping
+    values for keys the model does not declare instead of materialising an
+    intermediate dict.  Returns ``None`` when *text* is not a valid instance
+    (fenced, prose-wrapped, malformed), so callers can fall back to
+    :func:`parse_json` and their usual error handling.
+    """
+    try:
+        return model.model_validate_json(text)
+    except ValidationError:
+        return None
+
+
 def parse_json(text: str) -> dict | list:
     """Extract and parse JSON from an LLM response that may contain markdown fences.
 
@@ -101,29 +205,35 @@ def parse_json(text: str) -> dict | list:
     if not text:
         raise ValueError("Empty response from API")
 
-    # Strip markdown code fences (```json ... ``` or ``` ... ```)
-    stripped = re.sub(r"```(?:json)?\s*\n?", "", text).strip()
-
-    # Try parsing the stripped text directly
+    # Structured-output responses are bare JSON
     try:
-        return json.loads(stripped)
-    except json.JSONDecodeError:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         pass
 
-    # Try extracting the outermost JSON object { ... }
-    match = re.search(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group())
-        except json.JSONDecodeError:
-            pass
+    # Keep only the body of a markdown code fence (```json ... ``` or ``` ... ```)
+    stripped = text
+    if "```" in stripped:
+        stripped = stripped.partition("```")[2].partition("```")[0]
+        if stripped.startswith("json"):
+            stripped = stripped[4:]
+    stripped = stripped.strip()
 
-    # Try extracting a JSON array [ ... ]
-    match = re.search(r"\[[\s\S]*\]", text)
-    if match:
-        try:
-            return json.loads(match.group())
-        except json.JSONDecodeError:
-            pass
+    try:
+        return orjson.loads(stripped)
+    except orjson.JSONDecodeError:
+        pass
+
+    # Decode the first complete object (or else array) embedded in the text;
+    # raw_decode stops at the end of that value, so trailing prose is ignored.
+    # The fence body is tried first, then the full reply (JSON outside a fence).
+    for candidate in (stripped, text):
+        for opener in ("{", "["):
+            start = candidate.find(opener)
+            if start != -1:
+                try:
+                    return _JSON_DECODER.raw_decode(candidate, start)[0]
+                except json.JSONDecodeError:
+                    pass
 
     raise ValueError(f"Could not parse JSON from response: {text[:200]}")
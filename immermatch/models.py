@@ -86,6 +86,15 @@ class JobListing(BaseModel):
         description="Source reliability: verified (govt/direct), aggregator (known board), unverified (unknown)",
     )
 
+    @property
+    def cache_key(self) -> str:
+        """Identity key (``title|company|location``) used for dedup and cache lookups.
+
+        Fields are stripped and casefolded, so boards that differ only in
+        capitalisation or surrounding whitespace map to the same listing.
+        """
+        return "|".join(part.strip().casefold() for part in (self.title, self.company_name, self.location))
+
 
 ERROR_SCORE: int = -1
 """Sentinel score returned when evaluation fails (API error, parse error, etc.)."""
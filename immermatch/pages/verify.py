@@ -32,17 +32,19 @@ token = st.query_params.get("token")
 
 
 def _request_metadata() -> tuple[str | None, str | None]:
+    # st.context.headers is a read-only, case-insensitive mapping; read the two
+    # headers from it directly instead of copying every header into a dict.
     try:
-        headers = dict(st.context.headers)
+        headers = st.context.headers
+        forwarded_for = headers.get("x-forwarded-for")
+        user_agent = headers.get("user-agent")
     except Exception:
         return None, None
 
-    forwarded_for = headers.get("x-forwarded-for") or headers.get("X-Forwarded-For")
     ip_address = None
     if forwarded_for:
-        ip_address = forwarded_for.split(",")[0].strip()
+        ip_address = forwarded_for.split(",", 1)[0].strip()
 
-    user_agent = headers.get("user-agent") or headers.get("User-Agent")
     return ip_address, user_agent
 
 
@@ -0,0 +1,87 @@
+"""Thread-safe request pacing for external APIs (Gemini, Resend)."""
+
+import threading
+from time import monotonic, sleep
+
+
+class RateLimiter:
+    """Space calls evenly so that at most *rate* start within any *per* seconds.
+
+    Each :meth:`acquire` reserves the next free slot under a lock and then
+    sleeps (outside the lock) until that slot arrives, so concurrent workers
+    queue up behind each other instead of bursting into the provider's limit.
+    """
+
+    def __init__(self, rate: float, per: float = 1.0) -> None:
+        if rate <= 0 or per <= 0:
+            raise ValueError("rate and per must be positive")
+        self._interval = per / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may issue its request."""
+        with self._lock:
+            now = monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        wait = slot - now
+        if wait > 0:
+            sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Push every caller's next slot back to at least *seconds* from now.
+
+        Used for provider back-off: a rate-limit response delays all queued
+        and future requests, not just the retry of the call that saw it.
+        """
+        with self._lock:
+            self._next_slot = max(self._next_slot, monotonic() + seconds)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Cap on in-flight calls that adapts to provider throttling (AIMD).
+
+    Used as a context manager around each request. :meth:`record_throttle`
+    halves the cap after a rate-limit response; :meth:`record_success` grows
+    it back by one slot per *limit* successful calls, up to *max_limit*.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1) -> None:
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("need 1 <= min_limit <= max_limit")
+        self._max = max_limit
+        self._min = min_limit
+        self._limit = float(max_limit)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        return int(self._limit)
+
+    def __enter__(self) -> "AdaptiveConcurrencyLimiter":
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def record_success(self) -> None:
+        """Additive increase: one extra slot per window of successful calls."""
+        with self._cond:
+            before = int(self._limit)
+            self._limit = min(self._max, self._limit + 1 / self._limit)
+            if int(self._limit) > before:
+                self._cond.notify()
+
+    def record_throttle(self) -> None:
+        """Multiplicative decrease after a rate-limit response."""
+        with self._cond:
+            self._limit = max(self._min, self._limit / 2)
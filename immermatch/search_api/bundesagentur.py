@@ -15,7 +15,6 @@ API docs: https://jobsuche.api.bund.dev/
 from __future__ import annotations
 
 import html as html_mod
-import json
 import logging
 import re
 import time
@@ -24,6 +23,7 @@ from typing import Literal
 from urllib.parse import urlparse
 
 import httpx
+import orjson
 
 from ..location import location_search_variants
 from ..models import ApplyOption, JobListing
@@ -107,11 +107,16 @@ def _parse_location(arbeitsort: dict) -> str:
     return ", ".join(parts) if parts else "Germany"
 
 
+_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+_URL_SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://")
+
+
 def _clean_html(raw: str) -> str:
     """Strip HTML tags and decode entities, collapse whitespace."""
     text = html_mod.unescape(raw)
-    text = re.sub(r"<[^>]+>", " ", text)
-    return re.sub(r"\s+", " ", text).strip()
+    text = _TAG_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
 
 
 # ------------------------------------------------------------------
@@ -132,7 +137,7 @@ def _fetch_detail(client: httpx.Client, refnr: str) -> dict:
             if resp.status_code == 200:
                 match = _NG_STATE_RE.search(resp.text)
                 if match:
-                    state = json.loads(match.group(1))
+                    state = orjson.loads(match.group(1))
                     return state.get("jobdetail", {})  # type: ignore[no-any-return]
                 logger.debug("BA detail %s: ng-state not found in HTML", refnr)
                 return {}
@@ -241,7 +246,7 @@ def _parse_listing(item: dict, detail: dict | None = None) -> JobListing | None:
         if ext_url:
             if ext_url.startswith("//"):
                 ext_url = f"https:{ext_url}"
-            elif not re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", ext_url):
+            elif not _URL_SCHEME_RE.match(ext_url):
                 ext_url = f"https://{ext_url}"
             parsed_ext = urlparse(ext_url)
             if parsed_ext.scheme.lower() not in {"http", "https"}:
@@ -7,15 +7,17 @@ backward compatibility.
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import threading
+from collections import OrderedDict
 from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from google import genai
 from pydantic import ValidationError
 
-from ..llm import call_gemini, parse_json
+from ..llm import call_gemini, parse_json, parse_model
 from ..models import CandidateProfile, JobListing
 from .search_provider import (
     CombinedSearchProvider,
@@ -39,6 +41,21 @@ from .serpapi_provider import search_jobs  # noqa: F401
 logger = logging.getLogger(__name__)
 _MIN_JOBS_PER_PROVIDER = 30
 
+# Profiles of recently seen CVs, keyed by their whitespace-normalised text, so
+# a re-upload that only differs in layout (re-exported PDF, reflowed DOCX)
+# skips the profiling call.
+_PROFILE_MEMO_SIZE = 64
+_profile_memo: OrderedDict[str, CandidateProfile] = OrderedDict()
+_profile_memo_lock = threading.Lock()
+
+# Structured-output schema for profiling, generated once instead of per attempt.
+_PROFILE_SCHEMA = CandidateProfile.model_json_schema()
+
+
+def _cv_fingerprint(cv_text: str) -> str:
+    """Digest of *cv_text* that ignores whitespace and line-break differences."""
+    return hashlib.blake2b(" ".join(cv_text.split()).encode(), digest_size=16).hexdigest()
+
 
 def _provider_quota_source_key(provider: SearchProvider) -> str:
     """Return a stable source key for per-provider quota accounting."""
@@ -135,6 +152,15 @@ IMPORTANT RULES:
 Return ONLY a JSON array of 10 search query strings, no explanation."""
 
 
+def _remember_profile(fingerprint: str, profile: CandidateProfile) -> CandidateProfile:
+    """Store a copy of *profile* in the memo and return *profile*."""
+    with _profile_memo_lock:
+        _profile_memo[fingerprint] = profile.model_copy(deep=True)
+        if len(_profile_memo) > _PROFILE_MEMO_SIZE:
+            _profile_memo.popitem(last=False)
+    return profile
+
+
 def profile_candidate(client: genai.Client, cv_text: str) -> CandidateProfile:
     """
     Analyze CV text and extract a structured profile.
@@ -146,6 +172,13 @@ def profile_candidate(client: genai.Client, cv_text: str) -> CandidateProfile:
     Returns:
         Structured candidate profile
     """
+    fingerprint = _cv_fingerprint(cv_text)
+    with _profile_memo_lock:
+        memoised = _profile_memo.get(fingerprint)
+        if memoised is not None:
+            _profile_memo.move_to_end(fingerprint)
+            return memoised.model_copy(deep=True)
+
     prompt = f"{PROFILER_SYSTEM_PROMPT}\n\nExtract the profile from this CV:\n\n{cv_text}"
     recovery_suffix = """
 
@@ -163,16 +196,21 @@ IMPORTANT OUTPUT RULES:
         content = call_gemini(
             client,
             prompt,
+            temperature=0.3,
             max_tokens=8192,
             thinking_level="low",
-            response_schema=CandidateProfile.model_json_schema(),
+            response_schema=_PROFILE_SCHEMA,
         )
 
+        profile = parse_model(content, CandidateProfile)
+        if profile is not None:
+            return _remember_profile(fingerprint, profile)
+
         try:
             data = parse_json(content)
             if not isinstance(data, dict):
                 raise ValueError("Expected a JSON object for profile")
-            return CandidateProfile(**data)
+            return _remember_profile(fingerprint, CandidateProfile(**data))
         except (ValueError, ValidationError, TypeError) as exc:
             last_error = exc
             if attempt == 2:
@@ -211,8 +249,18 @@ def generate_search_queries(
         provider: Explicit provider; defaults to ``get_provider(location)``.
 
     Returns:
-        List of search query strings.
+        List of search query strings.  Empty when *num_queries* is not
+        positive; a single generic ``"remote <location>"`` query, without an
+        LLM call, when the profile carries nothing to build queries from.
     """
+    if num_queries <= 0:
+        return []
+    # Nothing to base queries on: skip the LLM round-trip but still search.
+    if not (
+        profile.roles or profile.skills or profile.domain_expertise or profile.work_history or profile.summary.strip()
+    ):
+        return [f"remote {location}".strip()]
+
     if provider is None:
         provider = get_provider(location)
 
@@ -252,6 +300,9 @@ def generate_search_queries(
     return _generate_search_queries_for_provider(client, profile, location, num_queries, provider)
 
 
+_QUERY_LIST_SCHEMA = {"type": "array", "items": {"type": "string"}}
+
+
 def _generate_search_queries_for_provider(
     client: genai.Client,
     profile: CandidateProfile,
@@ -279,14 +330,12 @@ def _generate_search_queries_for_provider(
         f"{prompt}\n\nIMPORTANT: Return ONLY a valid JSON array of strings with exactly {num_queries} queries."
     )
 
-    search_queries_schema = {"type": "array", "items": {"type": "string"}}
-
     for attempt in range(2):
         content = call_gemini(
             client,
             prompt if attempt == 0 else retry_prompt,
             max_tokens=8192,
-            response_schema=search_queries_schema,
+            response_schema=_QUERY_LIST_SCHEMA,
         )
         try:
             queries = parse_json(content)
@@ -343,7 +392,8 @@ def search_all_queries(
         if quota_sources and min_unique_jobs > 0:
             min_unique_jobs = max(min_unique_jobs, _MIN_JOBS_PER_PROVIDER * len(quota_sources))
 
-    all_jobs: dict[str, JobListing] = {}  # Use title+company+location as key for dedup
+    all_jobs: list[JobListing] = []
+    seen: set[str] = set()  # JobListing.cache_key (case-insensitive title|company|location)
     source_counts: dict[str, int] = {}
     lock = threading.Lock()
     completed = 0
@@ -368,9 +418,10 @@ def search_all_queries(
             batch_new: list[JobListing] = []
             with lock:
                 for job in jobs:
-                    key = f"{job.title}|{job.company_name}|{job.location}"
-                    if key not in all_jobs:
-                        all_jobs[key] = job
+                    key = job.cache_key
+                    if key not in seen:
+                        seen.add(key)
+                        all_jobs.append(job)
                         batch_new.append(job)
                         source = (job.source or "unknown").lower()
                         source_counts[source] = source_counts.get(source, 0) + 1
@@ -408,4 +459,4 @@ def search_all_queries(
                     _MIN_JOBS_PER_PROVIDER,
                 )
 
-    return list(all_jobs.values())
+    return all_jobs
@@ -135,7 +135,7 @@ class CombinedSearchProvider:
                 continue
 
             for job in jobs:
-                key = f"{job.title}|{job.company_name}|{job.location}"
+                key = job.cache_key
                 if key not in merged:
                     merged[key] = job
 
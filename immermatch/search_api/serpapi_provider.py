@@ -7,17 +7,25 @@ be swapped in alongside other providers (e.g. Bundesagentur für Arbeit).
 
 from __future__ import annotations
 
+import logging
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, lru_cache
 from pathlib import Path
 from typing import Literal
 from urllib.parse import urlparse
 
-from serpapi import GoogleSearch
+import httpx
 
 from ..location import CITY_LOCALISE, COUNTRY_LOCALISE, location_search_variants, normalize_location
 from ..models import ApplyOption, JobListing
 
+logger = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------------
 # Blocked portal list (loaded from external file)
 # ---------------------------------------------------------------------------
@@ -53,11 +61,38 @@ _TRUSTED_PORTALS: set[str] = {
     "ashby",
 }
 
+
+def _portal_index(tokens: set[str]) -> tuple[frozenset[str], frozenset[str]]:
+    """Split portal tokens into bare labels (``"indeed"``) and dotted domains (``"jobs.example.com"``)."""
+    cleaned = {token.strip().lower().lstrip(".") for token in tokens} - {""}
+    return (
+        frozenset(token for token in cleaned if "." not in token),
+        frozenset(token for token in cleaned if "." in token),
+    )
+
+
+def _matches_portal(domain: str, index: tuple[frozenset[str], frozenset[str]]) -> bool:
+    """Return True when *domain* has a label in the index or ends with one of its dotted domains.
+
+    Set lookups over the domain's few labels and suffixes replace a scan over
+    every portal token.
+    """
+    labels, dotted = index
+    parts = domain.split(".")
+    if not labels.isdisjoint(parts):
+        return True
+    return bool(dotted) and any(".".join(parts[i:]) in dotted for i in range(len(parts)))
+
+
+_BLOCKED_INDEX = _portal_index(BLOCKED_PORTALS)
+_TRUSTED_INDEX = _portal_index(_TRUSTED_PORTALS)
+
 # ---------------------------------------------------------------------------
 # Staleness filter
 # ---------------------------------------------------------------------------
 
 _STALE_THRESHOLD_DAYS = 14
+_DAYS_AGO_RE = re.compile(r"(\d+)\+?\s*days?\s*ago")
 
 
 def _is_stale(posted_at: str) -> bool:
@@ -65,7 +100,7 @@ def _is_stale(posted_at: str) -> bool:
     if not posted_at:
         return False
     lower = posted_at.lower().strip()
-    match = re.match(r"(\d+)\+?\s*days?\s*ago", lower)
+    match = _DAYS_AGO_RE.match(lower)
     if match and int(match.group(1)) > _STALE_THRESHOLD_DAYS:
         return True
     return "month" in lower or "year" in lower
@@ -183,14 +218,27 @@ GL_CODES: dict[str, str] = {
 # ---------------------------------------------------------------------------
 
 _REMOTE_TOKENS = {"remote", "worldwide", "global", "anywhere", "weltweit"}
+_NON_WORD_RE = re.compile(r"[^\w]")
 
 
 def is_remote_only(location: str) -> bool:
     """Return True when the location string contains ONLY remote-like tokens."""
-    words = {re.sub(r"[^\w]", "", w).lower() for w in location.split() if w.strip()}
+    words = {_NON_WORD_RE.sub("", w).lower() for w in location.split() if w.strip()}
     return bool(words) and words <= _REMOTE_TOKENS
 
 
+# Whole-word match on any known country/city name (longest first, so
+# "united kingdom" wins over "uk"); plain substrings would read "Ukraine" as "uk".
+# When several names appear, the leftmost decides: the place a user types
+# first is their main target, whereas GL_CODES order (countries before
+# cities) was never meant as a priority.
+_GL_NAMES_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(name) for name in sorted(GL_CODES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=512)
 def infer_gl(location: str) -> str | None:
     """Infer a Google gl= country code from a free-form location string.
 
@@ -201,11 +249,8 @@ def infer_gl(location: str) -> str | None:
     """
     if is_remote_only(location):
         return None
-    loc_lower = location.lower()
-    for name, code in GL_CODES.items():
-        if name in loc_lower:
-            return code
-    return "de"
+    match = _GL_NAMES_RE.search(location)
+    return GL_CODES[match.group(0).lower()] if match else "de"
 
 
 # ---------------------------------------------------------------------------
@@ -224,6 +269,7 @@ _COUNTRY_LOCALISE_PATTERN = re.compile(
 )
 
 
+@lru_cache(maxsize=512)
 def localise_query(query: str) -> str:
     """Replace English city and country names with their local equivalents."""
     query = _LOCALISE_PATTERN.sub(lambda m: CITY_LOCALISE[m.group(0).lower()], query)
@@ -253,14 +299,6 @@ def parse_job_results(results: dict) -> list[JobListing]:
             return netloc[4:]
         return netloc
 
-    def _domain_matches(domain: str, token: str) -> bool:
-        token = token.strip().lower().lstrip(".")
-        if not domain or not token:
-            return False
-        if "." in token:
-            return domain == token or domain.endswith(f".{token}")
-        return token in domain.split(".")
-
     for job_data in results.get("jobs_results", []):
         posted_at = job_data.get("detected_extensions", {}).get("posted_at", "")
         if _is_stale(posted_at):
@@ -286,10 +324,10 @@ def parse_job_results(results: dict) -> list[JobListing]:
             domain = _extract_domain(normalized_link)
             if not domain:
                 continue
-            if any(_domain_matches(domain, blocked) for blocked in BLOCKED_PORTALS):
+            if _matches_portal(domain, _BLOCKED_INDEX):
                 continue
             apply_options.append(ApplyOption(source=option["title"], url=normalized_link))
-            if any(_domain_matches(domain, trusted) for trusted in _TRUSTED_PORTALS):
+            if _matches_portal(domain, _TRUSTED_INDEX):
                 has_trusted = True
             source_lower = option["title"].lower()
             if "career" in source_lower or "company" in source_lower:
@@ -323,6 +361,78 @@ def parse_job_results(results: dict) -> list[JobListing]:
 # ---------------------------------------------------------------------------
 
 
+_SERPAPI_URL = "https://serpapi.com/search.json"
+
+# Retry settings for transient SerpApi failures (5xx, dropped connections).
+# Quota errors (429) are not retried: they come back as an "error" payload.
+_MAX_RETRIES = 3
+_BASE_DELAY = 0.5  # seconds
+_RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+@cache
+def _http_client() -> httpx.Client:
+    """Shared keep-alive HTTP/2 pool for SerpApi requests from all worker threads."""
+    return httpx.Client(
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    )
+
+
+# Result pages are cached in-process for a few hours: listings change slowly
+# and the same queries recur across sessions on one server.
+_PAGE_CACHE_SIZE = 256
+_PAGE_CACHE_TTL = 6 * 3600  # seconds
+_page_cache: OrderedDict[tuple[tuple[str, str], ...], tuple[float, dict]] = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+
+def _get_with_retry(params: dict[str, str]) -> dict:
+    """GET one SerpApi page, retrying transient server and network errors.
+
+    Raises ``RuntimeError`` (chained from the last failure) once every
+    attempt has failed.
+    """
+    last_error: Exception | None = None
+    for attempt in range(_MAX_RETRIES):
+        try:
+            resp = _http_client().get(_SERPAPI_URL, params=params)
+        except httpx.TransportError as exc:
+            last_error = exc
+            failure = f"network error: {exc}"
+        else:
+            if resp.status_code not in _RETRY_STATUSES:
+                return resp.json()
+            last_error = None
+            failure = f"HTTP {resp.status_code}"
+        if attempt < _MAX_RETRIES - 1:
+            delay = _BASE_DELAY * (2**attempt)
+            logger.warning("SerpApi %s (attempt %d/%d), retry in %ss", failure, attempt + 1, _MAX_RETRIES, delay)
+            time.sleep(delay)
+    logger.error("SerpApi failed after %d attempts: %s", _MAX_RETRIES, failure)
+    raise RuntimeError(f"SerpApi failed after {_MAX_RETRIES} attempts: {failure}") from last_error
+
+
+def _fetch_page(params: dict[str, str]) -> dict:
+    """Return SerpApi results for *params*, served from the page cache when fresh."""
+    key = tuple(sorted((k, v) for k, v in params.items() if k != "api_key"))
+    with _page_cache_lock:
+        entry = _page_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= _PAGE_CACHE_TTL:
+            _page_cache.move_to_end(key)
+            return entry[1]
+
+    results = _get_with_retry(params)
+    if "error" not in results:
+        with _page_cache_lock:
+            _page_cache[key] = (time.monotonic(), results)
+            _page_cache.move_to_end(key)
+            if len(_page_cache) > _PAGE_CACHE_SIZE:
+                _page_cache.popitem(last=False)
+    return results
+
+
 def search_jobs(
     query: str,
     num_results: int = 10,
@@ -352,8 +462,7 @@ def search_jobs(
         if next_page_token:
             params["next_page_token"] = next_page_token
 
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = _fetch_page(params)
 
         page_jobs = parse_job_results(results)
         if not page_jobs:
@@ -374,6 +483,9 @@ def search_jobs(
 # ---------------------------------------------------------------------------
 
 
+_MAX_VARIANT_WORKERS = 4
+
+
 class SerpApiProvider:
     """Google Jobs search via SerpApi.
 
@@ -394,14 +506,24 @@ class SerpApiProvider:
         variants = location_search_variants(location)
         per_variant = (max_results + len(variants) - 1) // len(variants)
 
-        seen: set[str] = set()
-        all_jobs: list[JobListing] = []
-
-        for variant in variants:
+        def _search_variant(variant: str) -> list[JobListing]:
             remote = is_remote_only(variant)
             gl = infer_gl(variant)
             serpapi_location: str | None = None if remote else variant or None
-            jobs = search_jobs(localised_query, num_results=per_variant, gl=gl, location=serpapi_location)
+            return search_jobs(localised_query, num_results=per_variant, gl=gl, location=serpapi_location)
+
+        # Variants are independent SerpApi round-trips; run them concurrently
+        # and merge in variant order so results stay deterministic.
+        if len(variants) > 1:
+            with ThreadPoolExecutor(max_workers=min(_MAX_VARIANT_WORKERS, len(variants))) as executor:
+                variant_results = list(executor.map(_search_variant, variants))
+        else:
+            variant_results = [_search_variant(variant) for variant in variants]
+
+        seen: set[str] = set()
+        all_jobs: list[JobListing] = []
+
+        for jobs in variant_results:
             for job in jobs:
                 dedup_key = f"{job.title}|{job.company_name}|{normalize_location(job.location)}"
                 if dedup_key not in seen:
@@ -1,6 +1,7 @@
 """Shared pytest fixtures for Immermatch tests."""
 
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -17,6 +18,20 @@ from immermatch.models import (
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
 
+@pytest.fixture(autouse=True)
+def _clear_profile_memo():
+    """Each test mocks its own profiling responses; don't reuse earlier profiles."""
+    with patch.dict("immermatch.search_api.search_agent._profile_memo", clear=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _clear_response_cache():
+    """Low-temperature Gemini replies are cached in-process; keep tests independent."""
+    with patch.dict("immermatch.llm._response_cache", clear=True):
+        yield
+
+
 @pytest.fixture()
 def fixtures_dir() -> Path:
     return FIXTURES_DIR
@@ -5,8 +5,8 @@ from pathlib import Path
 import pytest
 from freezegun import freeze_time
 
-from immermatch.cache import ResultCache, _hash
-from immermatch.models import CandidateProfile, EvaluatedJob, JobEvaluation, JobListing
+from immermatch.cache import ResultCache, _hash, cv_hash
+from immermatch.models import ApplyOption, CandidateProfile, EvaluatedJob, JobEvaluation, JobListing
 
 
 @pytest.fixture()
@@ -44,6 +44,11 @@ class TestProfileCache:
         cache.save_profile("cv version 1", profile)
         assert cache.load_profile("cv version 2") is None
 
+    def test_precomputed_text_hash(self, cache: ResultCache, profile: CandidateProfile):
+        cache.save_profile("cv text", profile, text_hash=cv_hash("cv text"))
+        assert cache.load_profile("cv text") == profile
+        assert cache.load_profile("ignored", text_hash=cv_hash("cv text")) == profile
+
     def test_miss_when_empty(self, cache: ResultCache):
         assert cache.load_profile("anything") is None
 
@@ -85,6 +90,20 @@ class TestJobsCache:
         assert len(loaded) == 1
         assert loaded[0].title == "Dev"
 
+    @freeze_time("2026-02-20")
+    def test_round_trip_keeps_nested_apply_options(self, cache: ResultCache):
+        job = JobListing(
+            title="Dev",
+            company_name="Corp",
+            location="Berlin",
+            apply_options=[ApplyOption(source="LinkedIn", url="https://linkedin.com/jobs/1")],
+        )
+        cache.save_jobs([job], "Berlin")
+        loaded = cache.load_jobs("Berlin")
+        assert loaded is not None
+        assert loaded[0].apply_options[0].url == "https://linkedin.com/jobs/1"
+        assert loaded[0] == job
+
     @freeze_time("2026-02-20")
     def test_miss_next_day(self, cache: ResultCache):
         jobs = [JobListing(title="Dev", company_name="Corp", location="Berlin")]
@@ -177,18 +196,41 @@ class TestEvaluationsCache:
         assert "PM|Corp|Munich" in loaded
         assert "Dev|Corp|Berlin" not in loaded
 
+    def test_incremental_save_keeps_existing_entries(self, cache: ResultCache, profile: CandidateProfile):
+        job1 = JobListing(title="Dev", company_name="Corp", location="Berlin")
+        job2 = JobListing(title="PM", company_name="Corp", location="Berlin")
+        ev = JobEvaluation(score=80, reasoning="Good.")
+        first = {"Dev|Corp|Berlin": EvaluatedJob(job=job1, evaluation=ev)}
+        cache.save_evaluations(profile, first, "Berlin")
+        entry = cache.cache_dir / "evaluations" / f"{_hash('Dev|Corp|Berlin')}.json"
+        mtime = entry.stat().st_mtime_ns
+
+        cache.save_evaluations(profile, {**first, "PM|Corp|Berlin": EvaluatedJob(job=job2, evaluation=ev)}, "Berlin")
+
+        assert entry.stat().st_mtime_ns == mtime
+        assert set(cache.load_evaluations(profile, "Berlin")) == {"Dev|Corp|Berlin", "PM|Corp|Berlin"}
+
+    def test_skips_malformed_entry(self, cache: ResultCache, profile: CandidateProfile):
+        job = JobListing(title="Dev", company_name="Corp", location="Berlin")
+        ev = JobEvaluation(score=80, reasoning="Good.")
+        cache.save_evaluations(profile, {"Dev|Corp|Berlin": EvaluatedJob(job=job, evaluation=ev)}, "Berlin")
+        (cache.cache_dir / "evaluations" / "broken.json").write_text("{not json")
+
+        loaded = cache.load_evaluations(profile, "Berlin")
+        assert list(loaded) == ["Dev|Corp|Berlin"]
+
 
 class TestGetUnevaluatedJobs:
     def test_filters_already_evaluated(self, cache: ResultCache, profile: CandidateProfile):
         job1 = JobListing(title="Dev", company_name="Corp", location="Berlin")
         job2 = JobListing(title="PM", company_name="Corp", location="Berlin")
         ev = JobEvaluation(score=80, reasoning="Good.")
-        cache.save_evaluations(profile, {"Dev|Corp|Berlin": EvaluatedJob(job=job1, evaluation=ev)}, "Berlin")
+        cache.save_evaluations(profile, {job1.cache_key: EvaluatedJob(job=job1, evaluation=ev)}, "Berlin")
 
         new_jobs, cached = cache.get_unevaluated_jobs([job1, job2], profile, "Berlin")
         assert len(new_jobs) == 1
         assert new_jobs[0].title == "PM"
-        assert "Dev|Corp|Berlin" in cached
+        assert job1.cache_key in cached
 
     def test_location_scoped(self, cache: ResultCache, profile: CandidateProfile):
         """Evaluations cached for Munich should not affect Berlin's unevaluated list."""
@@ -200,3 +242,21 @@ class TestGetUnevaluatedJobs:
         new_jobs, cached = cache.get_unevaluated_jobs([job_berlin], profile, "Berlin")
         assert len(new_jobs) == 1
         assert cached == {}
+
+
+class TestLoadAll:
+    def test_returns_all_cached_artifacts(self, cache: ResultCache, profile: CandidateProfile):
+        job = JobListing(title="Dev", company_name="Corp", location="Berlin")
+        ev = JobEvaluation(score=80, reasoning="Good.")
+        cache.save_queries(profile, "Berlin", ["q1"], "ba")
+        cache.save_jobs([job], "Berlin")
+        cache.save_evaluations(profile, {"Dev|Corp|Berlin": EvaluatedJob(job=job, evaluation=ev)}, "Berlin")
+
+        queries, jobs, evaluations = cache.load_all(profile, "Berlin", "ba")
+        assert queries == ["q1"]
+        assert jobs is not None
+        assert [j.title for j in jobs] == ["Dev"]
+        assert list(evaluations) == ["Dev|Corp|Berlin"]
+
+    def test_empty_cache(self, cache: ResultCache, profile: CandidateProfile):
+        assert cache.load_all(profile, "Berlin") == (None, None, {})
@@ -1,9 +1,11 @@
 """Tests for immermatch.cv_parser — text extraction and cleaning."""
 
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 import pytest
 
+from immermatch import cv_parser
 from immermatch.cv_parser import _clean_text, extract_text
 
 
@@ -47,3 +49,24 @@ class TestExtractText:
         p.write_text("")
         with pytest.raises(ValueError, match="No text could be extracted"):
             extract_text(p)
+
+    def test_max_chars_truncates(self, fixtures_dir: Path):
+        text = extract_text(fixtures_dir / "sample.txt", max_chars=20)
+        assert len(text) == 20
+        assert text == extract_text(fixtures_dir / "sample.txt")[:20]
+
+    @patch("immermatch.cv_parser.pdfplumber.open")
+    def test_pdf_stops_at_budget_and_cleans_once(self, mock_open: MagicMock, tmp_path: Path):
+        p = tmp_path / "cv.pdf"
+        p.write_bytes(b"%PDF-")
+        pages = [MagicMock(), MagicMock(), MagicMock()]
+        pages[0].extract_text.return_value = "  Page one  \n"
+        pages[1].extract_text.return_value = "Page two"
+        mock_open.return_value.__enter__.return_value.pages = pages
+
+        with patch("immermatch.cv_parser._clean_text", wraps=cv_parser._clean_text) as mock_clean:
+            text = extract_text(p, max_chars=15)
+
+        assert text == "Page one\n\nPage "
+        pages[2].extract_text.assert_not_called()
+        mock_clean.assert_called_once()
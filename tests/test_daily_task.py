@@ -6,6 +6,8 @@ DB, SerpApi search, Gemini evaluation, and Resend emailer.
 
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from immermatch.models import (
     ApplyOption,
     EvaluatedJob,
@@ -66,6 +68,11 @@ def _make_job_listing(
     )
 
 
+def _nothing_sent(_db: object, _sub_id: str, candidate_job_ids: list[str]) -> list[str]:
+    """Fake get_unsent_job_ids where no candidate was sent before."""
+    return list(candidate_job_ids)
+
+
 def _make_evaluated_job(job: JobListing, score: int = 85) -> EvaluatedJob:
     return EvaluatedJob(
         job=job,
@@ -147,11 +154,10 @@ class TestDailyTaskQueryAggregation:
     """Queries from multiple subscribers for the same location are deduped."""
 
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs", return_value=[])
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls", return_value={})
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids", return_value={})
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
     @patch(f"{_PATCH_PREFIX}.purge_inactive_subscribers", return_value=0)
@@ -166,9 +172,8 @@ class TestDailyTaskQueryAggregation:
         _mock_purge: MagicMock,
         mock_subs: MagicMock,
         mock_search: MagicMock,
-        _mock_upsert: MagicMock,
         _mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         _mock_eval: MagicMock,
         _mock_log: MagicMock,
         _mock_email: MagicMock,
@@ -197,10 +202,9 @@ class TestDailyTaskFullPipeline:
     @patch(f"{_PATCH_PREFIX}.issue_unsubscribe_token", return_value=True)
     @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -217,9 +221,8 @@ class TestDailyTaskFullPipeline:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        mock_sent_ids: MagicMock,
+        mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
         mock_mark_last_sent: MagicMock,
@@ -258,10 +261,9 @@ class TestDailyTaskFullPipeline:
     @patch(f"{_PATCH_PREFIX}.issue_unsubscribe_token", return_value=True)
     @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -278,9 +280,8 @@ class TestDailyTaskFullPipeline:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        mock_sent_ids: MagicMock,
+        mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
         _mock_mark_last_sent: MagicMock,
@@ -305,9 +306,9 @@ class TestDailyTaskFullPipeline:
 
         main()
 
-        # log_sent_jobs should include BOTH job IDs (even the low-score one)
+        # log_sent_jobs_bulk should include BOTH job IDs (even the low-score one)
         mock_log.assert_called_once()
-        logged_ids = mock_log.call_args[0][2]  # third positional arg = job_ids list
+        logged_ids = [jid for _, jid in mock_log.call_args[0][1]]  # (subscriber_id, job_id) pairs
         assert set(logged_ids) == {"db-1", "db-2"}
 
 
@@ -316,10 +317,9 @@ class TestDailyTaskNoNewJobs:
 
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids")
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids")
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
     @patch(f"{_PATCH_PREFIX}.purge_inactive_subscribers", return_value=0)
@@ -334,9 +334,8 @@ class TestDailyTaskNoNewJobs:
         _mock_purge: MagicMock,
         mock_subs: MagicMock,
         mock_search: MagicMock,
-        mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        mock_sent_ids: MagicMock,
+        mock_unsent_ids: MagicMock,
         _mock_log: MagicMock,
         mock_eval: MagicMock,
         mock_email: MagicMock,
@@ -348,7 +347,7 @@ class TestDailyTaskNoNewJobs:
         mock_search.return_value = [job]
         mock_job_ids.return_value = {"https://example.com/j1": "db-1"}
         # All jobs already sent
-        mock_sent_ids.return_value = {"db-1"}
+        mock_unsent_ids.return_value = []
 
         main()
 
@@ -360,10 +359,9 @@ class TestDailyTaskNoGoodMatches:
     """When all evaluated jobs score below min_score, log but don't email."""
 
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -380,9 +378,8 @@ class TestDailyTaskNoGoodMatches:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
     ) -> None:
@@ -401,10 +398,9 @@ class TestDailyTaskNoGoodMatches:
         mock_log.assert_called_once()
 
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -421,9 +417,8 @@ class TestDailyTaskNoGoodMatches:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        _mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
     ) -> None:
@@ -447,10 +442,9 @@ class TestDailyTaskWeeklyCadence:
     @patch.dict("os.environ", {"APP_URL": "https://app.example.com"}, clear=False)
     @patch(f"{_PATCH_PREFIX}.issue_unsubscribe_token", return_value=True)
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -467,9 +461,8 @@ class TestDailyTaskWeeklyCadence:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        mock_unsent_ids: MagicMock,
         _mock_log: MagicMock,
         mock_email: MagicMock,
         mock_unsub_token: MagicMock,
@@ -493,6 +486,8 @@ class TestDailyTaskWeeklyCadence:
 
         # Email should NOT be sent because weekly cadence was recently sent
         mock_email.assert_not_called()
+        # ...and its sent log is not even fetched
+        mock_unsent_ids.assert_not_called()
 
 
 class TestDailyTaskSendLogIntegrity:
@@ -502,10 +497,9 @@ class TestDailyTaskSendLogIntegrity:
     @patch(f"{_PATCH_PREFIX}.issue_unsubscribe_token", return_value=True)
     @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
     @patch(f"{_PATCH_PREFIX}.send_daily_digest", side_effect=RuntimeError("SMTP down"))
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -522,9 +516,8 @@ class TestDailyTaskSendLogIntegrity:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        _mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
         mock_mark_last_sent: MagicMock,
@@ -553,19 +546,73 @@ class TestDailyTaskSendLogIntegrity:
         mock_email.assert_called_once()
         # Only low-score job logged
         mock_log.assert_called_once()
-        logged_ids = mock_log.call_args[0][2]
+        logged_ids = [jid for _, jid in mock_log.call_args[0][1]]
         assert logged_ids == ["db-bad"]
         # mark_subscriber_last_sent NOT called
         mock_mark_last_sent.assert_not_called()
 
+    @patch.dict("os.environ", {"APP_URL": ""}, clear=False)
+    @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
+    @patch(f"{_PATCH_PREFIX}.send_daily_digest")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
+    @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
+    @patch(f"{_PATCH_PREFIX}.search_all_queries")
+    @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
+    @patch(f"{_PATCH_PREFIX}.purge_inactive_subscribers", return_value=0)
+    @patch(f"{_PATCH_PREFIX}.expire_subscriptions", return_value=0)
+    @patch(f"{_PATCH_PREFIX}.create_client", return_value=MagicMock())
+    @patch(f"{_PATCH_PREFIX}.get_db", return_value=MagicMock())
+    def test_failed_send_does_not_affect_other_digests(
+        self,
+        _mock_db: MagicMock,
+        _mock_client: MagicMock,
+        _mock_expire: MagicMock,
+        _mock_purge: MagicMock,
+        mock_subs: MagicMock,
+        mock_search: MagicMock,
+        mock_eval: MagicMock,
+        mock_job_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
+        mock_log: MagicMock,
+        mock_email: MagicMock,
+        mock_mark_last_sent: MagicMock,
+    ) -> None:
+        """Queued digests are sent together; one failure only affects its own subscriber."""
+        from daily_task import main
+
+        good_job = _make_job_listing("Python Dev", "Corp", "https://example.com/good")
+
+        mock_subs.return_value = [
+            _make_subscriber(sub_id="sub-ok", email="ok@example.com"),
+            _make_subscriber(sub_id="sub-fail", email="fail@example.com"),
+        ]
+        mock_search.return_value = [good_job]
+        mock_eval.return_value = [_make_evaluated_job(good_job, score=90)]
+        mock_job_ids.return_value = {"https://example.com/good": "db-good"}
+
+        def fake_send(email: str, *_args: object, **_kwargs: object) -> dict:
+            if email == "fail@example.com":
+                raise RuntimeError("Resend down")
+            return {"id": "msg-1"}
+
+        mock_email.side_effect = fake_send
+
+        main()
+
+        assert mock_email.call_count == 2
+        mock_mark_last_sent.assert_called_once()
+        assert mock_mark_last_sent.call_args[0][1] == "sub-ok"
+        assert mock_log.call_args[0][1] == [("sub-ok", "db-good")]
+
     @patch.dict("os.environ", {"APP_URL": "https://app.example.com"}, clear=False)
     @patch(f"{_PATCH_PREFIX}.issue_unsubscribe_token", return_value=True)
     @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -582,9 +629,8 @@ class TestDailyTaskSendLogIntegrity:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        _mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
         mock_mark_last_sent: MagicMock,
@@ -611,7 +657,7 @@ class TestDailyTaskSendLogIntegrity:
 
         mock_email.assert_called_once()
         mock_log.assert_called_once()
-        logged_ids = mock_log.call_args[0][2]
+        logged_ids = [jid for _, jid in mock_log.call_args[0][1]]
         assert set(logged_ids) == {"db-good", "db-bad"}
         mock_mark_last_sent.assert_called_once()
 
@@ -619,10 +665,9 @@ class TestDailyTaskSendLogIntegrity:
     @patch(f"{_PATCH_PREFIX}.issue_unsubscribe_token", return_value=True)
     @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
     @patch(f"{_PATCH_PREFIX}.send_daily_digest", side_effect=[RuntimeError("fail"), None])
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids")
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids")
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -639,9 +684,8 @@ class TestDailyTaskSendLogIntegrity:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        _mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        mock_sent_ids: MagicMock,
+        mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
         mock_mark_last_sent: MagicMock,
@@ -665,21 +709,22 @@ class TestDailyTaskSendLogIntegrity:
         }
 
         # Run 1: send fails — only low-score logged
-        mock_sent_ids.return_value = set()
+        mock_unsent_ids.side_effect = _nothing_sent
         main()
         assert mock_log.call_count == 1
-        assert mock_log.call_args[0][2] == ["db-2"]  # only low-score
+        assert mock_log.call_args[0][1] == [("sub-001", "db-2")]  # only low-score
         mock_mark_last_sent.assert_not_called()
 
-        # Run 2: good match retries (low-score already in sent_ids)
+        # Run 2: good match retries (low-score already in the sent log)
         mock_log.reset_mock()
         mock_mark_last_sent.reset_mock()
-        mock_sent_ids.return_value = {"db-2"}  # low-score now in sent log
+        mock_unsent_ids.side_effect = None
+        mock_unsent_ids.return_value = ["db-1"]  # low-score db-2 now in sent log
         # Only the good job is unseen, so evaluate returns only it
         mock_eval.return_value = [_make_evaluated_job(job, score=90)]
         main()
         assert mock_log.call_count == 1
-        assert mock_log.call_args[0][2] == ["db-1"]  # good match now logged
+        assert mock_log.call_args[0][1] == [("sub-001", "db-1")]  # good match now logged
         mock_mark_last_sent.assert_called_once()
 
 
@@ -689,10 +734,9 @@ class TestDailyTaskLocationRelevance:
     @patch.dict("os.environ", {"APP_URL": ""}, clear=False)
     @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -709,9 +753,8 @@ class TestDailyTaskLocationRelevance:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        _mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         mock_log: MagicMock,
         mock_email: MagicMock,
         _mock_mark_last_sent: MagicMock,
@@ -765,10 +808,9 @@ class TestDailyTaskLocationRelevance:
     @patch.dict("os.environ", {"APP_URL": ""}, clear=False)
     @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
@@ -785,9 +827,8 @@ class TestDailyTaskLocationRelevance:
         mock_subs: MagicMock,
         mock_search: MagicMock,
         mock_eval: MagicMock,
-        _mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         _mock_log: MagicMock,
         _mock_email: MagicMock,
         _mock_mark_last_sent: MagicMock,
@@ -817,10 +858,9 @@ class TestDailyTaskNoProfileJson:
 
     @patch(f"{_PATCH_PREFIX}.send_daily_digest")
     @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
-    @patch(f"{_PATCH_PREFIX}.log_sent_jobs")
-    @patch(f"{_PATCH_PREFIX}.get_sent_job_ids", return_value=set())
-    @patch(f"{_PATCH_PREFIX}.get_job_ids_by_urls")
-    @patch(f"{_PATCH_PREFIX}.upsert_jobs")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
     @patch(f"{_PATCH_PREFIX}.search_all_queries")
     @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
     @patch(f"{_PATCH_PREFIX}.purge_inactive_subscribers", return_value=0)
@@ -835,9 +875,8 @@ class TestDailyTaskNoProfileJson:
         _mock_purge: MagicMock,
         mock_subs: MagicMock,
         mock_search: MagicMock,
-        mock_upsert: MagicMock,
         mock_job_ids: MagicMock,
-        _mock_sent_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
         _mock_log: MagicMock,
         mock_eval: MagicMock,
         mock_email: MagicMock,
@@ -854,3 +893,98 @@ class TestDailyTaskNoProfileJson:
 
         mock_eval.assert_not_called()
         mock_email.assert_not_called()
+
+
+class TestDailyTaskPartialFailure:
+    """A failure mid-run must not hold back digests that were already built."""
+
+    @patch(f"{_PATCH_PREFIX}.mark_subscriber_last_sent")
+    @patch(f"{_PATCH_PREFIX}.send_daily_digest")
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    @patch(f"{_PATCH_PREFIX}.get_unsent_job_ids", side_effect=_nothing_sent)
+    @patch(f"{_PATCH_PREFIX}.upsert_jobs_with_ids")
+    @patch(f"{_PATCH_PREFIX}.evaluate_all_jobs")
+    @patch(f"{_PATCH_PREFIX}.search_all_queries")
+    @patch(f"{_PATCH_PREFIX}.get_active_subscribers_with_profiles")
+    @patch(f"{_PATCH_PREFIX}.purge_inactive_subscribers", return_value=0)
+    @patch(f"{_PATCH_PREFIX}.expire_subscriptions", return_value=0)
+    @patch(f"{_PATCH_PREFIX}.create_client", return_value=MagicMock())
+    @patch(f"{_PATCH_PREFIX}.get_db", return_value=MagicMock())
+    def test_earlier_digests_sent_when_later_evaluation_raises(
+        self,
+        _mock_db: MagicMock,
+        _mock_client: MagicMock,
+        _mock_expire: MagicMock,
+        _mock_purge: MagicMock,
+        mock_subs: MagicMock,
+        mock_search: MagicMock,
+        mock_eval: MagicMock,
+        mock_job_ids: MagicMock,
+        _mock_unsent_ids: MagicMock,
+        mock_log: MagicMock,
+        mock_email: MagicMock,
+        mock_mark_last_sent: MagicMock,
+    ) -> None:
+        from daily_task import main
+
+        job = _make_job_listing()
+        mock_subs.return_value = [
+            _make_subscriber(sub_id="sub-001", email="first@example.com"),
+            _make_subscriber(sub_id="sub-002", email="second@example.com"),
+            _make_subscriber(sub_id="sub-003", email="third@example.com"),
+        ]
+        mock_search.return_value = [job]
+        mock_job_ids.return_value = {"https://example.com/job/1": "db-1"}
+        mock_eval.side_effect = [[_make_evaluated_job(job, score=90)], RuntimeError("Gemini down")]
+
+        with pytest.raises(RuntimeError, match="Gemini down"):
+            main()
+
+        mock_email.assert_called_once()
+        assert mock_email.call_args[0][0] == "first@example.com"
+        mock_mark_last_sent.assert_called_once_with(_mock_db.return_value, "sub-001")
+        assert mock_log.call_args[0][1] == [("sub-001", "db-1")]
+
+
+class TestSentLogFlush:
+    """job_sent_logs rows are written in bounded batches, not once per run."""
+
+    @patch(f"{_PATCH_PREFIX}._SENT_LOG_FLUSH_SUBSCRIBERS", 2)
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    def test_flushes_every_few_subscribers(self, mock_log: MagicMock) -> None:
+        from daily_task import _flush_sent_log, _record_sent
+
+        db = MagicMock()
+        pending: dict[str, list[str]] = {}
+        for i in range(5):
+            _record_sent(db, pending, f"sub-{i}", [f"job-{i}"])
+        _flush_sent_log(db, pending)
+
+        batches = [[sid for sid, _ in c.args[1]] for c in mock_log.call_args_list]
+        assert batches == [["sub-0", "sub-1"], ["sub-2", "sub-3"], ["sub-4"]]
+        assert pending == {}
+
+    @patch(f"{_PATCH_PREFIX}._SENT_LOG_FLUSH_ROWS", 3)
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    def test_flushes_when_row_limit_reached(self, mock_log: MagicMock) -> None:
+        from daily_task import _record_sent
+
+        pending: dict[str, list[str]] = {}
+        _record_sent(MagicMock(), pending, "sub-1", ["a", "b", "c"])
+
+        mock_log.assert_called_once()
+        assert pending == {}
+
+    @patch(f"{_PATCH_PREFIX}._SENT_LOG_FLUSH_SUBSCRIBERS", 1)
+    @patch(f"{_PATCH_PREFIX}.log_sent_jobs_bulk")
+    def test_failed_flush_only_affects_its_batch(self, mock_log: MagicMock) -> None:
+        from daily_task import _record_sent
+
+        mock_log.side_effect = [RuntimeError("db down"), None]
+        pending: dict[str, list[str]] = {}
+
+        _record_sent(MagicMock(), pending, "sub-1", ["a"])
+        _record_sent(MagicMock(), pending, "sub-2", ["b"])
+
+        assert mock_log.call_count == 2
+        assert mock_log.call_args.args[1] == [("sub-2", "b")]
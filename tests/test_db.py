@@ -3,8 +3,10 @@
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
 from freezegun import freeze_time
+from postgrest.exceptions import APIError
 
 from immermatch import db
 
@@ -35,6 +37,46 @@ TOKEN = "tok_confirm_abc123"
 UNSUB_TOKEN = "tok_unsub_xyz789"
 
 
+# ---------------------------------------------------------------------------
+# TestClientSingletons
+# ---------------------------------------------------------------------------
+
+
+class TestClientSingletons:
+    @pytest.fixture(autouse=True)
+    def _clear_client_cache(self):
+        db._cached_client.cache_clear()
+        yield
+        db._cached_client.cache_clear()
+
+    @patch.dict(
+        "os.environ",
+        {"SUPABASE_URL": "https://x.supabase.co", "SUPABASE_KEY": "anon", "SUPABASE_SERVICE_KEY": "service"},
+    )
+    @patch("immermatch.db.create_client")
+    def test_clients_are_reused_per_key(self, mock_create: MagicMock):
+        mock_create.side_effect = lambda url, key, options: MagicMock(name=key)
+
+        assert db.get_admin_client() is db.get_admin_client()
+        assert db.get_client() is db.get_client()
+        assert db.get_client() is not db.get_admin_client()
+        assert mock_create.call_count == 2
+        options = mock_create.call_args.kwargs["options"]
+        assert options.httpx_client is not None
+
+    @patch.dict("os.environ", {"SUPABASE_URL": "https://x.supabase.co", "SUPABASE_SERVICE_KEY": "service"})
+    @patch("immermatch.db.create_client")
+    def test_close_clients_closes_pools_and_resets_cache(self, mock_create: MagicMock):
+        mock_create.side_effect = lambda url, key, options: MagicMock()
+        first = db.get_admin_client()
+        http_client = mock_create.call_args.kwargs["options"].httpx_client
+
+        db.close_clients()
+
+        assert http_client.is_closed
+        assert db.get_admin_client() is not first
+
+
 # ---------------------------------------------------------------------------
 # TestDeleteSubscriberData
 # ---------------------------------------------------------------------------
@@ -133,55 +175,40 @@ class TestDeactivateSubscriber:
 
 
 class TestDeleteSubscriberByToken:
-    def _setup_select(self, client, rows):
-        """Wire the select→eq→execute chain for the initial token lookup."""
-        client.table.return_value.select.return_value.eq.return_value.execute.return_value = _make_execute(data=rows)
+    def _delete_chain(self, client):
+        """Return the delete→eq→or_ builder used by the guarded delete."""
+        return client.table.return_value.delete.return_value.eq.return_value.or_
+
+    def _setup_delete(self, client, rows):
+        self._delete_chain(client).return_value.execute.return_value = _make_execute(data=rows)
 
     def test_valid_token_hard_deletes_row(self):
         client = _mock_client()
-        expires = (datetime.now(timezone.utc) + timedelta(hours=12)).isoformat()
-        self._setup_select(client, [{"id": SUB_ID, "is_active": True, "unsubscribe_token_expires_at": expires}])
-        client.table.return_value.delete.return_value.eq.return_value.execute.return_value = _make_execute(
-            data=[{"id": SUB_ID}]
-        )
+        self._setup_delete(client, [{"id": SUB_ID}])
 
         result = db.delete_subscriber_by_token(client, UNSUB_TOKEN)
 
         assert result is True
-        client.table.return_value.delete.return_value.eq.assert_called_once_with("id", SUB_ID)
+        client.table.return_value.delete.return_value.eq.assert_called_once_with("unsubscribe_token", UNSUB_TOKEN)
+        client.table.return_value.select.assert_not_called()
 
-    def test_unknown_token_returns_false(self):
+    @freeze_time("2026-02-20T12:00:00Z")
+    def test_filters_expiry_server_side(self):
         client = _mock_client()
-        self._setup_select(client, [])
+        self._setup_delete(client, [{"id": SUB_ID}])
 
-        assert db.delete_subscriber_by_token(client, "nonexistent") is False
+        db.delete_subscriber_by_token(client, UNSUB_TOKEN)
 
-    def test_inactive_subscriber_with_valid_token_is_deleted(self):
-        client = _mock_client()
-        expires = (datetime.now(timezone.utc) + timedelta(hours=12)).isoformat()
-        self._setup_select(client, [{"id": SUB_ID, "is_active": False, "unsubscribe_token_expires_at": expires}])
-        client.table.return_value.delete.return_value.eq.return_value.execute.return_value = _make_execute(
-            data=[{"id": SUB_ID}]
+        self._delete_chain(client).assert_called_once_with(
+            "unsubscribe_token_expires_at.is.null,unsubscribe_token_expires_at.gt.2026-02-20T12:00:00+00:00"
         )
 
-        assert db.delete_subscriber_by_token(client, UNSUB_TOKEN) is True
-        client.table.return_value.delete.return_value.eq.assert_called_once_with("id", SUB_ID)
-
-    @freeze_time("2026-02-20T12:00:00Z")
-    def test_expired_token_returns_false(self):
+    def test_unknown_or_expired_token_returns_false(self):
         client = _mock_client()
-        expired = (datetime(2026, 2, 19, tzinfo=timezone.utc)).isoformat()
-        self._setup_select(client, [{"id": SUB_ID, "is_active": True, "unsubscribe_token_expires_at": expired}])
+        # Nothing matched the token + expiry filter
+        self._setup_delete(client, [])
 
-        assert db.delete_subscriber_by_token(client, UNSUB_TOKEN) is False
-
-    def test_delete_returns_false_on_empty_result(self):
-        client = _mock_client()
-        expires = (datetime.now(timezone.utc) + timedelta(hours=12)).isoformat()
-        self._setup_select(client, [{"id": SUB_ID, "is_active": True, "unsubscribe_token_expires_at": expires}])
-        client.table.return_value.delete.return_value.eq.return_value.execute.return_value = _make_execute(data=[])
-
-        assert db.delete_subscriber_by_token(client, UNSUB_TOKEN) is False
+        assert db.delete_subscriber_by_token(client, "nonexistent") is False
 
 
 # ---------------------------------------------------------------------------
@@ -195,29 +222,40 @@ class TestExpireSubscriptions:
         chain = client.table.return_value.select.return_value
         chain.eq.return_value.not_.is_.return_value.lte.return_value.execute.return_value = _make_execute(data=rows)
 
-    def _setup_recheck(self, client, data):
-        """Wire the per-subscriber re-check (select→eq→maybe_single→execute)."""
-        result = _make_execute(data=data)
-        client.table.return_value.select.return_value.eq.return_value.maybe_single.return_value.execute.return_value = (
-            result
-        )
+    def _expire_chain(self, client):
+        return client.table.return_value.update.return_value.in_.return_value.eq.return_value
+
+    def _setup_expire(self, client, rows=None, error=None):
+        """Wire the bulk deactivate + wipe (update→in_→eq→execute)."""
+        self._expire_chain(client).execute.return_value = _make_execute(data=rows, error=error)
 
-    @patch("immermatch.db.delete_subscriber_data")
-    @patch("immermatch.db.deactivate_subscriber", return_value=True)
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_expires_past_due_subscribers(self, mock_deactivate, mock_delete):
+    def test_expires_past_due_subscribers(self):
         client = _mock_client()
-        sub1 = {"id": "sub-1"}
-        sub2 = {"id": "sub-2"}
-        self._setup_expired_select(client, [sub1, sub2])
-        # Re-check returns active for both
-        self._setup_recheck(client, {"is_active": True})
+        self._setup_expired_select(client, [{"id": "sub-1"}, {"id": "sub-2"}])
+        self._setup_expire(client, [{"id": "sub-1"}, {"id": "sub-2"}])
 
         count = db.expire_subscriptions(client)
 
         assert count == 2
-        assert mock_deactivate.call_count == 2
-        assert mock_delete.call_count == 2
+        client.table.return_value.update.assert_called_once()
+        payload = client.table.return_value.update.call_args[0][0]
+        assert payload["is_active"] is False
+        assert payload["unsubscribed_at"] == "2026-02-20T12:00:00+00:00"
+        assert payload["unsubscribe_token"] is None
+        client.table.return_value.update.return_value.in_.return_value.eq.assert_called_once_with("is_active", True)
+
+    @freeze_time("2026-02-20T12:00:00Z")
+    def test_wipes_pii_in_same_update(self):
+        client = _mock_client()
+        self._setup_expired_select(client, [{"id": "sub-1"}])
+        self._setup_expire(client, [{"id": "sub-1"}])
+
+        db.expire_subscriptions(client)
+
+        payload = client.table.return_value.update.call_args[0][0]
+        for column in ("profile_json", "search_queries", "target_location", "min_score"):
+            assert payload[column] is None
 
     @freeze_time("2026-02-20T12:00:00Z")
     def test_no_expired_returns_zero(self):
@@ -225,47 +263,39 @@ class TestExpireSubscriptions:
         self._setup_expired_select(client, [])
 
         assert db.expire_subscriptions(client) == 0
+        client.table.return_value.update.assert_not_called()
 
-    @patch("immermatch.db.delete_subscriber_data")
-    @patch("immermatch.db.deactivate_subscriber")
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_skips_concurrently_deactivated(self, mock_deactivate, mock_delete):
+    def test_skips_concurrently_deactivated(self):
         client = _mock_client()
-        self._setup_expired_select(client, [{"id": "sub-1"}])
-        # Re-check returns inactive (already deactivated by another process)
-        self._setup_recheck(client, {"is_active": False})
-
-        count = db.expire_subscriptions(client)
+        self._setup_expired_select(client, [{"id": "sub-1"}, {"id": "sub-2"}])
+        # Only sub-1 was still active when the guarded update ran
+        self._setup_expire(client, [{"id": "sub-1"}])
 
-        assert count == 0
-        mock_deactivate.assert_not_called()
-        mock_delete.assert_not_called()
+        assert db.expire_subscriptions(client) == 1
 
-    @patch("immermatch.db.delete_subscriber_data")
-    @patch("immermatch.db.deactivate_subscriber", return_value=True)
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_data_deleted_after_deactivation(self, mock_deactivate, mock_delete):
+    def test_chunks_large_id_lists(self):
         client = _mock_client()
-        self._setup_expired_select(client, [{"id": "sub-1"}])
-        self._setup_recheck(client, {"is_active": True})
+        rows = [{"id": f"sub-{i}"} for i in range(db._EXPIRE_CHUNK_SIZE + 1)]
+        self._setup_expired_select(client, rows)
+        self._setup_expire(client, [{"id": "x"}])
 
-        db.expire_subscriptions(client)
+        count = db.expire_subscriptions(client)
 
-        mock_delete.assert_called_once_with(client, "sub-1")
+        # Two chunks, one request each
+        assert count == 2
+        in_calls = client.table.return_value.update.return_value.in_.call_args_list
+        assert [len(c[0][1]) for c in in_calls] == [db._EXPIRE_CHUNK_SIZE, 1]
 
-    @patch("immermatch.db.delete_subscriber_data")
-    @patch("immermatch.db.deactivate_subscriber")
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_handles_missing_subscriber_on_recheck(self, mock_deactivate, mock_delete):
+    def test_update_error_raises(self):
         client = _mock_client()
         self._setup_expired_select(client, [{"id": "sub-1"}])
-        # Re-check returns None (row deleted between queries)
-        self._setup_recheck(client, None)
-
-        count = db.expire_subscriptions(client)
+        self._setup_expire(client, error="boom")
 
-        assert count == 0
-        mock_deactivate.assert_not_called()
+        with pytest.raises(RuntimeError):
+            db.expire_subscriptions(client)
 
 
 # ---------------------------------------------------------------------------
@@ -274,72 +304,35 @@ class TestExpireSubscriptions:
 
 
 class TestPurgeInactiveSubscribers:
-    def _setup_inactive_select(self, client, rows):
-        """Wire select→eq→execute for inactive subscriber lookup."""
-        client.table.return_value.select.return_value.eq.return_value.execute.return_value = _make_execute(data=rows)
+    def _delete_chain(self, client):
+        return client.table.return_value.delete.return_value.eq.return_value.lte
 
     @freeze_time("2026-02-20T12:00:00Z")
     def test_deletes_old_inactive_subscribers(self):
         client = _mock_client()
-        # Unsubscribed 10 days ago — older than the 7-day retention
-        old_ts = (datetime(2026, 2, 10, tzinfo=timezone.utc)).isoformat()
-        self._setup_inactive_select(client, [{"id": "sub-1", "is_active": False, "unsubscribed_at": old_ts}])
-        client.table.return_value.delete.return_value.in_.return_value.execute.return_value = _make_execute(
-            data=[{"id": "sub-1"}]
-        )
+        self._delete_chain(client).return_value.execute.return_value = _make_execute(data=[{"id": "sub-1"}])
 
         count = db.purge_inactive_subscribers(client)
 
         assert count == 1
-        client.table.return_value.delete.return_value.in_.assert_called_once()
+        client.table.return_value.delete.return_value.eq.assert_called_once_with("is_active", False)
 
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_spares_recently_deactivated(self):
-        client = _mock_client()
-        # Unsubscribed 2 days ago — within the 7-day retention
-        recent_ts = (datetime(2026, 2, 18, tzinfo=timezone.utc)).isoformat()
-        self._setup_inactive_select(client, [{"id": "sub-1", "is_active": False, "unsubscribed_at": recent_ts}])
-
-        count = db.purge_inactive_subscribers(client)
-
-        assert count == 0
-
-    def test_no_inactive_returns_zero(self):
+    def test_filters_by_retention_cutoff_server_side(self):
         client = _mock_client()
-        self._setup_inactive_select(client, [])
-
-        assert db.purge_inactive_subscribers(client) == 0
-
-    @freeze_time("2026-02-20T12:00:00Z")
-    def test_chunked_deletion(self):
-        client = _mock_client()
-        old_ts = (datetime(2026, 2, 1, tzinfo=timezone.utc)).isoformat()
-        rows = [{"id": f"sub-{i}", "is_active": False, "unsubscribed_at": old_ts} for i in range(250)]
-        self._setup_inactive_select(client, rows)
-        # Each chunk delete returns its slice
-        client.table.return_value.delete.return_value.in_.return_value.execute.return_value = _make_execute(
-            data=[{"id": "x"}] * 200
-        )
+        self._delete_chain(client).return_value.execute.return_value = _make_execute(data=[])
 
-        db.purge_inactive_subscribers(client)
+        db.purge_inactive_subscribers(client, older_than_days=7)
 
-        # 250 IDs → 2 chunks (200 + 50)
-        assert client.table.return_value.delete.return_value.in_.call_count == 2
-        # First chunk has 200 IDs, second has 50
-        first_chunk = client.table.return_value.delete.return_value.in_.call_args_list[0][0][1]
-        second_chunk = client.table.return_value.delete.return_value.in_.call_args_list[1][0][1]
-        assert len(first_chunk) == 200
-        assert len(second_chunk) == 50
+        self._delete_chain(client).assert_called_once_with("unsubscribed_at", "2026-02-13T12:00:00+00:00")
+        client.table.return_value.select.assert_not_called()
 
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_skips_null_unsubscribed_at(self):
+    def test_nothing_to_purge_returns_zero(self):
         client = _mock_client()
-        # Row with no unsubscribed_at should not be purged
-        self._setup_inactive_select(client, [{"id": "sub-1", "is_active": False, "unsubscribed_at": None}])
+        self._delete_chain(client).return_value.execute.return_value = _make_execute(data=[])
 
-        count = db.purge_inactive_subscribers(client)
-
-        assert count == 0
+        assert db.purge_inactive_subscribers(client) == 0
 
 
 # ---------------------------------------------------------------------------
@@ -348,65 +341,60 @@ class TestPurgeInactiveSubscribers:
 
 
 class TestConfirmSubscriber:
-    def _setup_token_lookup(self, client, rows):
-        """Wire select→eq→execute for the token lookup."""
-        client.table.return_value.select.return_value.eq.return_value.execute.return_value = _make_execute(data=rows)
+    def _confirm_chain(self, client):
+        """Return the update→eq→or_ builder used by the conditional update."""
+        return client.table.return_value.update.return_value.eq.return_value.or_
+
+    def _setup_update(self, client, rows):
+        self._confirm_chain(client).return_value.execute.return_value = _make_execute(data=rows)
 
     @freeze_time("2026-02-20T12:00:00Z")
     def test_valid_token_activates(self):
         client = _mock_client()
-        expires = (datetime(2026, 2, 21, tzinfo=timezone.utc)).isoformat()
-        sub = {"id": SUB_ID, "is_active": False, "token_expires_at": expires}
-        self._setup_token_lookup(client, [sub])
-        client.table.return_value.update.return_value.eq.return_value.execute.return_value = _make_execute(
-            data=[{**sub, "is_active": True}]
-        )
+        self._setup_update(client, [{"id": SUB_ID, "is_active": True}])
 
         result = db.confirm_subscriber(client, TOKEN, confirm_ip="1.2.3.4", confirm_user_agent="TestAgent")
 
         assert result is not None
         assert result["is_active"] is True
+        client.table.return_value.select.assert_not_called()
 
-    def test_unknown_token_returns_none(self):
+    @freeze_time("2026-02-20T12:00:00Z")
+    def test_filters_token_and_expiry_server_side(self):
         client = _mock_client()
-        self._setup_token_lookup(client, [])
+        self._setup_update(client, [{"id": SUB_ID, "is_active": True}])
 
-        assert db.confirm_subscriber(client, "bad_token") is None
+        db.confirm_subscriber(client, TOKEN)
+
+        client.table.return_value.update.return_value.eq.assert_called_once_with("confirmation_token", TOKEN)
+        self._confirm_chain(client).assert_called_once_with(
+            "token_expires_at.is.null,token_expires_at.gt.2026-02-20T12:00:00+00:00"
+        )
 
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_expired_token_returns_none(self):
+    def test_unknown_or_expired_token_returns_none(self):
         client = _mock_client()
-        expired = (datetime(2026, 2, 19, tzinfo=timezone.utc)).isoformat()
-        sub = {"id": SUB_ID, "is_active": False, "token_expires_at": expired}
-        self._setup_token_lookup(client, [sub])
+        # No row matched the token + expiry filter
+        self._setup_update(client, [])
 
-        assert db.confirm_subscriber(client, TOKEN) is None
+        assert db.confirm_subscriber(client, "bad_token") is None
 
     @freeze_time("2026-02-20T12:00:00Z")
     def test_stores_confirm_metadata(self):
         client = _mock_client()
-        expires = (datetime(2026, 2, 21, tzinfo=timezone.utc)).isoformat()
-        sub = {"id": SUB_ID, "is_active": False, "token_expires_at": expires}
-        self._setup_token_lookup(client, [sub])
-        client.table.return_value.update.return_value.eq.return_value.execute.return_value = _make_execute(
-            data=[{**sub, "is_active": True}]
-        )
+        self._setup_update(client, [{"id": SUB_ID, "is_active": True}])
 
         db.confirm_subscriber(client, TOKEN, confirm_ip="1.2.3.4", confirm_user_agent="TestAgent")
 
         payload = client.table.return_value.update.call_args[0][0]
         assert payload["confirm_ip"] == "1.2.3.4"
         assert payload["confirm_user_agent"] == "TestAgent"
+        assert payload["confirmed_at"] == "2026-02-20T12:00:00+00:00"
 
     @freeze_time("2026-02-20T12:00:00Z")
     def test_clears_unsubscribe_fields(self):
         client = _mock_client()
-        expires = (datetime(2026, 2, 21, tzinfo=timezone.utc)).isoformat()
-        sub = {"id": SUB_ID, "is_active": False, "token_expires_at": expires}
-        self._setup_token_lookup(client, [sub])
-        client.table.return_value.update.return_value.eq.return_value.execute.return_value = _make_execute(
-            data=[{**sub, "is_active": True}]
-        )
+        self._setup_update(client, [{"id": SUB_ID, "is_active": True}])
 
         db.confirm_subscriber(client, TOKEN)
 
@@ -562,6 +550,20 @@ class TestUpdateSubscriberPreferences:
             db.update_subscriber_preferences(client, SUB_ID, min_score=70, cadence="monthly")
 
 
+class TestParseIsoUtc:
+    @pytest.mark.parametrize("accepts_z", [True, False])
+    def test_parses_zulu_suffix(self, accepts_z):
+        with patch.object(db, "_FROMISOFORMAT_ACCEPTS_Z", accepts_z):
+            parsed = db._parse_iso_utc("2026-02-20T12:00:00Z")
+
+        assert parsed == datetime(2026, 2, 20, 12, tzinfo=timezone.utc)
+
+    def test_parses_offset_and_empty(self):
+        assert db._parse_iso_utc("2026-02-20T12:00:00+00:00") == datetime(2026, 2, 20, 12, tzinfo=timezone.utc)
+        assert db._parse_iso_utc(None) is None
+        assert db._parse_iso_utc("") is None
+
+
 class TestManageTokenHelpers:
     def test_issue_manage_token_writes_token(self):
         client = _mock_client()
@@ -602,6 +604,212 @@ class TestMarkSubscriberLastSent:
         assert payload["last_sent_at"] == "2026-03-06T08:00:00+00:00"
 
 
+class TestGetActiveSubscribersWithProfiles:
+    @freeze_time("2026-02-20T12:00:00Z")
+    def test_filters_expiry_server_side(self):
+        client = _mock_client()
+        chain = client.table.return_value.select.return_value.eq.return_value.not_.is_.return_value
+        chain.or_.return_value.execute.return_value = _make_execute(data=[{"id": SUB_ID}])
+
+        rows = db.get_active_subscribers_with_profiles(client)
+
+        assert rows == [{"id": SUB_ID}]
+        chain.or_.assert_called_once_with("expires_at.is.null,expires_at.gt.2026-02-20T12:00:00+00:00")
+
+
+class TestUpsertJobs:
+    def test_omits_empty_optional_fields(self):
+        client = _mock_client()
+        client.table.return_value.upsert.return_value.execute.return_value = _make_execute(data=[])
+
+        db.upsert_jobs(
+            client,
+            [
+                {"title": "Dev", "company": "Acme", "url": "u1", "location": "Berlin", "description": ""},
+                {"title": "Ops", "company": "Beta", "url": "u2", "description": "Runs things"},
+            ],
+        )
+
+        rows = client.table.return_value.upsert.call_args[0][0]
+        assert rows == [
+            {"title": "Dev", "company": "Acme", "url": "u1", "location": "Berlin"},
+            {"title": "Ops", "company": "Beta", "url": "u2", "description": "Runs things"},
+        ]
+        assert client.table.return_value.upsert.call_args[1] == {"on_conflict": "url"}
+
+    def test_large_batches_post_orjson_body(self):
+        client = _mock_client()
+        builder = client.table.return_value
+        builder.path = "https://example.supabase.co/rest/v1/jobs"
+        builder.headers = {"apikey": "key"}
+        jobs = [{"title": "Dev", "company": "Acme", "url": f"u{i}"} for i in range(db._ORJSON_UPSERT_THRESHOLD + 1)]
+        response = builder.session.post.return_value
+        response.is_success = True
+        response.content = b'[{"id": "job-1", "url": "u0"}]'
+
+        rows = db.upsert_jobs(client, jobs)
+
+        assert rows == [{"id": "job-1", "url": "u0"}]
+        builder.upsert.assert_not_called()
+        call = builder.session.post.call_args
+        assert call[0][0] == "https://example.supabase.co/rest/v1/jobs"
+        assert call[1]["params"] == {"on_conflict": "url", "columns": '"title","company","url"'}
+        assert orjson.loads(call[1]["content"]) == jobs
+        assert call[1]["headers"]["apikey"] == "key"
+        assert "resolution=merge-duplicates" in call[1]["headers"]["Prefer"]
+
+    @pytest.mark.parametrize(
+        ("content", "message"),
+        [
+            (b'{"message": "permission denied", "code": "42501", "hint": null, "details": null}', "permission denied"),
+            (b"<html>Bad Gateway</html>", "JSON could not be generated"),
+        ],
+    )
+    def test_large_batch_failure_raises_api_error(self, content: bytes, message: str):
+        client = _mock_client()
+        builder = client.table.return_value
+        builder.path = "https://example.supabase.co/rest/v1/jobs"
+        builder.headers = {}
+        response = builder.session.post.return_value
+        response.is_success = False
+        response.status_code = 502
+        response.content = content
+        jobs = [{"title": "Dev", "company": "Acme", "url": f"u{i}"} for i in range(db._ORJSON_UPSERT_THRESHOLD + 1)]
+
+        with pytest.raises(APIError, match=message):
+            db.upsert_jobs(client, jobs)
+
+
+class TestJobUrlLookups:
+    def test_get_job_ids_by_urls_chunks_and_dedupes(self):
+        client = _mock_client()
+        in_mock = client.table.return_value.select.return_value.in_
+        in_mock.return_value.execute.side_effect = [
+            _make_execute(data=[{"id": "job-0", "url": "u0"}]),
+            _make_execute(data=[{"id": "job-last", "url": f"u{db._IN_FILTER_CHUNK_SIZE}"}]),
+        ]
+        urls = [f"u{i}" for i in range(db._IN_FILTER_CHUNK_SIZE + 1)]
+
+        mapping = db.get_job_ids_by_urls(client, urls + urls)
+
+        assert mapping == {"u0": "job-0", f"u{db._IN_FILTER_CHUNK_SIZE}": "job-last"}
+        chunks = [c[0][1] for c in in_mock.call_args_list]
+        assert [len(c) for c in chunks] == [db._IN_FILTER_CHUNK_SIZE, 1]
+
+    def test_get_existing_urls_parses_csv(self):
+        client = _mock_client()
+        builder = client.table.return_value
+        builder.path = "https://example.supabase.co/rest/v1/jobs"
+        builder.headers = {"apikey": "key"}
+        builder.session.get.return_value.text = 'url\nhttps://a.example/1\n"https://b.example/2?x=1,2"\n'
+
+        existing = db.get_existing_urls(
+            client, ["https://a.example/1", "https://b.example/2?x=1,2", "https://c.example"]
+        )
+
+        assert existing == {"https://a.example/1", "https://b.example/2?x=1,2"}
+        call = builder.session.get.call_args
+        assert call[1]["headers"] == {"apikey": "key", "Accept": "text/csv"}
+        assert call[1]["params"]["select"] == "url"
+        assert call[1]["params"]["url"].startswith('in.("https://a.example/1",')
+
+    def test_get_existing_urls_failure_raises_api_error(self):
+        client = _mock_client()
+        builder = client.table.return_value
+        builder.path = "https://example.supabase.co/rest/v1/jobs"
+        builder.headers = {}
+        response = builder.session.get.return_value
+        response.is_success = False
+        response.content = b'{"message": "JWT expired", "code": "PGRST301", "hint": null, "details": null}'
+
+        with pytest.raises(APIError, match="JWT expired"):
+            db.get_existing_urls(client, ["https://a.example/1"])
+
+    def test_get_existing_urls_empty_skips_query(self):
+        client = _mock_client()
+
+        assert db.get_existing_urls(client, []) == set()
+        client.table.assert_not_called()
+
+
+class TestGetUnsentJobIds:
+    def test_returns_candidates_not_in_sent_log(self):
+        client = _mock_client()
+        chain = client.table.return_value.select.return_value.eq.return_value.in_
+        chain.return_value.execute.return_value = _make_execute(data=[{"job_id": "job-2"}])
+
+        unsent = db.get_unsent_job_ids(client, SUB_ID, ["job-1", "job-2", "job-3", "job-1"])
+
+        assert unsent == ["job-1", "job-3"]
+        client.table.assert_called_with("job_sent_logs")
+        client.table.return_value.select.return_value.eq.assert_called_once_with("subscriber_id", SUB_ID)
+        chain.assert_called_once_with("job_id", ["job-1", "job-2", "job-3"])
+
+    def test_no_candidates_skips_query(self):
+        client = _mock_client()
+
+        assert db.get_unsent_job_ids(client, SUB_ID, []) == []
+        client.table.assert_not_called()
+
+
+class TestPagination:
+    def test_get_all_jobs_pages_until_short_page(self):
+        client = _mock_client()
+        page = client.table.return_value.select.return_value.order.return_value.range
+        page.return_value.execute.side_effect = [
+            _make_execute(data=[{"id": "j3"}, {"id": "j2"}]),
+            _make_execute(data=[{"id": "j1"}]),
+        ]
+
+        rows = list(db.get_all_jobs(client, batch_size=2))
+
+        assert [r["id"] for r in rows] == ["j3", "j2", "j1"]
+        assert [c[0] for c in page.call_args_list] == [(0, 1), (2, 3)]
+        client.table.return_value.select.return_value.order.assert_called_with("id", desc=True)
+
+    def test_get_all_subscribers_is_lazy(self):
+        client = _mock_client()
+
+        rows = db.get_all_subscribers(client)
+
+        client.table.assert_not_called()
+        page = client.table.return_value.select.return_value.order.return_value.range
+        page.return_value.execute.return_value = _make_execute(data=[])
+        assert list(rows) == []
+        client.table.return_value.select.return_value.order.assert_called_with("id", desc=False)
+
+
+class TestLogSentJobsBulk:
+    @freeze_time("2026-02-20T12:00:00Z")
+    def test_inserts_all_pairs_with_one_timestamp(self):
+        client = _mock_client()
+
+        db.log_sent_jobs_bulk(client, [("sub-1", "job-1"), ("sub-2", "job-2")])
+
+        client.table.assert_called_with("job_sent_logs")
+        rows = client.table.return_value.insert.call_args[0][0]
+        assert rows == [
+            {"subscriber_id": "sub-1", "job_id": "job-1", "sent_at": "2026-02-20T12:00:00+00:00"},
+            {"subscriber_id": "sub-2", "job_id": "job-2", "sent_at": "2026-02-20T12:00:00+00:00"},
+        ]
+
+    def test_chunks_large_batches(self):
+        client = _mock_client()
+        pairs = [("sub-1", f"job-{i}") for i in range(db._SENT_LOG_CHUNK_SIZE + 5)]
+
+        db.log_sent_jobs_bulk(client, pairs)
+
+        insert_calls = client.table.return_value.insert.call_args_list
+        assert [len(c[0][0]) for c in insert_calls] == [db._SENT_LOG_CHUNK_SIZE, 5]
+
+    def test_empty_is_noop(self):
+        client = _mock_client()
+
+        db.log_sent_jobs_bulk(client, [])
+
+        client.table.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # TestGDPRLifecycle — integration-style (patches internal db functions)
 # ---------------------------------------------------------------------------
@@ -610,10 +818,8 @@ class TestMarkSubscriberLastSent:
 class TestGDPRLifecycle:
     """End-to-end GDPR lifecycle tests combining multiple db functions."""
 
-    @patch("immermatch.db.delete_subscriber_data")
-    @patch("immermatch.db.deactivate_subscriber", return_value=True)
     @freeze_time("2026-02-20T12:00:00Z")
-    def test_subscribe_verify_expire_purge(self, mock_deactivate, mock_delete):
+    def test_subscribe_verify_expire_purge(self):
         """Full lifecycle: subscribe → confirm → expire → purge."""
         client = _mock_client()
 
@@ -624,11 +830,8 @@ class TestGDPRLifecycle:
         assert result is None  # pending
 
         # 2. Confirm
-        expires = (datetime(2026, 2, 21, tzinfo=timezone.utc)).isoformat()
-        sub = {"id": SUB_ID, "is_active": False, "token_expires_at": expires}
-        client.table.return_value.select.return_value.eq.return_value.execute.return_value = _make_execute(data=[sub])
-        client.table.return_value.update.return_value.eq.return_value.execute.return_value = _make_execute(
-            data=[{**sub, "is_active": True}]
+        client.table.return_value.update.return_value.eq.return_value.or_.return_value.execute.return_value = (
+            _make_execute(data=[{"id": SUB_ID, "is_active": True}])
         )
         confirmed = db.confirm_subscriber(client, TOKEN)
         assert confirmed is not None
@@ -639,10 +842,8 @@ class TestGDPRLifecycle:
         chain.eq.return_value.not_.is_.return_value.lte.return_value.execute.return_value = _make_execute(
             data=[{"id": SUB_ID}]
         )
-        client.table.return_value.select.return_value.eq.return_value.maybe_single.return_value.execute.return_value = (
-            _make_execute(data={"is_active": True})
-        )
+        expire_chain = client.table.return_value.update.return_value.in_.return_value
+        expire_chain.eq.return_value.execute.return_value = _make_execute(data=[{"id": SUB_ID}])
         count = db.expire_subscriptions(client)
         assert count == 1
-        mock_deactivate.assert_called_with(client, SUB_ID)
-        mock_delete.assert_called_with(client, SUB_ID)
+        expire_chain.eq.assert_called_with("is_active", True)
@@ -1,20 +1,42 @@
 """Tests for immermatch.emailer — HTML builder pure functions."""
 
+from datetime import datetime, timezone
 from unittest.mock import patch
 
 import pytest
 
 from immermatch.emailer import (
+    _append_job_row,
     _build_html,
-    _build_job_row,
+    _digest_header,
     _impressum_line,
+    _render_email,
+    _resend_sender,
     _safe_url,
+    digest_date,
     send_manage_subscription_email,
     send_verification_email,
     send_welcome_email,
 )
 
 
+@pytest.fixture(autouse=True)
+def _clear_env_caches():
+    """_impressum_line and _resend_sender are memoized; reset them so env monkeypatching takes effect."""
+    _impressum_line.cache_clear()
+    _resend_sender.cache_clear()
+    yield
+    _impressum_line.cache_clear()
+    _resend_sender.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def _no_send_pacing():
+    """Skip the Resend rate limiter so send tests do not sleep."""
+    with patch("immermatch.emailer._resend_rate_limiter"):
+        yield
+
+
 class TestSafeUrl:
     def test_allows_https(self):
         assert _safe_url("https://example.com") == "https://example.com"
@@ -22,6 +44,9 @@ class TestSafeUrl:
     def test_allows_http(self):
         assert _safe_url("http://example.com") == "http://example.com"
 
+    def test_strips_surrounding_whitespace(self):
+        assert _safe_url("  https://example.com/a b ") == "https://example.com/a b"
+
     def test_blocks_javascript(self):
         assert _safe_url("javascript:alert(1)") == "#"
 
@@ -35,23 +60,30 @@ class TestSafeUrl:
         assert _safe_url("") == ""
 
 
+def _render_row(job: dict) -> str:
+    """Render one job card through the same appender the digest uses."""
+    parts: list[str] = []
+    _append_job_row(parts, job)
+    return "".join(parts)
+
+
 class TestHtmlEscapingInJobRow:
     def test_escapes_title_with_html(self):
-        html = _build_job_row({"title": "<script>alert(1)</script>", "company": "Co", "url": "https://x.com"})
+        html = _render_row({"title": "<script>alert(1)</script>", "company": "Co", "url": "https://x.com"})
         assert "<script>" not in html
         assert "&lt;script&gt;" in html
 
     def test_escapes_company_with_html(self):
-        html = _build_job_row({"title": "Dev", "company": "<b>evil</b>", "url": "https://x.com"})
+        html = _render_row({"title": "Dev", "company": "<b>evil</b>", "url": "https://x.com"})
         assert "<b>evil</b>" not in html
         assert "&lt;b&gt;" in html
 
     def test_blocks_javascript_url(self):
-        html = _build_job_row({"title": "Dev", "company": "Co", "url": "javascript:alert(1)"})
+        html = _render_row({"title": "Dev", "company": "Co", "url": "javascript:alert(1)"})
         assert "javascript:" not in html
 
 
-class TestBuildJobRow:
+class TestAppendJobRow:
     @pytest.mark.parametrize(
         ("score", "color"),
         [
@@ -61,25 +93,30 @@ class TestBuildJobRow:
         ],
     )
     def test_score_badge_color_thresholds(self, score: int, color: str):
-        html = _build_job_row({"title": "Dev", "company": "Co", "score": score, "url": "https://example.com"})
+        html = _render_row({"title": "Dev", "company": "Co", "score": score, "url": "https://example.com"})
         assert color in html
 
     def test_contains_title_and_company(self):
-        html = _build_job_row({"title": "Engineer", "company": "ACME", "score": 90, "url": "#"})
+        html = _render_row({"title": "Engineer", "company": "ACME", "score": 90, "url": "#"})
         assert "Engineer" in html
         assert "ACME" in html
 
     def test_contains_location_when_provided(self):
-        html = _build_job_row({"title": "Dev", "company": "Co", "score": 80, "url": "#", "location": "Munich"})
+        html = _render_row({"title": "Dev", "company": "Co", "score": 80, "url": "#", "location": "Munich"})
         assert "Munich" in html
         assert "&#128205;" in html
 
     def test_omits_location_when_missing(self):
-        html = _build_job_row({"title": "Dev", "company": "Co", "score": 80, "url": "#"})
+        html = _render_row({"title": "Dev", "company": "Co", "score": 80, "url": "#"})
+        assert "&#128205;" not in html
+
+    def test_none_fields_render_empty(self):
+        html = _render_row({"title": "Dev", "company": None, "score": 80, "url": None, "location": None})
+        assert "None" not in html
         assert "&#128205;" not in html
 
     def test_view_job_button_present(self):
-        html = _build_job_row({"title": "Dev", "company": "Co", "score": 80, "url": "https://example.com/job"})
+        html = _render_row({"title": "Dev", "company": "Co", "score": 80, "url": "https://example.com/job"})
         assert "View Job" in html
         assert "https://example.com/job" in html
 
@@ -135,6 +172,24 @@ class TestBuildHtmlSortOrder:
         assert high_pos < mid_pos < low_pos
 
 
+class TestDigestHeader:
+    def test_header_shared_across_subscribers_in_same_location(self):
+        _digest_header.cache_clear()
+        jobs = [{"title": "Dev", "company": "Co", "score": 85, "url": "#"}]
+
+        first = _build_html(jobs, unsubscribe_url="https://example.com/u?token=a", target_location="Berlin")
+        second = _build_html(jobs, unsubscribe_url="https://example.com/u?token=b", target_location="Berlin")
+
+        assert _digest_header.cache_info().hits == 1
+        assert "token=a" in first and "token=b" in second
+        assert "Jobs in Berlin" in second
+
+    def test_explicit_date_used_in_header(self):
+        html = _build_html([], today=digest_date(datetime(2030, 1, 2, tzinfo=timezone.utc)))
+
+        assert "January 02, 2030" in html
+
+
 class TestImpressumLine:
     def test_with_all_vars(self, monkeypatch):
         monkeypatch.setenv("IMPRESSUM_NAME", "Jane Doe")
@@ -152,6 +207,12 @@ class TestImpressumLine:
         line = _impressum_line()
         assert line == "Immermatch"
 
+    def test_result_is_cached(self, monkeypatch):
+        monkeypatch.setenv("IMPRESSUM_NAME", "Jane Doe")
+        first = _impressum_line()
+        monkeypatch.setenv("IMPRESSUM_NAME", "Someone Else")
+        assert _impressum_line() is first
+
 
 class TestSendWelcomeEmail:
     def test_raises_without_api_key(self, monkeypatch):
@@ -246,3 +307,39 @@ class TestSendManageSubscriptionEmail:
         monkeypatch.delenv("RESEND_API_KEY", raising=False)
         with pytest.raises(ValueError, match="RESEND_API_KEY"):
             send_manage_subscription_email("user@example.com", "https://app.test/?manage_token=xyz")
+
+
+class TestRenderEmail:
+    def test_wraps_sections_in_shared_shell(self):
+        html = _render_email("<header/>", "<body-section/>", "footer text")
+        assert html.startswith("<!DOCTYPE html>")
+        assert html.endswith("</html>")
+        assert html.index("<header/>") < html.index("<body-section/>") < html.index("footer text")
+
+    @patch("immermatch.emailer.resend.Emails.send", return_value={"id": "123"})
+    def test_transactional_emails_share_shell(self, mock_send, monkeypatch):
+        monkeypatch.setenv("RESEND_API_KEY", "re_test")
+        send_verification_email("user@example.com", "https://app.test/verify?token=xyz")
+        send_manage_subscription_email("user@example.com", "https://app.test/?manage_token=xyz")
+        verify_html, manage_html = (c[0][0]["html"] for c in mock_send.call_args_list)
+        shell = _render_email("", "", "")
+        assert verify_html[:200] == manage_html[:200] == shell[:200]
+
+
+class TestResendSender:
+    def test_configures_key_once(self, monkeypatch):
+        monkeypatch.setenv("RESEND_API_KEY", "re_test")
+        monkeypatch.setenv("RESEND_FROM", "Test <test@example.com>")
+
+        assert _resend_sender() == "Test <test@example.com>"
+        monkeypatch.setenv("RESEND_FROM", "Other <other@example.com>")
+        assert _resend_sender() == "Test <test@example.com>"
+        assert _resend_sender.cache_info().hits == 1
+
+    def test_missing_key_is_not_cached(self, monkeypatch):
+        monkeypatch.delenv("RESEND_API_KEY", raising=False)
+        with pytest.raises(ValueError, match="RESEND_API_KEY"):
+            _resend_sender()
+
+        monkeypatch.setenv("RESEND_API_KEY", "re_test")
+        assert _resend_sender()
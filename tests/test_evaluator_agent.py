@@ -1,11 +1,20 @@
 """Tests for immermatch.evaluator_agent — evaluate_job, evaluate_all_jobs, generate_summary."""
 
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
 import pytest
 from google.genai.errors import ServerError
 
-from immermatch.evaluator_agent import _truncate_description, evaluate_all_jobs, evaluate_job, generate_summary
+from immermatch.evaluator_agent import (
+    _get_pool,
+    _truncate_description,
+    evaluate_all_jobs,
+    evaluate_job,
+    evaluate_jobs_batch,
+    generate_summary,
+    submit_evaluation_batches,
+)
 from immermatch.models import (
     CandidateProfile,
     EvaluatedJob,
@@ -121,6 +130,77 @@ class TestEvaluateJob:
         assert "**Preferences:**" in prompt
 
 
+class TestEvaluateJobsBatch:
+    """Tests for evaluate_jobs_batch() — one Gemini call for several jobs."""
+
+    @pytest.fixture()
+    def jobs(self) -> list[JobListing]:
+        return [JobListing(title=f"Job {i}", company_name="Acme", location="Berlin") for i in range(3)]
+
+    @patch("immermatch.evaluator_agent.call_gemini")
+    def test_maps_results_by_listing_number(self, mock_call: MagicMock, mock_client, simple_profile, jobs):
+        mock_call.return_value = (
+            '{"evaluations": ['
+            '{"job": 3, "score": 30, "reasoning": "Weak", "missing_skills": ["Go"]},'
+            '{"job": 1, "score": 90, "reasoning": "Great", "missing_skills": []},'
+            '{"job": 2, "score": 60, "reasoning": "OK", "missing_skills": []}'
+            "]}"
+        )
+
+        results = evaluate_jobs_batch(mock_client, simple_profile, jobs)
+
+        assert [r.score for r in results] == [90, 60, 30]
+        assert results[2].missing_skills == ["Go"]
+        mock_call.assert_called_once()
+        prompt = mock_call.call_args[0][1]
+        assert prompt.count("## Candidate Profile") == 1
+        assert "## Job Listing 3" in prompt
+        # Only the batch output contract, never the single-job one
+        assert '"evaluations" list' in prompt
+        assert "Return ONLY a JSON object with:" not in prompt
+
+    @patch("immermatch.evaluator_agent.call_gemini")
+    def test_missing_entries_get_error_score(self, mock_call: MagicMock, mock_client, simple_profile, jobs):
+        mock_call.return_value = (
+            '{"evaluations": [{"job": 2, "score": 70, "reasoning": "OK"}, {"job": 9, "score": 50, "reasoning": "?"}]}'
+        )
+
+        results = evaluate_jobs_batch(mock_client, simple_profile, jobs)
+
+        assert [r.score for r in results] == [-1, 70, -1]
+        assert "missing" in results[0].reasoning
+
+    @patch("immermatch.evaluator_agent.call_gemini")
+    def test_api_error_returns_fallback_for_all(self, mock_call: MagicMock, mock_client, simple_profile, jobs):
+        mock_call.side_effect = ServerError(503, {"error": "Service Unavailable"})
+
+        results = evaluate_jobs_batch(mock_client, simple_profile, jobs)
+
+        assert len(results) == 3
+        assert all(r.score == -1 and "API error" in r.reasoning for r in results)
+
+    @patch("immermatch.evaluator_agent.evaluate_job")
+    def test_single_job_uses_evaluate_job(self, mock_eval: MagicMock, mock_client, simple_profile, simple_job):
+        mock_eval.return_value = JobEvaluation(score=75, reasoning="Fine")
+
+        assert evaluate_jobs_batch(mock_client, simple_profile, [simple_job]) == [mock_eval.return_value]
+        assert evaluate_jobs_batch(mock_client, simple_profile, []) == []
+
+    def test_repeat_screening_is_served_from_response_cache(self, simple_profile, jobs):
+        client = MagicMock()
+        client.models.generate_content.return_value.text = (
+            '{"evaluations": [{"job": 1, "score": 80, "reasoning": "Good"}, '
+            '{"job": 2, "score": 60, "reasoning": "OK"}, {"job": 3, "score": 40, "reasoning": "Weak"}]}'
+        )
+
+        first = evaluate_jobs_batch(client, simple_profile, jobs)
+        second = evaluate_jobs_batch(client, simple_profile, jobs)
+
+        assert [r.score for r in first] == [r.score for r in second] == [80, 60, 40]
+        client.models.generate_content.assert_called_once()
+        assert client.models.generate_content.call_args.kwargs["config"].temperature == 0.2
+
+
 class TestTruncateDescription:
     def test_small_limit_falls_back_to_prefix(self):
         text = "abcdefghijklmnopqrstuvwxyz"
@@ -128,16 +208,16 @@ class TestTruncateDescription:
 
 
 class TestEvaluateAllJobs:
-    """Tests for evaluate_all_jobs() — mock evaluate_job."""
+    """Tests for evaluate_all_jobs() — mock evaluate_jobs_batch."""
 
-    @patch("immermatch.evaluator_agent.evaluate_job")
-    def test_results_sorted_by_score_descending(self, mock_eval: MagicMock, mock_client, simple_profile):
+    @patch("immermatch.evaluator_agent.evaluate_jobs_batch")
+    def test_results_sorted_by_score_descending(self, mock_batch: MagicMock, mock_client, simple_profile):
         jobs = [
             JobListing(title="Job A", company_name="Co", location="Berlin"),
             JobListing(title="Job B", company_name="Co", location="Berlin"),
             JobListing(title="Job C", company_name="Co", location="Berlin"),
         ]
-        mock_eval.side_effect = [
+        mock_batch.return_value = [
             JobEvaluation(score=40, reasoning="Low", missing_skills=[]),
             JobEvaluation(score=90, reasoning="High", missing_skills=[]),
             JobEvaluation(score=70, reasoning="Mid", missing_skills=[]),
@@ -147,14 +227,31 @@ class TestEvaluateAllJobs:
 
         scores = [r.evaluation.score for r in results]
         assert scores == [90, 70, 40]
+        assert [r.job.title for r in results] == ["Job B", "Job C", "Job A"]
 
-    @patch("immermatch.evaluator_agent.evaluate_job")
-    def test_progress_callback_called(self, mock_eval: MagicMock, mock_client, simple_profile):
+    @patch("immermatch.evaluator_agent.evaluate_jobs_batch")
+    def test_jobs_are_chunked_into_batches(self, mock_batch: MagicMock, mock_client, simple_profile):
+        jobs = [JobListing(title=f"Job {i}", company_name="Co", location="Berlin") for i in range(10)]
+        mock_batch.side_effect = lambda _client, _profile, batch, **_kwargs: [
+            JobEvaluation(score=50, reasoning="OK", missing_skills=[]) for _ in batch
+        ]
+
+        results = evaluate_all_jobs(mock_client, simple_profile, jobs, max_workers=1, batch_size=4)
+
+        assert len(results) == 10
+        assert [len(c.args[2]) for c in mock_batch.call_args_list] == [4, 4, 2]
+        # The profile is rendered once and shared by every batch
+        profile_blocks = {c.kwargs["profile_block"] for c in mock_batch.call_args_list}
+        assert len(profile_blocks) == 1
+        assert "Python" in profile_blocks.pop()
+
+    @patch("immermatch.evaluator_agent.evaluate_jobs_batch")
+    def test_progress_callback_called(self, mock_batch: MagicMock, mock_client, simple_profile):
         jobs = [
             JobListing(title="Job A", company_name="Co", location="Berlin"),
             JobListing(title="Job B", company_name="Co", location="Berlin"),
         ]
-        mock_eval.return_value = JobEvaluation(score=75, reasoning="OK", missing_skills=[])
+        mock_batch.return_value = [JobEvaluation(score=75, reasoning="OK", missing_skills=[])] * 2
         progress_calls: list[tuple[int, int]] = []
 
         evaluate_all_jobs(
@@ -169,12 +266,58 @@ class TestEvaluateAllJobs:
         assert all(total == 2 for _, total in progress_calls)
         assert sorted(c for c, _ in progress_calls) == [1, 2]
 
-    @patch("immermatch.evaluator_agent.evaluate_job")
-    def test_empty_job_list(self, mock_eval: MagicMock, mock_client, simple_profile):
+    @patch("immermatch.evaluator_agent.evaluate_jobs_batch")
+    def test_relisted_postings_are_screened_once(self, mock_batch: MagicMock, mock_client, simple_profile):
+        jobs = [
+            JobListing(title="Python Dev", company_name="Acme", location="Berlin", description="Build stuff."),
+            JobListing(title="Python Dev", company_name="Acme GmbH", location="Munich", description="Build stuff."),
+            JobListing(title="Go Dev", company_name="Acme", location="Berlin", description="Build stuff."),
+            JobListing(title="No Desc", company_name="A", location="Berlin"),
+            JobListing(title="No Desc", company_name="B", location="Berlin"),
+        ]
+        mock_batch.side_effect = lambda _client, _profile, batch, **_kwargs: [
+            JobEvaluation(score=60, reasoning=job.title, missing_skills=[]) for job in batch
+        ]
+
+        results = evaluate_all_jobs(mock_client, simple_profile, jobs, max_workers=1)
+
+        screened = mock_batch.call_args.args[2]
+        assert [(job.title, job.company_name) for job in screened] == [
+            ("Python Dev", "Acme"),
+            ("Go Dev", "Acme"),
+            ("No Desc", "A"),
+            ("No Desc", "B"),
+        ]
+        assert len(results) == 5
+        munich = next(r for r in results if r.job.location == "Munich")
+        assert munich.evaluation.reasoning == "Python Dev"
+
+    @patch("immermatch.evaluator_agent.evaluate_jobs_batch")
+    def test_empty_job_list(self, mock_batch: MagicMock, mock_client, simple_profile):
         results = evaluate_all_jobs(mock_client, simple_profile, [])
 
         assert results == []
-        mock_eval.assert_not_called()
+        mock_batch.assert_not_called()
+
+    @patch("immermatch.evaluator_agent.evaluate_jobs_batch")
+    def test_submit_on_caller_executor_uses_default_batch_size(
+        self, mock_batch: MagicMock, mock_client, simple_profile
+    ):
+        jobs = [JobListing(title=f"Job {i}", company_name="Co", location="Berlin") for i in range(10)]
+        mock_batch.side_effect = lambda _client, _profile, batch, **_kwargs: [
+            JobEvaluation(score=50, reasoning="OK", missing_skills=[]) for _ in batch
+        ]
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            futures = submit_evaluation_batches(executor, mock_client, simple_profile, jobs)
+            results = [ej for future in futures for ej in future.result()]
+
+        assert [ej.job for ej in results] == jobs
+        assert [len(c.args[2]) for c in mock_batch.call_args_list] == [8, 2]
+
+    def test_pool_reused_per_size(self):
+        assert _get_pool(3) is _get_pool(3)
+        assert _get_pool(3) is not _get_pool(4)
 
 
 class TestGenerateSummary:
@@ -220,3 +363,21 @@ class TestGenerateSummary:
         prompt = mock_call.call_args[0][1]
         assert "Kafka" in prompt
         assert "2 listings" in prompt
+
+    @patch("immermatch.evaluator_agent.call_gemini")
+    def test_top_matches_ranked_from_unsorted_input(self, mock_call: MagicMock, mock_client, simple_profile):
+        evaluated_jobs = [
+            EvaluatedJob(
+                job=JobListing(title=f"Job {score}", company_name="Co", location="Berlin"),
+                evaluation=JobEvaluation(score=score, reasoning="OK", missing_skills=[]),
+            )
+            for score in (40, 95, 10, 55, 72, 88, 30, 61, 20, 77, 50, 15)
+        ]
+        mock_call.return_value = "Summary text"
+
+        generate_summary(mock_client, simple_profile, evaluated_jobs)
+
+        prompt = mock_call.call_args[0][1]
+        assert prompt.index("Job 95 @") < prompt.index("Job 88 @") < prompt.index("Job 20 @")
+        assert "Job 10 @" not in prompt
+        assert "Job 15 @" not in prompt
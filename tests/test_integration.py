@@ -308,6 +308,11 @@ def _query_provider() -> MagicMock:
     return provider
 
 
+def _batch_response(evaluations: list[dict]) -> str:
+    """Wrap per-job evaluations in the batched screening response format."""
+    return json.dumps({"evaluations": [{"job": i, **ev} for i, ev in enumerate(evaluations, 1)]})
+
+
 # ---------------------------------------------------------------------------
 # Integration tests
 # ---------------------------------------------------------------------------
@@ -343,8 +348,8 @@ class TestFullPipelineTechCV:
             + [[] for _ in range(7)]
         )  # remaining queries → empty
 
-        # evaluator_agent.call_gemini: 5 eval calls + 1 summary call
-        mock_eval_gemini.side_effect = [json.dumps(resp) for resp in EVAL_RESPONSES] + [SUMMARY_RESPONSE]
+        # evaluator_agent.call_gemini: 1 batched eval call + 1 summary call
+        mock_eval_gemini.side_effect = [_batch_response(EVAL_RESPONSES), SUMMARY_RESPONSE]
 
         # --- Act: Stage 1 — Profile ---
         profile = profile_candidate(mock_client, tech_cv_text)
@@ -425,11 +430,13 @@ class TestFullPipelineSustainabilityCV:
         mock_provider.name = "test"
         mock_provider.search.side_effect = [sustainability_jobs] + [[] for _ in range(9)]
 
-        eval_responses = [
-            json.dumps({"score": 88, "reasoning": "Excellent CSRD/GHG match.", "missing_skills": []}),
-            json.dumps({"score": 72, "reasoning": "Good ESG fit, Power BI match.", "missing_skills": ["SQL"]}),
-        ]
-        mock_eval_gemini.side_effect = eval_responses + ["Great market fit for sustainability roles."]
+        eval_response = _batch_response(
+            [
+                {"score": 88, "reasoning": "Excellent CSRD/GHG match.", "missing_skills": []},
+                {"score": 72, "reasoning": "Good ESG fit, Power BI match.", "missing_skills": ["SQL"]},
+            ]
+        )
+        mock_eval_gemini.side_effect = [eval_response, "Great market fit for sustainability roles."]
 
         # Run full pipeline
         profile = profile_candidate(mock_client, sustainability_cv_text)
@@ -585,9 +592,9 @@ class TestEvaluationScoring:
     ) -> None:
         """evaluate_all_jobs returns results sorted by score descending."""
         shuffled_scores = [60, 90, 75, 40, 85]
-        mock_gemini.side_effect = [
-            json.dumps({"score": s, "reasoning": f"Score {s}.", "missing_skills": []}) for s in shuffled_scores
-        ]
+        mock_gemini.return_value = _batch_response(
+            [{"score": s, "reasoning": f"Score {s}.", "missing_skills": []} for s in shuffled_scores]
+        )
 
         profile = CandidateProfile(**json.loads(TECH_PROFILE_JSON))
         evaluated = evaluate_all_jobs(mock_client, profile, MOCK_JOBS, max_workers=1)
@@ -611,7 +618,7 @@ class TestEvaluationScoring:
         ]
 
         profile = CandidateProfile(**json.loads(TECH_PROFILE_JSON))
-        evaluated = evaluate_all_jobs(mock_client, profile, MOCK_JOBS[:3], max_workers=1)
+        evaluated = evaluate_all_jobs(mock_client, profile, MOCK_JOBS[:3], max_workers=1, batch_size=1)
 
         assert len(evaluated) == 3
         scores = [e.evaluation.score for e in evaluated]
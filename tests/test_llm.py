@@ -5,7 +5,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 from google.genai.errors import ClientError, ServerError
 
-from immermatch.llm import call_gemini, parse_json
+from immermatch.llm import call_gemini, create_client, parse_json, parse_model
+from immermatch.models import JobEvaluation
 
 
 class TestParseJson:
@@ -32,11 +33,25 @@ class TestParseJson:
         result = parse_json(text)
         assert result["score"] == 85
 
+    def test_json_after_unrelated_fence(self):
+        text = 'See ```py\nx\n``` and {"a": 1}'
+        assert parse_json(text) == {"a": 1}
+
     def test_nested_object(self):
         text = '{"outer": {"inner": 42}}'
         result = parse_json(text)
         assert result["outer"]["inner"] == 42
 
+    def test_deeply_nested_object_embedded_in_text(self):
+        text = 'Result: {"a": {"b": {"c": {"d": [1, 2]}}}} -- hope this helps {not json}'
+        result = parse_json(text)
+        assert result == {"a": {"b": {"c": {"d": [1, 2]}}}}
+
+    def test_fenced_with_surrounding_prose(self):
+        text = 'Sure! Here you go:\n```json\n{"score": 70}\n```\nLet me know if you need more.'
+        result = parse_json(text)
+        assert result == {"score": 70}
+
     def test_empty_raises(self):
         with pytest.raises(ValueError, match="Empty response"):
             parse_json("")
@@ -46,8 +61,21 @@ class TestParseJson:
             parse_json("this is not json at all")
 
 
+class TestParseModel:
+    def test_bare_json_validates_and_ignores_extra_keys(self):
+        text = '{"score": 80, "reasoning": "Fit", "missing_skills": ["Go"], "debug": {"tokens": 12}}'
+        result = parse_model(text, JobEvaluation)
+        assert result == JobEvaluation(score=80, reasoning="Fit", missing_skills=["Go"])
+
+    def test_fenced_response_returns_none(self):
+        assert parse_model('```json\n{"score": 80, "reasoning": "Fit"}\n```', JobEvaluation) is None
+
+    def test_invalid_fields_return_none(self):
+        assert parse_model('{"score": "high"}', JobEvaluation) is None
+
+
 class TestCallGemini:
-    """Tests for call_gemini() retry logic — mock client.models.generate_content + time.sleep."""
+    """Tests for call_gemini() retry logic — mock client.models.generate_content + the request pacer."""
 
     def _make_client(self, side_effects: list) -> MagicMock:
         client = MagicMock()
@@ -59,17 +87,17 @@ class TestCallGemini:
         resp.text = text
         return resp
 
-    @patch("immermatch.llm.time.sleep")
-    def test_success_first_try(self, mock_sleep: MagicMock):
+    @patch("immermatch.llm._gemini_rate_limiter")
+    def test_success_first_try(self, mock_pacer: MagicMock):
         client = self._make_client([self._make_response("hello")])
 
         result = call_gemini(client, "prompt")
 
         assert result == "hello"
-        mock_sleep.assert_not_called()
+        mock_pacer.pause.assert_not_called()
 
-    @patch("immermatch.llm.time.sleep")
-    def test_retries_on_server_error(self, mock_sleep: MagicMock):
+    @patch("immermatch.llm._gemini_rate_limiter")
+    def test_retries_on_server_error(self, mock_pacer: MagicMock):
         client = self._make_client(
             [
                 ServerError(503, {"error": "Unavailable"}),
@@ -80,10 +108,11 @@ class TestCallGemini:
         result = call_gemini(client, "prompt")
 
         assert result == "recovered"
-        assert mock_sleep.call_count == 1
+        assert mock_pacer.pause.call_count == 1
+        assert mock_pacer.acquire.call_count == 2
 
-    @patch("immermatch.llm.time.sleep")
-    def test_retries_on_429_client_error(self, mock_sleep: MagicMock):
+    @patch("immermatch.llm._gemini_rate_limiter")
+    def test_retries_on_429_client_error(self, mock_pacer: MagicMock):
         client = self._make_client(
             [
                 ClientError(429, {"error": "RESOURCE_EXHAUSTED"}),
@@ -94,16 +123,41 @@ class TestCallGemini:
         result = call_gemini(client, "prompt")
 
         assert result == "ok"
-        assert mock_sleep.call_count == 1
+        assert mock_pacer.pause.call_count == 1
+        assert mock_pacer.acquire.call_count == 2
+
+    @patch("immermatch.llm._gemini_rate_limiter")
+    def test_429_text_in_other_client_error_is_not_retried(self, mock_pacer: MagicMock):
+        client = self._make_client([ClientError(400, {"error": {"message": "prompt mentions 429 RESOURCE_EXHAUSTED"}})])
 
-    @patch("immermatch.llm.time.sleep")
-    def test_raises_immediately_on_non_429_client_error(self, mock_sleep: MagicMock):
+        with pytest.raises(ClientError):
+            call_gemini(client, "prompt")
+
+        mock_pacer.pause.assert_not_called()
+
+    @patch("immermatch.llm._gemini_concurrency")
+    @patch("immermatch.llm._gemini_rate_limiter")
+    def test_429_shrinks_concurrency_and_success_grows_it(self, _mock_pacer: MagicMock, mock_limiter: MagicMock):
+        client = self._make_client(
+            [
+                ClientError(429, {"error": "RESOURCE_EXHAUSTED"}),
+                self._make_response("ok"),
+            ]
+        )
+
+        call_gemini(client, "prompt")
+
+        mock_limiter.record_throttle.assert_called_once()
+        mock_limiter.record_success.assert_called_once()
+
+    @patch("immermatch.llm._gemini_rate_limiter")
+    def test_raises_immediately_on_non_429_client_error(self, mock_pacer: MagicMock):
         client = self._make_client([ClientError(400, {"error": "Bad Request"})])
 
         with pytest.raises(ClientError):
             call_gemini(client, "prompt")
 
-        mock_sleep.assert_not_called()
+        mock_pacer.pause.assert_not_called()
 
     def test_response_schema_flows_to_config(self):
         """When response_schema is provided, config includes structured output params."""
@@ -128,3 +182,51 @@ class TestCallGemini:
             "config"
         ) or client.models.generate_content.call_args[1].get("config")
         assert config.response_mime_type is None
+
+    @patch.dict("immermatch.llm._response_cache", clear=True)
+    def test_low_temperature_repeat_is_served_from_cache(self):
+        client = self._make_client([self._make_response("cached")])
+
+        first = call_gemini(client, "same prompt", temperature=0.2)
+        second = call_gemini(client, "same prompt", temperature=0.2)
+
+        assert first == second == "cached"
+        assert client.models.generate_content.call_count == 1
+
+    @patch.dict("immermatch.llm._response_cache", clear=True)
+    def test_cache_key_includes_generation_settings(self):
+        client = self._make_client([self._make_response("a"), self._make_response("b")])
+
+        call_gemini(client, "same prompt", temperature=0.2, max_tokens=512)
+        result = call_gemini(client, "same prompt", temperature=0.2, max_tokens=1024)
+
+        assert result == "b"
+        assert client.models.generate_content.call_count == 2
+
+    @patch.dict("immermatch.llm._response_cache", clear=True)
+    def test_default_temperature_is_not_cached(self):
+        client = self._make_client([self._make_response("first"), self._make_response("second")])
+
+        call_gemini(client, "same prompt")
+        result = call_gemini(client, "same prompt")
+
+        assert result == "second"
+        assert client.models.generate_content.call_count == 2
+
+
+class TestCreateClient:
+    def test_missing_api_key_raises(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+
+        with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
+            create_client()
+
+    @patch("immermatch.llm.genai.Client")
+    def test_uses_shared_http2_pool(self, mock_client_cls: MagicMock, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+
+        create_client()
+
+        http_options = mock_client_cls.call_args.kwargs["http_options"]
+        assert http_options.client_args["http2"] is True
+        assert http_options.client_args["limits"].max_keepalive_connections == 30
@@ -202,6 +202,22 @@ class TestJobListing:
         assert j.posted_at == ""
         assert j.apply_options == []
 
+    def test_cache_key(self):
+        j = JobListing(title="Dev", company_name="Corp", location="Berlin")
+        assert j.cache_key == "dev|corp|berlin"
+        assert "cache_key" not in j.model_dump()
+
+    def test_cache_key_ignores_case_and_surrounding_whitespace(self):
+        a = JobListing(title="Python Developer ", company_name="ACME", location="Berlin")
+        b = JobListing(title="python developer", company_name=" Acme", location="berlin")
+        assert a.cache_key == b.cache_key
+
+    def test_cache_key_follows_model_copy_updates(self):
+        j = JobListing(title="Dev", company_name="Corp", location="Berlin")
+        assert j.cache_key == "dev|corp|berlin"
+
+        assert j.model_copy(update={"location": "Munich"}).cache_key == "dev|corp|munich"
+
 
 class TestEvaluatedJob:
     def test_nesting(self, sample_evaluated_job):
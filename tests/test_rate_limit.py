@@ -0,0 +1,96 @@
+"""Tests for immermatch.rate_limit — RateLimiter pacing and AIMD concurrency."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from immermatch.rate_limit import AdaptiveConcurrencyLimiter, RateLimiter
+
+
+class TestRateLimiter:
+    @patch("immermatch.rate_limit.sleep")
+    @patch("immermatch.rate_limit.monotonic", return_value=100.0)
+    def test_first_call_does_not_wait(self, _mock_clock: MagicMock, mock_sleep: MagicMock):
+        RateLimiter(rate=10).acquire()
+
+        mock_sleep.assert_not_called()
+
+    @patch("immermatch.rate_limit.sleep")
+    @patch("immermatch.rate_limit.monotonic", return_value=100.0)
+    def test_back_to_back_calls_are_spaced(self, _mock_clock: MagicMock, mock_sleep: MagicMock):
+        limiter = RateLimiter(rate=10, per=1.0)
+
+        for _ in range(3):
+            limiter.acquire()
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == pytest.approx([0.1, 0.2])
+
+    @patch("immermatch.rate_limit.sleep")
+    @patch("immermatch.rate_limit.monotonic")
+    def test_idle_time_frees_the_next_slot(self, mock_clock: MagicMock, mock_sleep: MagicMock):
+        limiter = RateLimiter(rate=2, per=1.0)
+        mock_clock.side_effect = [100.0, 101.0]
+
+        limiter.acquire()
+        limiter.acquire()
+
+        mock_sleep.assert_not_called()
+
+    @patch("immermatch.rate_limit.sleep")
+    @patch("immermatch.rate_limit.monotonic", return_value=100.0)
+    def test_pause_delays_every_following_caller(self, _mock_clock: MagicMock, mock_sleep: MagicMock):
+        limiter = RateLimiter(rate=10, per=1.0)
+
+        limiter.pause(5.0)
+        limiter.acquire()
+        limiter.acquire()
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == pytest.approx([5.0, 5.1])
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
+
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_throttle_halves_limit_down_to_minimum(self):
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8, min_limit=2)
+
+        limiter.record_throttle()
+        assert limiter.limit == 4
+        limiter.record_throttle()
+        limiter.record_throttle()
+        assert limiter.limit == 2
+
+    def test_successes_grow_limit_additively_up_to_max(self):
+        limiter = AdaptiveConcurrencyLimiter(max_limit=4)
+        limiter.record_throttle()
+        assert limiter.limit == 2
+
+        for _ in range(3):
+            limiter.record_success()
+        assert limiter.limit == 3
+
+        for _ in range(20):
+            limiter.record_success()
+        assert limiter.limit == 4
+
+    def test_blocks_when_limit_reached(self):
+        limiter = AdaptiveConcurrencyLimiter(max_limit=1)
+        entered = threading.Event()
+
+        def _worker() -> None:
+            with limiter:
+                entered.set()
+
+        with limiter:
+            thread = threading.Thread(target=_worker)
+            thread.start()
+            assert not entered.wait(0.05)
+        thread.join(timeout=1)
+        assert entered.is_set()
+
+    def test_rejects_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(max_limit=2, min_limit=3)
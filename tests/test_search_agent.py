@@ -65,6 +65,16 @@ class TestInferGl:
     def test_case_insensitive(self):
         assert _infer_gl("BERLIN") == "de"
 
+    @pytest.mark.parametrize("location", ["Kyiv, Ukraine", "Duke University"])
+    def test_names_match_whole_words_only(self, location: str):
+        assert _infer_gl(location) == "de"
+
+    def test_longest_name_wins(self):
+        assert _infer_gl("United Kingdom") == "uk"
+
+    def test_first_named_place_wins(self):
+        assert _infer_gl("Basel, open to Germany") == "ch"
+
 
 class TestLocaliseQuery:
     def test_munich_to_muenchen(self):
@@ -229,6 +239,23 @@ class TestSearchAllQueries:
 
         assert len(results) == 2
 
+    def test_dedup_ignores_case_and_surrounding_whitespace(self):
+        provider = self._make_provider(
+            [
+                self._make_job("Python Developer", company="SAP SE"),
+                self._make_job("python developer ", company="SAP SE", location="berlin"),
+            ]
+        )
+
+        results = search_all_queries(
+            queries=["query1"],
+            location="Berlin",
+            min_unique_jobs=0,
+            provider=provider,
+        )
+
+        assert [job.title for job in results] == ["Python Developer"]
+
     def test_stops_early_when_min_unique_jobs_reached(self):
         provider = self._make_provider([self._make_job("Unique Job")])
 
@@ -441,6 +468,20 @@ class TestLlmJsonRecovery:
 
         assert result.experience_level == "Mid"
         assert mock_call_gemini.call_count == 2
+        assert mock_call_gemini.call_args.kwargs["temperature"] == 0.3
+
+    @patch("immermatch.search_api.search_agent.call_gemini")
+    def test_profile_candidate_reuses_profile_for_reflowed_cv(
+        self, mock_call_gemini: MagicMock, sample_profile: CandidateProfile
+    ):
+        mock_call_gemini.return_value = sample_profile.model_dump_json()
+
+        first = profile_candidate(MagicMock(), "Jane Doe\nPython   developer\n")
+        second = profile_candidate(MagicMock(), "  Jane Doe Python\n\ndeveloper")
+
+        assert second == first
+        assert second is not first
+        assert mock_call_gemini.call_count == 1
 
     @patch("immermatch.search_api.search_agent.call_gemini")
     def test_generate_search_queries_retries_after_invalid_json(self, mock_call_gemini: MagicMock):
@@ -656,3 +697,37 @@ class TestGenerateSearchQueriesProviderPrompt:
         prompts_sent = [call.args[1] for call in mock_call_gemini.call_args_list]
         assert any("Bundesagentur" in prompt for prompt in prompts_sent)
         assert any("Google Jobs" in prompt for prompt in prompts_sent)
+
+    @patch("immermatch.search_api.search_agent.call_gemini")
+    def test_empty_profile_falls_back_without_llm(self, mock_call_gemini: MagicMock):
+        empty = self._PROFILE.model_copy(
+            update={"skills": [], "roles": [], "domain_expertise": [], "work_history": [], "summary": ""}
+        )
+
+        queries = generate_search_queries(MagicMock(), empty, location="Berlin", num_queries=5, provider=MagicMock())
+
+        assert queries == ["remote Berlin"]
+        mock_call_gemini.assert_not_called()
+
+    @patch("immermatch.search_api.search_agent.call_gemini")
+    def test_summary_only_profile_still_uses_llm(self, mock_call_gemini: MagicMock):
+        mock_call_gemini.return_value = '["Analyst Berlin"]'
+        summary_only = self._PROFILE.model_copy(
+            update={"skills": [], "roles": [], "domain_expertise": [], "summary": "Finance analyst."}
+        )
+
+        queries = generate_search_queries(
+            MagicMock(), summary_only, location="Berlin", num_queries=5, provider=MagicMock()
+        )
+
+        assert queries == ["Analyst Berlin"]
+        mock_call_gemini.assert_called_once()
+
+    @patch("immermatch.search_api.search_agent.call_gemini")
+    def test_zero_queries_skips_llm(self, mock_call_gemini: MagicMock):
+        queries = generate_search_queries(
+            MagicMock(), self._PROFILE, location="Berlin", num_queries=0, provider=MagicMock()
+        )
+
+        assert queries == []
+        mock_call_gemini.assert_not_called()
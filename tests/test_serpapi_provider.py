@@ -1,17 +1,29 @@
 """Tests for immermatch.search_api.serpapi_provider — blocklist, staleness, reliability."""
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 
+from immermatch.models import JobListing
 from immermatch.search_api.serpapi_provider import (
     BLOCKED_PORTALS,
+    SerpApiProvider,
+    _get_with_retry,
     _is_stale,
     _load_blocked_portals,
+    _matches_portal,
+    _portal_index,
     parse_job_results,
 )
 
 
+@pytest.fixture(autouse=True)
+def _clear_page_cache():
+    with patch.dict("immermatch.search_api.serpapi_provider._page_cache", clear=True):
+        yield
+
+
 class TestBlockedPortals:
     def test_loads_from_file(self):
         portals = _load_blocked_portals()
@@ -37,6 +49,18 @@ class TestBlockedPortals:
             assert _load_blocked_portals() == set()
 
 
+class TestMatchesPortal:
+    index = _portal_index({"indeed", ".jobs.example.com", " "})
+
+    @pytest.mark.parametrize("domain", ["indeed.com", "de.indeed.com", "jobs.example.com", "eu.jobs.example.com"])
+    def test_matches_labels_and_dotted_suffixes(self, domain: str):
+        assert _matches_portal(domain, self.index) is True
+
+    @pytest.mark.parametrize("domain", ["notindeed.com", "myjobs.example.com", "example.com"])
+    def test_requires_whole_labels(self, domain: str):
+        assert _matches_portal(domain, self.index) is False
+
+
 class TestIsStale:
     @pytest.mark.parametrize(
         "posted_at",
@@ -157,15 +181,99 @@ class TestReliabilityClassification:
 
 
 class TestChipsParam:
-    @patch("immermatch.search_api.serpapi_provider.GoogleSearch")
-    def test_search_includes_chips(self, mock_search_cls):
-        mock_instance = mock_search_cls.return_value
-        mock_instance.get_dict.return_value = {"jobs_results": []}
+    @patch("immermatch.search_api.serpapi_provider._http_client")
+    def test_search_includes_chips(self, mock_http):
+        mock_get = mock_http.return_value.get
+        mock_get.return_value.json.return_value = {"jobs_results": []}
 
         from immermatch.search_api.serpapi_provider import search_jobs
 
         with patch.dict("os.environ", {"SERPAPI_KEY": "test-key"}):  # pragma: allowlist secret
             search_jobs("Python Developer", num_results=5)
 
-        params = mock_search_cls.call_args[0][0]
+        params = mock_get.call_args.kwargs["params"]
         assert params["chips"] == "date_posted:week"
+
+
+class TestPageCache:
+    @patch("immermatch.search_api.serpapi_provider._http_client")
+    def test_repeat_search_is_served_from_cache(self, mock_http):
+        mock_get = mock_http.return_value.get
+        mock_get.return_value.json.return_value = {"jobs_results": []}
+
+        from immermatch.search_api.serpapi_provider import search_jobs
+
+        with patch.dict("os.environ", {"SERPAPI_KEY": "test-key"}):  # pragma: allowlist secret
+            search_jobs("Python Developer", num_results=5)
+            search_jobs("Python Developer", num_results=5)
+            search_jobs("Go Developer", num_results=5)
+
+        assert mock_get.call_count == 2
+
+    @patch("immermatch.search_api.serpapi_provider._http_client")
+    def test_error_responses_are_not_cached(self, mock_http):
+        mock_get = mock_http.return_value.get
+        mock_get.return_value.json.return_value = {"error": "Rate limited"}
+
+        from immermatch.search_api.serpapi_provider import search_jobs
+
+        with patch.dict("os.environ", {"SERPAPI_KEY": "test-key"}):  # pragma: allowlist secret
+            search_jobs("Python Developer", num_results=5)
+            search_jobs("Python Developer", num_results=5)
+
+        assert mock_get.call_count == 2
+
+
+class TestSerpApiProviderSearch:
+    @patch("immermatch.search_api.serpapi_provider.location_search_variants", return_value=["Munich", "München"])
+    @patch("immermatch.search_api.serpapi_provider.search_jobs")
+    def test_merges_variants_in_order_and_dedupes(self, mock_search_jobs, _mock_variants):
+        def _jobs(_query, num_results, gl, location):
+            shared = JobListing(title="Dev", company_name="Acme", location="Munich")
+            own = JobListing(title=f"Dev {location}", company_name="Acme", location=location)
+            return [own, shared]
+
+        mock_search_jobs.side_effect = _jobs
+
+        jobs = SerpApiProvider().search("Developer", "Munich", max_results=10)
+
+        assert [job.title for job in jobs] == ["Dev Munich", "Dev", "Dev München"]
+        assert {c.kwargs["location"] for c in mock_search_jobs.call_args_list} == {"Munich", "München"}
+        assert all(c.kwargs["num_results"] == 5 for c in mock_search_jobs.call_args_list)
+
+
+class TestGetWithRetry:
+    @patch("immermatch.search_api.serpapi_provider.time.sleep")
+    @patch("immermatch.search_api.serpapi_provider._http_client")
+    def test_retries_transient_server_errors(self, mock_http, mock_sleep):
+        failed = MagicMock(status_code=503)
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"jobs_results": []}
+        mock_http.return_value.get.side_effect = [failed, ok]
+
+        assert _get_with_retry({"q": "x"}) == {"jobs_results": []}
+        assert mock_http.return_value.get.call_count == 2
+        mock_sleep.assert_called_once()
+
+    @patch("immermatch.search_api.serpapi_provider.time.sleep")
+    @patch("immermatch.search_api.serpapi_provider._http_client")
+    def test_network_error_raises_after_last_attempt(self, mock_http, mock_sleep):
+        mock_http.return_value.get.side_effect = httpx.ConnectError("boom")
+
+        with pytest.raises(RuntimeError, match="after 3 attempts: network error: boom") as excinfo:
+            _get_with_retry({"q": "x"})
+        assert isinstance(excinfo.value.__cause__, httpx.ConnectError)
+        assert mock_http.return_value.get.call_count == 3
+        assert mock_sleep.call_count == 2
+
+    @patch("immermatch.search_api.serpapi_provider.time.sleep")
+    @patch("immermatch.search_api.serpapi_provider._http_client")
+    def test_persistent_server_error_raises_without_parsing_body(self, mock_http, mock_sleep):
+        failed = MagicMock(status_code=503)
+        failed.json.side_effect = ValueError("<html>Service Unavailable</html>")
+        mock_http.return_value.get.return_value = failed
+
+        with pytest.raises(RuntimeError, match="after 3 attempts: HTTP 503"):
+            _get_with_retry({"q": "x"})
+        assert mock_http.return_value.get.call_count == 3
+        failed.json.assert_not_called()